@@ -0,0 +1,66 @@
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from logs_parser.dmesg_parser import parse_dmesg
+
+SAMPLE_LOG = os.path.join(os.path.dirname(__file__), '..', 'logs', 'dmesg.log')
+_PREFIX_RE = re.compile(r'^.*? - INFO - ')
+_STAMP_RE = re.compile(r'\[\s*(\d+\.\d+)\]')
+
+
+def make_buffer(path, target_lines):
+    """Repeat the sample dmesg capture (with shifted timestamps) up to `target_lines` lines."""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        sample = [_PREFIX_RE.sub('', line.rstrip('\n')) for line in f if '[' in line]
+    sample = [line for line in sample if _STAMP_RE.search(line)]
+    lines = []
+    offset = 0.0
+    while len(lines) < target_lines:
+        for line in sample:
+            lines.append(_STAMP_RE.sub(
+                lambda m: f"[{float(m.group(1)) + offset:12.6f}]", line, count=1))
+        offset += 1.0
+    lines = lines[:target_lines]
+    lines.append(f"\x1b[32m[{offset + 1:12.6f}] \x1b[0mRun /sbin/init as init process")
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regression benchmark for the dmesg parser.")
+    parser.add_argument('--log', default=SAMPLE_LOG, help="dmesg capture used as input")
+    parser.add_argument('--lines', type=int, default=50000, help="Lines in the synthetic buffer")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs; the best one is reported")
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help="Fail (exit 1) if parse + summary takes longer than this")
+    args = parser.parse_args()
+
+    text = make_buffer(args.log, args.lines)
+    best_parse = best_total = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        table = parse_dmesg(text)
+        parsed = time.perf_counter()
+        summary = table.summary()
+        warnings = table.lines(table.indices(severity=4))
+        errors = table.lines(table.indices(max_severity=3))
+        done = time.perf_counter()
+        best_parse = min(best_parse or 1e9, parsed - start)
+        best_total = min(best_total or 1e9, done - start)
+
+    print(f"{len(table)} lines, {len(text) / 1e6:.1f} MB")
+    print(f"parse: {best_parse * 1000:.1f} ms   parse + summary: {best_total * 1000:.1f} ms")
+    print(f"boot time {summary['boot_time']:.6f}s, {len(summary['subsystems'])} subsystems, "
+          f"{len(warnings)} warnings, {len(errors)} errors")
+    if args.max_ms is not None and best_total * 1000 > args.max_ms:
+        print(f"Regression: {best_total * 1000:.1f} ms > {args.max_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from logs_parser.logs_paerser import FlagScanner
+
+SAMPLE_LOG = os.path.join(os.path.dirname(__file__), '..', 'logs', 'cat_gain_log.log')
+
+
+def legacy_parse_line_for_flags(line, flags):
+    """The original per-flag implementation, kept for comparison."""
+    found = {}
+    for flag in flags:
+        if flag in line:
+            pattern = rf'{flag}\s*=\s*([^\s,]+)'
+            match = re.search(pattern, line)
+            if match:
+                found[flag] = match.group(1)
+            else:
+                found[flag] = None
+    return found
+
+
+def load_lines(path, target_lines):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        lines = [line.rstrip('\n') for line in f]
+    # Sprinkle some flag=value pairs in so value extraction is exercised too
+    rng = random.Random(0)
+    lines = [line + f" code=0x{rng.randrange(1 << 16):04x}" if rng.random() < 0.05 else line
+             for line in lines]
+    repeat = max(1, target_lines // len(lines))
+    return lines * repeat
+
+
+def make_flags(count):
+    base = ['GAIN-HM-PBIT', 'GAIN-EXTERN-COMM', 'CRIT', 'ERROR', 'Front Panel', 'code',
+            'Configuration Error', 'PBIT']
+    rng = random.Random(1)
+    extra = [f"GAIN-FLAG-{rng.randrange(1 << 20):05X}" for _ in range(max(0, count - len(base)))]
+    return (base + extra)[:count]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare FlagScanner with the per-flag regex loop.")
+    parser.add_argument('--log', default=SAMPLE_LOG, help="Log file used as input")
+    parser.add_argument('--lines', type=int, default=200000, help="Approximate number of lines to scan")
+    parser.add_argument('--flags', type=int, nargs='+', default=[8, 100, 300], help="Flag list sizes")
+    args = parser.parse_args()
+
+    lines = load_lines(args.log, args.lines)
+    text = '\n'.join(lines) + '\n'
+    print(f"{len(lines)} lines, {len(text) / 1e6:.1f} MB")
+    print(f"{'flags':>6} {'legacy':>10} {'scan_line':>10} {'scan_chunk':>11} {'speedup':>8}")
+
+    for count in args.flags:
+        flags = make_flags(count)
+        legacy_time, legacy = timed(lambda: [legacy_parse_line_for_flags(line, flags) for line in lines])
+        scanner = FlagScanner(flags)
+        line_time, per_line = timed(lambda: [scanner.scan_line(line) for line in lines])
+        chunk_time, chunked = timed(lambda: scanner.scan_chunk(text))
+
+        assert per_line == legacy, "scan_line disagrees with the legacy parser"
+        assert [found for found in legacy if found] == [found for _, found in chunked], \
+            "scan_chunk disagrees with the legacy parser"
+        print(f"{count:>6} {legacy_time:>9.2f}s {line_time:>9.2f}s {chunk_time:>10.2f}s "
+              f"{legacy_time / chunk_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
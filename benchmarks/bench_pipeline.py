@@ -0,0 +1,264 @@
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from simulator.virtual_device import VirtualDevice
+from simulator.canned_output import generate_dmesg, generate_gain_log
+from serial_comm.Serial_Comm import SerialComm
+from serial_comm.Command_manager import CommandManager
+from serial_comm.Login_manager import LoginManager
+from serial_comm.Credentials import MemoryCredentials
+from serial_comm.Log_writer import CommandLogWriter
+from logs_parser.logs_paerser import parse_line_for_flags
+
+FLAGS = ['GAIN-HM-PBIT', 'GAIN-EXTERN-COMM', 'CRIT', 'ERROR', 'Front Panel', 'code',
+         'Configuration Error', 'PBIT']
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def latency_metrics(samples):
+    return {
+        'commands_per_s': len(samples) / sum(samples),
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+    }
+
+
+class Bench:
+    """
+    One session against a VirtualDevice: the device, an open SerialComm, a
+    CommandManager writing to a throw-away logs folder, and the sizes of the
+    workloads.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        # Inputs of the host-only benchmarks, built up front so they are not timed or traced
+        self.gain_lines = generate_gain_log(args.lines, seed=1).splitlines()
+        dmesg_text = generate_dmesg(args.lines, seed=3)
+        self.dmesg_chunks = [dmesg_text[i:i + 4096] for i in range(0, len(dmesg_text), 4096)]
+        self.workdir = tempfile.mkdtemp(prefix='bench_pipeline_')
+        self.device = VirtualDevice(baudrate=args.baud, latency=args.latency, login_id='root',
+                                    password='root', dmesg_lines=args.capture_lines,
+                                    gain_records=1000)
+        self.device.start()
+        config = self.device.write_config(os.path.join(self.workdir, 'bench.ini'))
+        self.serial_comm = SerialComm(config)
+        self.serial_comm.open()
+        self.log_writer = CommandLogWriter()
+        self.manager = CommandManager(self.serial_comm, logs_dir=os.path.join(self.workdir, 'logs'),
+                                      log_writer=self.log_writer, device='bench')
+        # Fixed in-memory credentials, so the benchmark needs no keyring backend
+        self.login_manager = LoginManager(self.serial_comm, credentials=MemoryCredentials('root', 'root'))
+        if not self.login_manager.login_sequence(output_callback=lambda msg: None):
+            raise RuntimeError("cannot log in to the virtual device")
+
+    def close(self):
+        self.log_writer.close()
+        self.serial_comm.close()
+        self.device.stop()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    # --- device round trips ---
+
+    def bench_login(self):
+        samples = []
+        for _ in range(self.args.logins):
+            self.manager.run_command_framed('exit', timeout=1)
+            start = time.perf_counter()
+            if not self.login_manager.login_sequence(output_callback=lambda msg: None):
+                raise RuntimeError("login failed")
+            samples.append(time.perf_counter() - start)
+        return {'p50_ms': percentile(samples, 0.50) * 1000, 'max_ms': max(samples) * 1000}
+
+    def _timed_commands(self, run):
+        samples = []
+        for i in range(self.args.commands):
+            start = time.perf_counter()
+            run(f"echo bench {i}")
+            samples.append(time.perf_counter() - start)
+        return latency_metrics(samples)
+
+    def bench_run_command(self):
+        return self._timed_commands(lambda command: self.manager.run_command(command))
+
+    def bench_run_command_framed(self):
+        return self._timed_commands(lambda command: self.manager.run_command_framed(command))
+
+    def bench_run_batch(self):
+        commands = [f"echo bench {i}" for i in range(self.args.commands)]
+        start = time.perf_counter()
+        results = self.manager.run_batch(commands)
+        elapsed = time.perf_counter() - start
+        if not all(result.ok for result in results):
+            raise RuntimeError("batch commands failed")
+        return {'commands_per_s': len(commands) / elapsed}
+
+    def bench_capture(self):
+        """Capture of a long output (the virtual device's dmesg) through run_command and its log."""
+        start = time.perf_counter()
+        output = self.manager.run_command('dmesg', timeout=120)
+        self.log_writer.flush()
+        elapsed = time.perf_counter() - start
+        return {'lines_per_s': len(output.splitlines()) / elapsed}
+
+    # --- host-only hot paths ---
+
+    def bench_log_writer(self):
+        lines = self.gain_lines
+        writer = CommandLogWriter()
+        filename = os.path.join(self.workdir, 'log_writer.log')
+        start = time.perf_counter()
+        for line in lines:
+            writer.write(filename, line)
+        writer.flush(timeout=None)
+        elapsed = time.perf_counter() - start
+        writer.close()
+        return {'lines_per_s': len(lines) / elapsed}
+
+    def bench_flag_parse(self):
+        lines = self.gain_lines
+        start = time.perf_counter()
+        for line in lines:
+            parse_line_for_flags(line, FLAGS)
+        return {'lines_per_s': len(lines) / (time.perf_counter() - start)}
+
+    def bench_ui_append(self):
+        """Line store behind the UI output pane, fed in serial-sized chunks (no display needed)."""
+        from ui.log_viewer import LineStore
+
+        store = LineStore()
+        start = time.perf_counter()
+        for chunk in self.dmesg_chunks:
+            store.append_text(chunk)
+        return {'lines_per_s': store.end / (time.perf_counter() - start)}
+
+
+BENCHMARKS = ['login', 'run_command', 'run_command_framed', 'run_batch', 'capture',
+              'log_writer', 'flag_parse', 'ui_append']
+
+
+def run_one(bench, name, repeat, measure_memory):
+    """
+    Run one benchmark `repeat` times and keep the best value of every metric;
+    with measure_memory, run it once more under tracemalloc for the peak.
+    """
+    best = {}
+    for _ in range(repeat):
+        gc.collect()
+        for metric, value in getattr(bench, f"bench_{name}")().items():
+            if metric not in best:
+                best[metric] = value
+            else:
+                best[metric] = max(best[metric], value) if higher_is_better(metric) else min(best[metric], value)
+    if measure_memory:
+        gc.collect()
+        tracemalloc.start()
+        getattr(bench, f"bench_{name}")()
+        best['peak_mb'] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return best
+
+
+def higher_is_better(metric):
+    return metric.endswith('_per_s')
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare two result sets.
+
+    Returns:
+        tuple: (report lines, list of regressed 'benchmark.metric' names).
+    """
+    report, regressions = [], []
+    report.append(f"{'benchmark':<20} {'metric':<16} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(name, {}).get(metric)
+            if base is None or not base:
+                continue
+            change = (value - base) / base
+            worse = -change if higher_is_better(metric) else change
+            flag = ''
+            if worse > tolerance:
+                flag = '  REGRESSION'
+                regressions.append(f"{name}.{metric}")
+            report.append(f"{name:<20} {metric:<16} {base:>12.2f} {value:>12.2f} {change:>+7.0%}{flag}")
+    return report, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the serial command pipeline against a virtual device.")
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, default=None, help="Benchmarks to run")
+    parser.add_argument('--baud', type=int, default=0, help="Simulated line speed (0 = unpaced, default)")
+    parser.add_argument('--latency', type=float, default=0.0, help="One-way line delay in seconds")
+    parser.add_argument('--commands', type=int, default=200, help="Commands per command benchmark")
+    parser.add_argument('--logins', type=int, default=5, help="Logins in the login benchmark")
+    parser.add_argument('--capture-lines', type=int, default=20000, help="Lines of dmesg output captured")
+    parser.add_argument('--lines', type=int, default=200000, help="Lines for the host-only benchmarks")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per benchmark; the best one is reported")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc peak-memory passes")
+    parser.add_argument('--output', default=None, help="Write the results as JSON to this file")
+    parser.add_argument('--baseline', default=None, help="Compare against a results JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.20,
+                        help="Allowed slowdown before a metric counts as regressed (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    names = args.only or BENCHMARKS
+    results = {}
+    bench = Bench(args)
+    try:
+        for name in names:
+            results[name] = run_one(bench, name, args.repeat, not args.no_memory)
+            print(f"{name:<20} " + '  '.join(f"{metric}={value:.2f}" for metric, value in results[name].items()))
+    finally:
+        bench.close()
+
+    document = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'baud': args.baud,
+            'latency': args.latency,
+            'commands': args.commands,
+            'repeat': args.repeat,
+            'capture_lines': args.capture_lines,
+            'lines': args.lines,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        print(f"[*] Saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report, regressions = compare(results, baseline.get('results', {}), args.tolerance)
+        print('\n'.join(report))
+        if regressions:
+            print(f"Regression in {', '.join(regressions)} (tolerance {args.tolerance:.0%})")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import argparse
+import sys
+
+from serial_comm.Fleet_runner import FleetRunner
+
+
+def load_commands(path):
+    """One command per line; blank lines and lines starting with '#' are ignored."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a command list on every unit in the config inventory.")
+    parser.add_argument('commands_file', help="Text file with one command per line")
+    parser.add_argument('--config', default='config.ini', help="Config file with [SerialPort:<name>] sections")
+    parser.add_argument('--timeout', type=float, default=10, help="Per-command timeout in seconds")
+    parser.add_argument('--concurrency', type=int, default=None, help="Maximum units driven at once")
+    parser.add_argument('--no-login', action='store_true', help="Skip the login sequence")
+    parser.add_argument('--report', default=None, help="Path of the JSON report")
+    args = parser.parse_args()
+
+    commands = load_commands(args.commands_file)
+    runner = FleetRunner(args.config, login=not args.no_login, max_concurrency=args.concurrency,
+                         command_timeout=args.timeout)
+    if not runner.devices:
+        print(f"Error: No [SerialPort] sections found in '{args.config}'.")
+        return 1
+
+    print(f"Running {len(commands)} commands on {len(runner.devices)} units\n{'='*60}")
+    reports = runner.run(commands, output_callback=print)
+
+    for report in reports:
+        failed = sum(1 for result in report['results'] if result['exit_status'] != 0)
+        status = report['error'] or f"{len(report['results'])} commands, {failed} failed"
+        print(f"{report['device']:<16} {report['port'] or '-':<16} {report['total_time']:7.2f}s  {status}")
+
+    summary = runner.summarize(reports)
+    report_file = runner.save_report(reports, args.report)
+    print(f"\n{summary['devices_ok']}/{summary['devices']} units OK, "
+          f"{summary['commands_failed']} failed commands, "
+          f"wall time bounded by slowest unit: {summary['slowest_device_time']:.2f}s")
+    print(f"Report saved to {report_file}")
+    return 0 if summary['devices_ok'] == summary['devices'] and not summary['commands_failed'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+import argparse
+import sys
+from datetime import datetime
+
+from serial_comm.Log_store import LogStore, log_store_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search captured command output in the indexed log store.")
+    parser.add_argument('text', nargs='?', default=None, help="Phrase to search for")
+    parser.add_argument('--db', default=None,
+                        help="Log store database (default: [LogStore] path of the config file)")
+    parser.add_argument('--config', default='config.ini', help="Config file (default: config.ini)")
+    parser.add_argument('--severity', nargs='+', default=None, help="Level tokens, e.g. CRIT ERR")
+    parser.add_argument('--device', default=None, help="Device name")
+    parser.add_argument('--command', default=None, help="Exact command")
+    parser.add_argument('--since', default=None, help="Start time: 'YYYY-MM-DD [HH:MM[:SS]]' or age like 7d, 2h")
+    parser.add_argument('--until', default=None, help="End time, same formats as --since")
+    parser.add_argument('--limit', type=int, default=100, help="Maximum number of lines")
+    parser.add_argument('--ingest', nargs='+', default=None, metavar='LOG',
+                        help="Import existing logs/<command>.log files instead of searching")
+    parser.add_argument('--ingest-device', default=None, help="Device name for --ingest")
+    args = parser.parse_args(argv)
+    if args.db is None:
+        # The same database CommandManager records into
+        args.db = log_store_path(args.config)
+
+    store = LogStore(args.db)
+    try:
+        if args.ingest:
+            total = 0
+            for path in args.ingest:
+                runs = store.ingest_file(path, device=args.ingest_device)
+                total += runs
+                print(f"[*] {path}: {runs} runs")
+            store.flush(timeout=None)
+            print(f"[*] Imported {total} runs into {args.db}")
+            return 0
+
+        rows = store.search(text=args.text, severity=args.severity, device=args.device,
+                            command=args.command, since=args.since, until=args.until, limit=args.limit)
+        for row in reversed(rows):
+            stamp = datetime.fromtimestamp(row['ts']).strftime('%Y-%m-%d %H:%M:%S')
+            print(f"{stamp} {row['device'] or '-'} [{row['command']}] {row['text']}")
+        print(f"[*] {len(rows)} lines")
+        return 0
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
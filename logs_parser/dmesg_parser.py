@@ -0,0 +1,190 @@
+import re
+from array import array
+from collections import Counter, defaultdict
+
+# Kernel log levels, as printed by `dmesg -x` / `dmesg -r`
+SEVERITY_NAMES = ('emerg', 'alert', 'crit', 'err', 'warn', 'notice', 'info', 'debug')
+ERR = 3
+WARN = 4
+INFO = 6
+
+# util-linux dmesg colour scheme -> log level
+_COLOUR_SEVERITY = {
+    '7;31': 1,  # alert (reverse red)
+    '1;31': 2,  # crit (bold red)
+    '31': ERR,  # err (red)
+    '1': WARN,  # warn (bold)
+}
+
+ANSI_RE = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+
+# One dmesg line: optional "<N>" raw priority and util-linux colours around the
+# timestamp, then the coloured subsystem and message. Not anchored, so anything
+# in front of the timestamp (e.g. the "date - INFO - " prefix of our command
+# logs) is skipped by the search itself.
+_LINE_RE = re.compile(
+    r'(?:<(\d)>)?'
+    r'(?:\x1b\[[0-9;]*m)?\[\s*(\d+\.\d+)\][ ]?(?:\x1b\[0m)?'
+    r'(?:\x1b\[33m[ ]*([^\x1b\n]*?)[ ]*\x1b\[0m)?'
+    r'(?:\x1b\[([0-9;]*)m)?'
+    r'(?(3):[ ]?)'
+    r'([^\n]*)')
+
+# Plain output: "subsystem: message" (short prefix without brackets), one match per line
+_PLAIN_RE = re.compile(r'^(?:[ ]*([^:\n\[\]]{1,40}?)[ ]*: )?([^\n]*)', re.M)
+
+# Hand-off from the kernel to userspace marks the end of the kernel boot
+_BOOT_MARKERS = (' as init process', 'Freeing unused kernel')
+
+
+def strip_ansi(text):
+    """Remove ANSI colour / cursor escape sequences."""
+    return ANSI_RE.sub('', text)
+
+
+class DmesgTable:
+    """
+    Columnar view of a dmesg buffer.
+
+    Timestamps, severities and subsystem ids are stored in flat `array` columns
+    (one entry per message); subsystem names are interned in `subsystems`.
+    Aggregates are computed with C-level builtins over whole columns rather
+    than per-line Python parsing.
+    """
+
+    def __init__(self, timestamps, severities, subsystem_ids, subsystems, messages):
+        self.timestamps = timestamps
+        self.severities = severities
+        self.subsystem_ids = subsystem_ids
+        self.subsystems = subsystems
+        self.messages = messages
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def subsystem(self, i):
+        sid = self.subsystem_ids[i]
+        return self.subsystems[sid] if sid >= 0 else None
+
+    def line(self, i):
+        """Row `i` formatted like plain dmesg output."""
+        subsystem = self.subsystem(i)
+        message = f"{subsystem}: {self.messages[i]}" if subsystem else self.messages[i]
+        return f"[{self.timestamps[i]:12.6f}] {message}"
+
+    def lines(self, indices):
+        return [self.line(i) for i in indices]
+
+    def indices(self, max_severity=None, severity=None):
+        """Row numbers with the given severity, or at most `max_severity` (more severe)."""
+        if severity is not None:
+            return [i for i, level in enumerate(self.severities) if level == severity]
+        return [i for i, level in enumerate(self.severities) if level <= max_severity]
+
+    def boot_index(self):
+        """Row of the kernel -> userspace hand-off, or None."""
+        candidates = []
+        text = '\n'.join(self.messages)
+        for marker in _BOOT_MARKERS:
+            pos = text.find(marker)
+            if pos >= 0:
+                candidates.append(text.count('\n', 0, pos))
+        # "Freeing unused kernel memory: ..." is usually split off as a subsystem
+        for sid, name in enumerate(self.subsystems):
+            if name.startswith('Freeing unused kernel'):
+                candidates.append(self.subsystem_ids.index(sid))
+                break
+        return min(candidates) if candidates else None
+
+    def boot_time(self):
+        """Seconds from power-on to userspace (last timestamp if no hand-off line)."""
+        if not len(self):
+            return None
+        index = self.boot_index()
+        return self.timestamps[index] if index is not None else max(self.timestamps)
+
+    def severity_counts(self):
+        """{severity name: count}, most severe first."""
+        counts = Counter(self.severities)
+        return {SEVERITY_NAMES[level]: counts[level] for level in sorted(counts)}
+
+    def subsystem_durations(self):
+        """
+        Per-subsystem timing.
+
+        Returns:
+            dict: {subsystem: {'first', 'last', 'span', 'spent', 'count'}} where
+            span is last - first message and spent is the time until the message
+            after each of its lines (time attributable to that driver's init).
+        """
+        ids = self.subsystem_ids
+        ts = self.timestamps
+        # dict() keeps the last value per key, so reversed input gives the first one
+        first = dict(zip(reversed(ids), reversed(ts)))
+        last = dict(zip(ids, ts))
+        counts = Counter(ids)
+        spent = defaultdict(float)
+        for sid, start, end in zip(ids, ts, ts[1:]):
+            spent[sid] += end - start
+        return {
+            self.subsystems[sid]: {
+                'first': first[sid],
+                'last': last[sid],
+                'span': last[sid] - first[sid],
+                'spent': spent[sid],
+                'count': counts[sid],
+            }
+            for sid in sorted(first) if sid >= 0
+        }
+
+    def summary(self):
+        return {
+            'lines': len(self),
+            'boot_time': self.boot_time(),
+            'severity_counts': self.severity_counts(),
+            'subsystems': self.subsystem_durations(),
+        }
+
+
+def parse_dmesg(text):
+    """
+    Parse raw or logged dmesg output into a DmesgTable.
+
+    Accepts plain `dmesg`, `dmesg -r` ("<N>" priorities) and coloured output, with
+    or without the "YYYY-MM-DD HH:MM:SS - INFO - " prefix of our command logs.
+    Severity comes from the priority or colour when present; plain output falls
+    back to keywords ("error"/"fail" -> err, "warn" -> warn).
+    """
+    rows = _LINE_RE.findall(text)
+    if not rows:
+        return DmesgTable(array('d'), array('b'), array('i'), [], [])
+    priorities, stamps, coloured_subsystems, colours, raw_messages = zip(*rows)
+
+    timestamps = array('d', map(float, stamps))
+    text = strip_ansi('\n'.join(raw_messages))
+
+    # Per-value lookups go through small dicts with map(), keeping the loops in C
+    coloured = any(coloured_subsystems) or any(colours)
+    if any(priorities):
+        levels = {p: int(p) if p else INFO for p in set(priorities)}
+        severities = array('b', map(levels.__getitem__, priorities))
+    elif coloured:
+        levels = {c: _COLOUR_SEVERITY.get(c, INFO) for c in set(colours)}
+        severities = array('b', map(levels.__getitem__, colours))
+    else:
+        severities = array('b', (ERR if ('error' in low or 'fail' in low) else
+                                 WARN if 'warn' in low else INFO
+                                 for low in text.lower().split('\n')))
+
+    if coloured:
+        subsystem_names = coloured_subsystems
+        messages = text.split('\n')
+    else:
+        subsystem_names, messages = zip(*_PLAIN_RE.findall(text))
+        messages = list(messages)
+
+    subsystems = [name for name in dict.fromkeys(subsystem_names) if name]
+    ids = {name: i for i, name in enumerate(subsystems)}
+    ids[''] = -1
+    subsystem_ids = array('i', map(ids.__getitem__, subsystem_names))
+    return DmesgTable(timestamps, severities, subsystem_ids, subsystems, messages)
@@ -0,0 +1,197 @@
+import argparse
+import calendar
+import json
+import mmap
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+# One gain.log record, optionally behind the "date - INFO - " prefix of our command logs:
+#   2020-09-20T10:44:16 2020-09-20T10:44:16 LOCALHOST [CRIT] [GAIN-HM-PBIT] Configuration Error: ...
+# Only the first timestamp is kept, truncated to whole seconds.
+_RECORD_RE = re.compile(
+    rb'(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)\S* \S+ (\S+) \[([A-Za-z]+)\] \[([^\]\n]+)\]')
+
+# Size of the slices a worker hands to the regex at a time (bounds per-worker memory)
+_SLICE_SIZE = 4 * 1024 * 1024
+
+
+class GainLogStats:
+    """
+    Aggregates of a gain.log capture: record counts per level, component, host
+    and (component, level), plus a per-component histogram of records per
+    time bucket. Partial results from several chunks are combined with merge().
+    """
+
+    def __init__(self, bucket_seconds=60):
+        self.bucket_seconds = bucket_seconds
+        self.records = 0
+        self.levels = Counter()
+        self.components = Counter()
+        self.hosts = Counter()
+        self.component_levels = Counter()
+        # component -> Counter(bucket start, epoch seconds -> records)
+        self.histogram = defaultdict(Counter)
+        self.first = None
+        self.last = None
+
+    def merge(self, other):
+        self.records += other.records
+        self.levels.update(other.levels)
+        self.components.update(other.components)
+        self.hosts.update(other.hosts)
+        self.component_levels.update(other.component_levels)
+        for component, buckets in other.histogram.items():
+            self.histogram[component].update(buckets)
+        for stamp in (other.first, other.last):
+            if stamp is not None:
+                self.first = stamp if self.first is None else min(self.first, stamp)
+                self.last = stamp if self.last is None else max(self.last, stamp)
+        return self
+
+    def to_dict(self):
+        """JSON-friendly view; histogram buckets are keyed by ISO start time."""
+        def iso(epoch):
+            return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(epoch))
+
+        return {
+            'records': self.records,
+            'first': self.first,
+            'last': self.last,
+            'bucket_seconds': self.bucket_seconds,
+            'levels': dict(self.levels.most_common()),
+            'components': dict(self.components.most_common()),
+            'hosts': dict(self.hosts.most_common()),
+            'component_levels': {f"{component} {level}": count
+                                 for (component, level), count in self.component_levels.most_common()},
+            'histogram': {component: {iso(bucket): buckets[bucket] for bucket in sorted(buckets)}
+                          for component, buckets in sorted(self.histogram.items())},
+        }
+
+    def format_report(self, top=20):
+        lines = [f"Records: {self.records}  ({self.first} .. {self.last})",
+                 "Levels: " + ', '.join(f"{level}={count}" for level, count in self.levels.most_common())]
+        lines.append(f"Top components (of {len(self.components)}):")
+        for component, count in self.components.most_common(top):
+            levels = ', '.join(f"{level}={self.component_levels[(component, level)]}"
+                               for level in self.levels if self.component_levels[(component, level)])
+            busiest = max(self.histogram[component].values())
+            lines.append(f"  {component:<32} {count:>9}  [{levels}]  peak {busiest}/{self.bucket_seconds}s")
+        return '\n'.join(lines)
+
+
+def _stats_from_keys(keys, hosts, bucket_seconds):
+    """Turn Counter((timestamp, level, component)) into GainLogStats, bucketing each distinct timestamp once."""
+    stats = GainLogStats(bucket_seconds)
+    stats.hosts = Counter({host.decode('utf-8', 'replace'): n for host, n in hosts.items()})
+    buckets = {}
+    for (stamp, level, component), count in keys.items():
+        bucket = buckets.get(stamp)
+        if bucket is None:
+            epoch = calendar.timegm(time.strptime(stamp.decode(), '%Y-%m-%dT%H:%M:%S'))
+            bucket = buckets[stamp] = epoch - epoch % bucket_seconds
+        level = level.decode('ascii', 'replace').upper()
+        component = component.decode('utf-8', 'replace')
+        stats.records += count
+        stats.levels[level] += count
+        stats.components[component] += count
+        stats.component_levels[(component, level)] += count
+        stats.histogram[component][bucket] += count
+    if buckets:
+        stamps = sorted(buckets)
+        stats.first = stamps[0].decode()
+        stats.last = stamps[-1].decode()
+    return stats
+
+
+def _analyze_range(path, start, end, bucket_seconds):
+    """Worker: aggregate the records in [start, end) of the file (newline-aligned)."""
+    keys = Counter()
+    hosts = Counter()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = start
+        while pos < end:
+            stop = min(end, pos + _SLICE_SIZE)
+            if stop < end:
+                newline = mm.find(b'\n', stop, end)
+                stop = end if newline < 0 else newline + 1
+            # The regex runs on the mapping itself; only the matched fields are copied
+            rows = _RECORD_RE.findall(mm, pos, stop)
+            if rows:
+                stamps, host_names, levels, components = zip(*rows)
+                keys.update(zip(stamps, levels, components))
+                hosts.update(host_names)
+            pos = stop
+    return _stats_from_keys(keys, hosts, bucket_seconds)
+
+
+def _chunk_ranges(path, chunk_size):
+    """Split the file into newline-aligned [start, end) ranges of about chunk_size bytes."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    ranges = []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            end = min(size, start + chunk_size)
+            if end < size:
+                newline = mm.find(b'\n', end)
+                end = size if newline < 0 else newline + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def analyze_gain_log(path, bucket_seconds=60, workers=None, chunk_size=64 * 1024 * 1024):
+    """
+    Aggregate a gain.log capture of any size.
+
+    The file is memory-mapped and split into newline-aligned chunks that are
+    parsed in a process pool; every worker maps the file itself and only the
+    per-chunk aggregates travel back, so memory use does not grow with the file.
+
+    Args:
+        path (str): gain.log capture (raw, or one of our command logs).
+        bucket_seconds (int): Width of the histogram buckets.
+        workers (int): Worker processes (default: CPU count; 1 = in-process).
+        chunk_size (int): Approximate bytes per chunk.
+
+    Returns:
+        GainLogStats
+    """
+    ranges = _chunk_ranges(path, chunk_size)
+    stats = GainLogStats(bucket_seconds)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            stats.merge(_analyze_range(path, start, end, bucket_seconds))
+        return stats
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        futures = [pool.submit(_analyze_range, path, start, end, bucket_seconds) for start, end in ranges]
+        for future in futures:
+            stats.merge(future.result())
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate a gain.log capture per level and component.")
+    parser.add_argument('log_file', help="gain.log capture")
+    parser.add_argument('--bucket', type=int, default=60, help="Histogram bucket width in seconds")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--chunk-mb', type=int, default=64, help="Chunk size in MB")
+    parser.add_argument('--json', default=None, help="Write the full aggregates as JSON to this file")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    result = analyze_gain_log(args.log_file, bucket_seconds=args.bucket, workers=args.workers,
+                              chunk_size=args.chunk_mb * 1024 * 1024)
+    print(result.format_report())
+    print(f"[*] Analyzed {os.path.getsize(args.log_file) / 1e6:.1f} MB in {time.time() - start_time:.2f}s")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result.to_dict(), f, indent=2)
+        print(f"[*] Saved to {args.json}")
@@ -1,47 +1,460 @@
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import struct
 import time
 
-def follow_log(file_path, flags_to_check):
+
+class _Inotify:
+    """Minimal ctypes binding for Linux inotify (directory watches only)."""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                  IN_CREATE | IN_DELETE)
+    _EVENT = struct.Struct('iIII')
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, directory):
+        wd = self._add_watch(self.fd, os.fsencode(directory), self.WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        return wd
+
+    def read_events(self, timeout):
+        """Wait up to `timeout` seconds; returns a list of (wd, mask, name) tuples."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + self._EVENT.size <= len(data):
+            wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _TailedFile:
+    """Read position, inode and unterminated tail of one followed file."""
+
+    def __init__(self, path, from_start, chunk_size):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.f = None
+        self.ident = None
+        self.partial = b''
+        self._open(from_start)
+
+    def _open(self, from_start):
+        try:
+            f = open(self.path, 'rb')
+        except OSError:
+            return False
+        st = os.fstat(f.fileno())
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        self.f = f
+        self.ident = (st.st_dev, st.st_ino)
+        return True
+
+    def _drain(self, lines):
+        while True:
+            data = self.f.read(self.chunk_size)
+            if not data:
+                return
+            data = self.partial + data
+            parts = data.split(b'\n')
+            self.partial = parts.pop()
+            lines.extend(part.rstrip(b'\r').decode('utf-8', errors='replace') for part in parts)
+
+    def _flush_partial(self, lines):
+        if self.partial:
+            lines.append(self.partial.rstrip(b'\r').decode('utf-8', errors='replace'))
+            self.partial = b''
+
+    def check(self):
+        """Return the complete lines appended since the last check."""
+        lines = []
+        if self.f is None:
+            # Not there yet (or gone after a rotation): follow it once it appears
+            if self._open(from_start=True):
+                self._drain(lines)
+            return lines
+
+        self._drain(lines)
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            # Renamed away or deleted; keep the handle until a new file appears
+            return lines
+        if (st.st_dev, st.st_ino) != self.ident:
+            # Rotated: finish the old file, then start the new one from the top
+            self._drain(lines)
+            self._flush_partial(lines)
+            self.close()
+            if self._open(from_start=True):
+                self._drain(lines)
+        elif st.st_size < self.f.tell():
+            # Truncated in place
+            self.partial = b''
+            self.f.seek(0)
+            self._drain(lines)
+        return lines
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+
+class LogTailer:
     """
-    Generator that yields new lines appended to the log file.
+    Follow any number of log files from a single thread.
+
+    On Linux the parent directories are watched with inotify, so a file is only
+    read when it changed and new lines are seen as soon as they are written;
+    elsewhere (or if inotify is unavailable) the files are checked every
+    `poll_interval` seconds with a cheap stat. New data is read in large binary
+    chunks and split into lines; an unterminated last line is held back until
+    its newline arrives. Rotation (rename or delete + recreate) is handled by
+    finishing the old file and continuing with the new one from its start;
+    truncation restarts reading at offset 0.
+
+    Usage:
+        tailer = LogTailer(['logs/dmesg.log', 'logs/cat_gain_log.log'])
+        for path, line in tailer.follow():
+            ...
     """
-    with open(file_path, 'r') as f:
-        # Go to the end of the file
-        f.seek(0, 2)
+
+    def __init__(self, paths=(), from_start=False, chunk_size=64 * 1024, poll_interval=0.25,
+                 use_inotify=None):
+        self.from_start = from_start
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self._files = {}
+        # directory -> set of followed file names in it
+        self._directories = {}
+        self._watches = {}
+        self._pending = set()
+        self._inotify = None
+        if use_inotify is not False:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError, TypeError):
+                if use_inotify:
+                    raise
+        for path in paths:
+            self.add(path)
+
+    @property
+    def uses_inotify(self):
+        return self._inotify is not None
+
+    def add(self, path):
+        path = os.path.abspath(path)
+        if path in self._files:
+            return
+        self._files[path] = _TailedFile(path, self.from_start, self.chunk_size)
+        self._pending.add(path)
+        directory, name = os.path.split(path)
+        self._directories.setdefault(directory, set()).add(name)
+        if self._inotify is not None and directory not in self._watches.values():
+            try:
+                self._watches[self._inotify.add_watch(directory)] = directory
+            except OSError:
+                pass
+
+    def remove(self, path):
+        path = os.path.abspath(path)
+        tailed = self._files.pop(path, None)
+        if tailed is not None:
+            tailed.close()
+            directory, name = os.path.split(path)
+            self._directories.get(directory, set()).discard(name)
+        self._pending.discard(path)
+
+    def _changed_paths(self, timeout):
+        if self._inotify is None:
+            time.sleep(timeout)
+            return set(self._files)
+
+        changed = set()
+        for wd, mask, name in self._inotify.read_events(timeout):
+            if mask & _Inotify.IN_Q_OVERFLOW:
+                return set(self._files)
+            directory = self._watches.get(wd)
+            if directory is not None and name in self._directories.get(directory, ()):
+                changed.add(os.path.join(directory, name))
+        # Files whose directory could not be watched are polled
+        watched = set(self._watches.values())
+        changed.update(path for path in self._files if os.path.dirname(path) not in watched)
+        return changed
+
+    def poll(self, timeout=None):
+        """
+        Wait for new lines in any followed file.
+
+        Args:
+            timeout (float): Maximum wait in seconds (None = poll_interval).
+
+        Returns:
+            list: (path, line) tuples, in file order per path; empty on timeout.
+        """
+        if timeout is None:
+            timeout = self.poll_interval
+        if self._pending:
+            changed, self._pending = self._pending, set()
+        else:
+            wait = timeout if self._inotify is not None else min(timeout, self.poll_interval)
+            changed = self._changed_paths(wait)
+        results = []
+        for path in changed:
+            tailed = self._files.get(path)
+            if tailed is not None:
+                results.extend((path, line) for line in tailed.check())
+        return results
+
+    def follow(self):
+        """Yield (path, line) for every new line, forever."""
         while True:
-            line = f.readline()
-            if not line:
-                time.sleep(0.1)  # wait for new data
-                continue
-            yield line.rstrip('\n')
+            yield from self.poll()
+
+    def close(self):
+        for tailed in self._files.values():
+            tailed.close()
+        self._files.clear()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def follow_log(file_path, flags_to_check=None, from_start=False):
+    """
+    Generator that yields new lines appended to the log file.
+
+    Follows the file across rotation and truncation (see LogTailer). If
+    `flags_to_check` is given, only lines containing one of the flags are yielded.
+    """
+    scanner = get_flag_scanner(flags_to_check) if flags_to_check else None
+    with LogTailer([file_path], from_start=from_start) as tailer:
+        for _, line in tailer.follow():
+            if scanner is None or scanner.scan_line(line):
+                yield line
+
+
+def follow_logs(file_paths, from_start=False):
+    """Generator that yields (path, line) for new lines appended to any of the log files."""
+    with LogTailer(file_paths, from_start=from_start) as tailer:
+        yield from tailer.follow()
+
+
+class FlagScanner:
+    """
+    Precompiled matcher for a fixed list of flags.
+
+    All flags are combined into one regex (an alternation factored into a prefix
+    trie), so a line is scanned once no matter how many flags are monitored.
+    The search restarts one character after each hit, so overlapping flags are
+    all seen. Values use the same "flag=value" rule as before:
+    the first occurrence of a flag followed by '=' gives its value, a flag that
+    is present without one maps to None.
+
+    Usage:
+        scanner = FlagScanner(['GAIN-HM-PBIT', 'CRIT'])
+        scanner.scan_line(line)        -> {flag: value}
+        scanner.scan_chunk(text)       -> [(line, {flag: value}), ...]
+    """
+
+    # Like \s, but never crosses into the next line of a chunk
+    _VALUE_RE = re.compile(r'[^\S\n]*=[^\S\n]*([^\s,]+)')
+
+    def __init__(self, flags):
+        self.flags = list(dict.fromkeys(flag for flag in flags if flag))
+        self._order = {flag: i for i, flag in enumerate(self.flags)}
+        # At a given position the regex reports the longest flag only; shorter
+        # flags that are a prefix of it start at the same position too.
+        self._prefixes = {
+            flag: [other for other in self.flags if other != flag and flag.startswith(other)]
+            for flag in self.flags
+        }
+        if self.flags:
+            self._regex = re.compile(self._trie_pattern(sorted(self.flags)))
+        else:
+            self._regex = None
+
+    @classmethod
+    def _trie_pattern(cls, flags):
+        """Build a regex alternation that factors out common prefixes (longest match first)."""
+        groups = {}
+        terminal = False
+        for flag in flags:
+            if flag:
+                groups.setdefault(flag[0], []).append(flag[1:])
+            else:
+                terminal = True
+        branches = []
+        for char, rests in groups.items():
+            sub = cls._trie_pattern(rests)
+            branches.append(re.escape(char) + (sub if sub else ''))
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if terminal:
+            # A flag ends here; prefer the longer flags that continue it
+            pattern = f"(?:{pattern})?"
+        return pattern
+
+    def _record(self, found, flag, text, end):
+        if flag in found and found[flag] is not None:
+            return
+        match = self._VALUE_RE.match(text, end)
+        found[flag] = match.group(1) if match else None
+
+    def _ordered(self, found):
+        if len(found) < 2:
+            return found
+        return dict(sorted(found.items(), key=lambda item: self._order[item[0]]))
+
+    def scan_line(self, line):
+        """Return {flag: value} for every flag present in `line`."""
+        if self._regex is None:
+            return {}
+        found = {}
+        search = self._regex.search
+        match = search(line)
+        while match:
+            flag = match.group()
+            start = match.start()
+            self._record(found, flag, line, start + len(flag))
+            for prefix in self._prefixes[flag]:
+                self._record(found, prefix, line, start + len(prefix))
+            match = search(line, start + 1)
+        return self._ordered(found)
+
+    def scan_chunk(self, text):
+        """
+        Scan a block of newline-separated lines in one pass.
+
+        Returns:
+            list: (line, {flag: value}) for each line containing a flag, in order.
+        """
+        results = []
+        if self._regex is None:
+            return results
+        line_start = line_end = -1
+        found = None
+        search = self._regex.search
+        match = search(text)
+        while match:
+            start = match.start()
+            if start >= line_end:
+                if found:
+                    results.append((text[line_start:line_end].rstrip('\r'), self._ordered(found)))
+                line_start = text.rfind('\n', 0, start) + 1
+                line_end = text.find('\n', start)
+                if line_end < 0:
+                    line_end = len(text)
+                found = {}
+            flag = match.group()
+            self._record(found, flag, text, start + len(flag))
+            for prefix in self._prefixes[flag]:
+                self._record(found, prefix, text, start + len(prefix))
+            match = search(text, start + 1)
+        if found:
+            results.append((text[line_start:line_end].rstrip('\r'), self._ordered(found)))
+        return results
+
+    def scan_file(self, file_path, chunk_size=1 << 20):
+        """Yield (line, {flag: value}) for every flagged line of a file, read in large chunks."""
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            rest = ''
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                data = rest + data
+                cut = data.rfind('\n') + 1
+                rest = data[cut:]
+                if cut:
+                    yield from self.scan_chunk(data[:cut])
+            if rest:
+                yield from self.scan_chunk(rest)
+
+
+_scanner_cache = {}
+
+
+def get_flag_scanner(flags):
+    """Return a FlagScanner for `flags`, reusing the one built for the same list."""
+    key = tuple(flags)
+    scanner = _scanner_cache.get(key)
+    if scanner is None:
+        if len(_scanner_cache) >= 32:
+            _scanner_cache.clear()
+        scanner = _scanner_cache[key] = FlagScanner(key)
+    return scanner
+
 
 def parse_line_for_flags(line, flags):
     """
     Check if any of the flags are in the line and extract their values.
     Assumes format: ... flag=value ...
     Returns a dict {flag: value} for found flags.
+
+    `flags` may be a list (a FlagScanner is built once per distinct list and
+    cached) or a FlagScanner.
     """
-    found = {}
-    for flag in flags:
-        if flag in line:
-            # Simple extraction: find flag=VALUE pattern
-            # Adjust regex or parsing as per your log format
-            import re
-            pattern = rf'{flag}\s*=\s*([^\s,]+)'
-            match = re.search(pattern, line)
-            if match:
-                found[flag] = match.group(1)
-            else:
-                # Flag present but no value found, store None or True
-                found[flag] = None
-    return found
+    scanner = flags if isinstance(flags, FlagScanner) else get_flag_scanner(flags)
+    return scanner.scan_line(line)
+
 
 if __name__ == "__main__":
-    log_file_path = 'your_log_file.log'
-    flags = ['ERROR_FLAG_X', 'WARN_FLAG_Y']  # flags to monitor
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Follow log files and report flagged lines.")
+    parser.add_argument('log_files', nargs='+', help="Log files to follow")
+    parser.add_argument('--flags', nargs='+', default=['ERROR_FLAG_X', 'WARN_FLAG_Y'],
+                        help="Flags to monitor")
+    args = parser.parse_args()
 
-    print(f"Monitoring {log_file_path} for flags: {flags}")
+    print(f"Monitoring {', '.join(args.log_files)} for flags: {args.flags}")
 
-    for new_line in follow_log(log_file_path):
-        flags_found = parse_line_for_flags(new_line, flags)
+    scanner = FlagScanner(args.flags)
+    for log_file_path, new_line in follow_logs(args.log_files):
+        flags_found = scanner.scan_line(new_line)
         if flags_found:
-            print(f"Flags found in new log line: {flags_found}")
+            print(f"Flags found in new log line of {log_file_path}: {flags_found}")
@@ -0,0 +1,487 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+
+import serial
+
+from serial_comm.Serial_Comm import read_baud_config, read_port_config, read_prompt_settle
+from serial_comm.Baud_rate import HighSpeed, _run_steps_async, detect_steps
+from serial_comm.Command_framing import CommandFrame, FrameExchange, FramePipeline
+from serial_comm.Command_manager import CommandManager, BatchLog
+from serial_comm.File_transfer import TransferStats, pull_steps, push_steps
+from serial_comm.Login_manager import ConsoleProbe, LoginManager
+from serial_comm.Metrics import get_metrics
+
+
+class AsyncSubscription:
+    """Reader of an AsyncSerialComm; sees every byte received after it was created."""
+
+    def __init__(self, comm):
+        self._comm = comm
+        self._buf = bytearray()
+        self._event = asyncio.Event()
+
+    def _feed(self, data):
+        self._buf += data
+        self._event.set()
+
+    def pending(self):
+        return len(self._buf)
+
+    def read_nowait(self):
+        data = bytes(self._buf)
+        self._buf.clear()
+        self._event.clear()
+        self._comm._maybe_resume()
+        return data
+
+    async def read(self, timeout=None):
+        """Wait up to `timeout` seconds for data and return what is available."""
+        if not self._buf and not self._comm.closed:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.read_nowait()
+
+    def close(self):
+        self._comm._subscribers.discard(self)
+        self._comm._maybe_resume()
+
+
+class AsyncSerialComm:
+    """
+    asyncio transport for one serial port.
+
+    On Linux/POSIX the port's file descriptor is registered with the event loop
+    and drained with non-blocking reads, so one loop can serve many ports
+    without a thread per device. Where that is not possible (e.g. Windows) a
+    reader thread hands chunks over to the loop instead.
+
+    If any subscriber has more than `max_pending` unread bytes, reading pauses
+    until it catches up, which pushes back on the port instead of growing
+    memory without bound.
+    """
+
+    def __init__(self, config_file='config.ini', max_pending=1 << 20, section='SerialPort', metrics=None,
+                 port=None, baudrate=None, auto_baud=None):
+        if port is None or baudrate is None:
+            config_port, config_baudrate = read_port_config(config_file, section)
+            port = port or config_port
+            baudrate = baudrate or config_baudrate
+
+        self.ser = serial.Serial()
+        self.ser.port = port
+        self.ser.baudrate = baudrate
+        self.ser.timeout = 0
+        self.max_pending = max_pending
+        self.closed = True
+        config_auto_baud, self.scan_baudrates, self.high_speed_baudrates = read_baud_config(config_file, section)
+        self.auto_baud = config_auto_baud if auto_baud is None else auto_baud
+        self.prompt_settle = read_prompt_settle(config_file, section)
+
+        self._loop = None
+        self._fd = None
+        self._write_lock = None
+        self._paused = False
+        self._reader_thread = None
+        self._subscribers = weakref.WeakSet()
+
+        self.metrics = metrics if metrics is not None else get_metrics(config_file)
+        self._bytes_read = self.metrics.counter('serial_bytes_read_total', "Bytes received", port=port)
+        self._lines_read = self.metrics.counter('serial_lines_read_total', "Lines received", port=port)
+        self._bytes_written = self.metrics.counter('serial_bytes_written_total', "Bytes sent", port=port)
+        self._lines_written = self.metrics.counter('serial_lines_written_total', "Lines sent", port=port)
+        self._lock_wait = self.metrics.histogram('serial_write_lock_wait_seconds',
+                                                 "Time spent waiting for the write lock", port=port)
+
+    async def open(self):
+        if self.ser.is_open:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._write_lock = asyncio.Lock()
+        try:
+            self.ser.open()
+            print(f"Serial port {self.ser.port} opened at {self.ser.baudrate} baud.")
+        except serial.SerialException as e:
+            print(f"Error opening serial port: {e}")
+            return
+        self.closed = False
+
+        try:
+            self._fd = self.ser.fileno()
+            self._loop.add_reader(self._fd, self._on_readable)
+        except (AttributeError, NotImplementedError, OSError):
+            self._fd = None
+            self.ser.timeout = 0.1
+            self._reader_thread = threading.Thread(target=self._thread_reader,
+                                                   name=f"AsyncSerialReader-{self.ser.port}",
+                                                   daemon=True)
+            self._reader_thread.start()
+
+        if self.auto_baud:
+            await detect_baudrate(self, self.scan_baudrates, output_callback=print)
+
+    def close(self):
+        if self._fd is not None and not self._paused:
+            self._loop.remove_reader(self._fd)
+        self._fd = None
+        self.closed = True
+        for subscription in list(self._subscribers):
+            subscription._event.set()
+        if self.ser.is_open:
+            self.ser.close()
+            print(f"Serial port {self.ser.port} closed.")
+
+    def subscribe(self):
+        """Return a new reader that sees every byte received from now on."""
+        subscription = AsyncSubscription(self)
+        self._subscribers.add(subscription)
+        return subscription
+
+    async def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        waiting = time.perf_counter()
+        async with self._write_lock:
+            self._lock_wait.observe(time.perf_counter() - waiting)
+            if self.closed:
+                return
+            self._bytes_written.inc(len(data))
+            self._lines_written.inc(data.count(b'\n'))
+            if self._fd is None:
+                await self._loop.run_in_executor(None, self.ser.write, data)
+                return
+            view = memoryview(data)
+            while view:
+                try:
+                    written = os.write(self._fd, view)
+                except BlockingIOError:
+                    written = 0
+                view = view[written:]
+                if view:
+                    await self._wait_writable()
+
+    async def exchange(self, exchange):
+        """Async-generator version of SerialComm.exchange()."""
+        subscription = self.subscribe()
+        try:
+            while not self.closed:
+                data = exchange.take_writes(time.time())
+                if data:
+                    await self.write(data)
+                timeout = exchange.read_timeout(time.time())
+                if timeout is None:
+                    break
+                chunk = await subscription.read(timeout=timeout)
+                for item in exchange.feed(chunk, time.time()):
+                    yield item
+        finally:
+            subscription.close()
+            data = exchange.close()
+            if data and not self.closed:
+                await self.write(data)
+
+    async def set_baudrate(self, baudrate):
+        """Async version of SerialComm.set_baudrate()."""
+        if self._write_lock is None:
+            self.ser.baudrate = baudrate
+            return
+        async with self._write_lock:
+            if self.ser.is_open:
+                await self._loop.run_in_executor(None, self.ser.flush)
+            self.ser.baudrate = baudrate
+
+    async def _wait_writable(self):
+        ready = self._loop.create_future()
+        self._loop.add_writer(self._fd, lambda: ready.done() or ready.set_result(None))
+        try:
+            await ready
+        finally:
+            self._loop.remove_writer(self._fd)
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            print(f"Error reading serial port: {e}")
+            self.close()
+            return
+        if not data:
+            # Hang-up (adapter unplugged): the fd stays readable, so it must not stay registered
+            print(f"Serial port {self.ser.port} disconnected")
+            self.close()
+            return
+        self._dispatch(data)
+
+    def _thread_reader(self):
+        ser = self.ser
+        while not self.closed:
+            if self._paused:
+                time.sleep(0.01)
+                continue
+            try:
+                data = ser.read(ser.in_waiting or 1)
+            except (serial.SerialException, OSError, TypeError) as e:
+                if not self.closed:
+                    print(f"Error reading serial port: {e}")
+                    # Closing wakes the subscribers, so waiting readers see the loss at once
+                    try:
+                        self._loop.call_soon_threadsafe(self.close)
+                    except RuntimeError:
+                        # The event loop is already closed
+                        self.closed = True
+                break
+            if data:
+                self._loop.call_soon_threadsafe(self._dispatch, data)
+
+    def _dispatch(self, data):
+        self._bytes_read.inc(len(data))
+        self._lines_read.inc(data.count(b'\n'))
+        over_limit = False
+        for subscription in list(self._subscribers):
+            subscription._feed(data)
+            if subscription.pending() > self.max_pending:
+                over_limit = True
+        if over_limit and not self._paused:
+            self._paused = True
+            if self._fd is not None:
+                self._loop.remove_reader(self._fd)
+
+    def _maybe_resume(self):
+        if not self._paused or self.closed:
+            return
+        low_water = self.max_pending // 2
+        if all(subscription.pending() <= low_water for subscription in list(self._subscribers)):
+            self._paused = False
+            if self._fd is not None:
+                self._loop.add_reader(self._fd, self._on_readable)
+
+
+class AsyncCommandManager(CommandManager):
+    """
+    CommandManager for an AsyncSerialComm.
+
+    Same behaviour and log files as CommandManager, but every method that talks
+    to the device is a coroutine (iter_batch is an async generator, and the
+    CommandStream of stream_command() is iterated with `async for`), so many
+    devices can be driven concurrently from one event loop. The parsing and
+    state of each exchange are shared with CommandManager; only the loop that
+    moves the bytes (AsyncSerialComm.exchange()) is async.
+    """
+
+    async def run_command(self, command, timeout=10, output_callback=None, prompt_chars=None,
+                          prompt_pattern=None):
+        """Async version of CommandManager.run_command()."""
+        log = self._command_log(command, output_callback)
+        started = time.time()
+        log(f"[*] Sending command: {command}")
+        try:
+            capture = self._prompt_capture(command, timeout, prompt_chars, prompt_pattern)
+            async for line in self.serial_comm.exchange(capture):
+                log(line)
+            return self._capture_finished(command, capture, started, log)
+        except Exception as e:
+            log(f"[Error running command '{command}']: {e}", level=logging.ERROR)
+            return ''
+
+    async def run_command_framed(self, command, timeout=10, output_callback=None):
+        """Async version of CommandManager.run_command_framed()."""
+        log = self._command_log(command, output_callback)
+        log(f"[*] Sending command: {command}")
+        exchange = FrameExchange(CommandFrame(command), time.time(), timeout=timeout)
+        try:
+            async for lines in self.serial_comm.exchange(exchange):
+                for line in lines:
+                    if line:
+                        log(line)
+            return self._framed_finished(exchange, timeout, log)
+        except Exception as e:
+            log(f"[Error running command '{command}']: {e}", level=logging.ERROR)
+            return exchange.frame.result(time.time() - exchange.started)
+
+    async def _stream(self, stream, timeout, max_duration):
+        # stream_command() is inherited; this makes its CommandStream an async iterator
+        exchange = self._stream_exchange(stream, timeout, max_duration)
+        reads = self.serial_comm.exchange(exchange)
+        try:
+            async for lines in reads:
+                stream.add(lines)
+                if stream.batches:
+                    yield lines
+                else:
+                    for line in lines:
+                        yield line
+        finally:
+            await reads.aclose()
+            self._stream_finished(stream, exchange)
+
+    async def run_batch(self, commands, timeout=10, output_callback=None, window=8, disable_echo=True,
+                        log_output=True):
+        """Async version of CommandManager.run_batch()."""
+        return [result async for result in self.iter_batch(commands, timeout=timeout,
+                                                           output_callback=output_callback,
+                                                           window=window, disable_echo=disable_echo,
+                                                           log_output=log_output)]
+
+    async def iter_batch(self, commands, timeout=10, output_callback=None, window=8, disable_echo=True,
+                         log_output=True):
+        """Async-generator version of CommandManager.iter_batch()."""
+        batch_log = BatchLog(self.log_writer, self._log_filename, timeout, output_callback)
+        pipeline = self._batch_pipeline(commands, timeout, window, batch_log, log_output)
+        if pipeline is None:
+            return
+
+        if disable_echo:
+            async for _ in self.serial_comm.exchange(self._echo_pipeline(False, timeout)):
+                pass
+        finished = self.serial_comm.exchange(pipeline)
+        try:
+            async for frame in finished:
+                yield self._batch_result(frame, batch_log, log_output)
+        finally:
+            await finished.aclose()
+            if disable_echo:
+                async for _ in self.serial_comm.exchange(self._echo_pipeline(True, timeout)):
+                    pass
+            batch_log.close()
+
+    async def _run_transfer(self, steps, stats, output_callback=None):
+        try:
+            for batch in steps:
+                async for result in self.iter_batch(batch.commands, timeout=batch.timeout, window=batch.window,
+                                                    log_output=False):
+                    batch.add(result)
+        finally:
+            steps.close()
+        return self._finish_transfer(stats, output_callback)
+
+    async def pull_file(self, remote_path, local_path=None, block_size=32768, compress=None, retries=3,
+                        window=4, timeout=None, output_callback=None):
+        """Async version of CommandManager.pull_file()."""
+        if local_path is None:
+            local_path = os.path.join(self.logs_dir, os.path.basename(remote_path.rstrip('/')))
+        stats = TransferStats('pull', remote_path, local_path, block_size=block_size,
+                              baudrate=self._baudrate())
+        self._setup_logger(f"pull_file {remote_path}")
+        return await self._run_transfer(pull_steps(stats, compress, retries, window, timeout,
+                                                   self.TRANSFER_BATCH_BLOCKS), stats, output_callback)
+
+    async def push_file(self, local_path, remote_path, block_size=2048, compress=None, retries=3,
+                        timeout=None, output_callback=None):
+        """Async version of CommandManager.push_file()."""
+        stats = TransferStats('push', remote_path, local_path, size=os.path.getsize(local_path),
+                              block_size=block_size, baudrate=self._baudrate())
+        self._setup_logger(f"push_file {remote_path}")
+        return await self._run_transfer(push_steps(stats, compress, retries, timeout, self.TRANSFER_BATCH_BLOCKS),
+                                        stats, output_callback)
+
+    def high_speed(self, baudrates=None, output_callback=None, **kwargs):
+        """
+        Async version of CommandManager.high_speed(), used with `async with`:
+
+            async with cmd_mgr.high_speed():
+                await cmd_mgr.pull_file('/var/log/messages')
+        """
+        return AsyncHighSpeed(self, baudrates, output_callback=output_callback, **kwargs)
+
+    async def get_last_n_lines(self, file_path, n=10, timeout=5, output_callback=None):
+        """Async version of CommandManager.get_last_n_lines()."""
+        command = f"tail -n {n} {file_path}"
+        log_filename = self._last_n_lines_filename(file_path, n)
+        try:
+            stream = self.stream_command(command, timeout=timeout, spill_path=log_filename, tail_lines=n,
+                                         output_callback=output_callback)
+            async for _ in stream:
+                pass
+        except Exception as e:
+            if output_callback:
+                output_callback(f"[Error saving log file]: {e}")
+            return ''
+        if output_callback:
+            output_callback(f"[*] Saved last {n} lines of '{file_path}' to {log_filename}")
+        return '\n'.join(stream.tail)
+
+
+async def probe_console(serial_comm, timeout=0.5, prompt_pattern=None):
+    """Async version of Login_manager.probe_console()."""
+    probe = ConsoleProbe(timeout, time.time(), prompt_pattern)
+    async for _ in serial_comm.exchange(probe):
+        pass
+    return probe.answer
+
+
+async def detect_baudrate(serial_comm, baudrates=None, timeout=0.5, output_callback=None):
+    """Async version of Baud_rate.detect_baudrate()."""
+
+    async def probe(timeout):
+        return await probe_console(serial_comm, timeout)
+
+    steps = detect_steps(serial_comm.ser.baudrate, baudrates, timeout, output_callback)
+    return await _run_steps_async(steps, {'port': serial_comm.set_baudrate, 'probe': probe})
+
+
+class AsyncHighSpeed(HighSpeed):
+    """
+    HighSpeed for an AsyncCommandManager: the same switch, handshake and
+    fallback steps with awaited actions, entered with `async with`.
+    """
+
+    def __enter__(self):
+        raise TypeError("use 'async with' for the high-speed mode of an AsyncCommandManager")
+
+    async def __aenter__(self):
+        await _run_steps_async(self._enter_steps(), self._actions())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await _run_steps_async(self._exit_steps(), self._actions())
+        return False
+
+    async def switch(self, rate):
+        """Async version of HighSpeed.switch()."""
+        return await _run_steps_async(self._switch_steps(rate), self._actions())
+
+    async def _interrupt(self):
+        await self.serial_comm.write(FramePipeline.INTERRUPT)
+        await asyncio.sleep(self.settle)
+
+    async def _set_device_rate(self, rate):
+        await self._interrupt()
+        await self.serial_comm.write(self.stty_command.format(rate=rate) + '\n')
+        await asyncio.sleep(self.settle)
+
+    async def _handshake(self, rate):
+        token = f"baud_ok_{rate}"
+        await self._interrupt()
+        stream = self.command_manager.stream_command(f"echo {token}", timeout=self.timeout,
+                                                     max_duration=self.timeout, log_output=False)
+        return token in [line async for line in stream] and stream.exit_status == 0
+
+    async def _detect(self, baudrates):
+        await detect_baudrate(self.serial_comm, baudrates, output_callback=self.output_callback)
+        return self.serial_comm.ser.baudrate
+
+
+class AsyncLoginManager(LoginManager):
+    """LoginManager whose login_sequence() is a coroutine, for use with AsyncSerialComm."""
+
+    async def login_sequence(self, timeout=15, output_callback=None):
+        """Async version of LoginManager.login_sequence()."""
+        log = self._login_log(output_callback)
+        dialog = self._login_dialog(timeout, log)
+        if dialog is None:
+            return False
+        try:
+            async for msg in self.serial_comm.exchange(dialog):
+                log(msg)
+        except Exception as e:
+            log(f"[Error during login]: {e}")
+            self.logged_in = False
+            return False
+        return self._login_finished(dialog, log)
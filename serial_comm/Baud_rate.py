@@ -0,0 +1,210 @@
+import time
+
+from serial_comm.Command_framing import FramePipeline
+from serial_comm.Login_manager import probe_console
+
+# Rates tried when the device does not answer at the configured one, most common first
+SCAN_BAUDRATES = (115200, 921600, 460800, 230400, 57600, 38400, 19200, 9600)
+# Rates tried for bulk operations, fastest first
+HIGH_SPEED_BAUDRATES = (921600, 460800, 230400)
+
+
+def _run_steps(steps, actions):
+    """
+    Drive a step generator (detect_steps(), HighSpeed): every step is an
+    (action, argument) pair, and actions[action](argument) is sent back as
+    its result. Returns the generator's return value.
+    """
+    try:
+        action, argument = next(steps)
+        while True:
+            action, argument = steps.send(actions[action](argument))
+    except StopIteration as stop:
+        return stop.value
+
+
+async def _run_steps_async(steps, actions):
+    """_run_steps() for actions that are coroutine functions."""
+    try:
+        action, argument = next(steps)
+        while True:
+            action, argument = steps.send(await actions[action](argument))
+    except StopIteration as stop:
+        return stop.value
+
+
+def detect_steps(original, baudrates=None, timeout=0.5, output_callback=None):
+    """
+    The steps of detect_baudrate() for a port at `original` baud, independent
+    of how they are carried out: ('port', rate) switches the local port and
+    ('probe', timeout) sends back what probe_console() answered.
+    """
+    def log(msg):
+        if output_callback:
+            output_callback(msg)
+
+    current = original
+    for rate in [original] + [rate for rate in baudrates or SCAN_BAUDRATES if rate != original]:
+        if rate != current:
+            yield 'port', rate
+            current = rate
+        if (yield 'probe', timeout) is not None:
+            if rate != original:
+                log(f"[*] Device answers at {rate} baud (configured: {original})")
+            return rate
+        log(f"[*] No answer at {rate} baud")
+    yield 'port', original
+    log("[!] Device did not answer at any baud rate")
+    return None
+
+
+def detect_baudrate(serial_comm, baudrates=None, timeout=0.5, output_callback=None):
+    """
+    Find the rate the device talks at and switch the port to it.
+
+    The current rate is probed first, then each of `baudrates` in turn; a rate
+    works when a bare newline brings back a readable shell or login prompt.
+
+    Args:
+        serial_comm (SerialComm): Open port.
+        baudrates (list): Candidate rates (default: SCAN_BAUDRATES).
+        timeout (float): Seconds to wait for an answer at each rate.
+        output_callback (callable): Optional function to receive progress messages.
+
+    Returns:
+        int or None: The working rate, or None (port left at its original rate)
+        if the device answered at none of them.
+    """
+    steps = detect_steps(serial_comm.ser.baudrate, baudrates, timeout, output_callback)
+    return _run_steps(steps, {'port': serial_comm.set_baudrate,
+                              'probe': lambda timeout: probe_console(serial_comm, timeout)})
+
+
+class HighSpeed:
+    """
+    Temporarily run the console at the fastest rate both ends can use.
+
+    On entry the device is told to change its rate (`stty <rate>` on the
+    console), the local port follows, and a framed echo must come back at the
+    new rate; otherwise the next lower rate is tried. A rate that fails is
+    undone from whichever side has switched, and if nothing works the console
+    simply stays at its original rate. On exit the device and the port are
+    switched back (with a rate scan as the last resort). Needs a logged-in
+    shell.
+
+    Usage:
+        with cmd_mgr.high_speed():
+            cmd_mgr.pull_file('/var/log/messages')
+
+    Attributes:
+        baudrate (int): Rate in use inside the block.
+        original (int): Rate restored on exit.
+    """
+
+    def __init__(self, command_manager, baudrates=None, stty_command='stty {rate}', timeout=2, settle=0.2,
+                 output_callback=None):
+        """
+        Args:
+            command_manager (CommandManager): Manager of the logged-in console.
+            baudrates (list): Rates to try, fastest first (default: the port's
+                high_speed_baudrates, else HIGH_SPEED_BAUDRATES).
+            stty_command (str): Device command that sets the console rate.
+            timeout (float): Seconds allowed for the handshake at each rate.
+            settle (float): Seconds the device is given to apply the new rate.
+            output_callback (callable): Optional function to receive progress messages.
+        """
+        self.command_manager = command_manager
+        self.serial_comm = command_manager.serial_comm
+        self.baudrates = list(baudrates or getattr(self.serial_comm, 'high_speed_baudrates', None)
+                              or HIGH_SPEED_BAUDRATES)
+        self.stty_command = stty_command
+        self.timeout = timeout
+        self.settle = settle
+        self.output_callback = output_callback
+        self.original = self.baudrate = self.serial_comm.ser.baudrate
+
+    def _log(self, msg):
+        if self.output_callback:
+            self.output_callback(msg)
+
+    def __enter__(self):
+        _run_steps(self._enter_steps(), self._actions())
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _run_steps(self._exit_steps(), self._actions())
+        return False
+
+    def switch(self, rate):
+        """
+        Move both ends to `rate`; returns True once the handshake succeeds there.
+
+        On failure both ends are brought back to the current rate (self.baudrate)
+        where possible and False is returned.
+        """
+        return _run_steps(self._switch_steps(rate), self._actions())
+
+    # The switching logic is written as steps ('device', 'port', 'handshake',
+    # 'detect' with a rate or rate list), so AsyncHighSpeed runs the same steps
+    # with awaited actions.
+
+    def _actions(self):
+        return {'device': self._set_device_rate, 'port': self.serial_comm.set_baudrate,
+                'handshake': self._handshake, 'detect': self._detect}
+
+    def _enter_steps(self):
+        for rate in self.baudrates:
+            if rate <= self.original:
+                continue
+            if (yield from self._switch_steps(rate)):
+                self._log(f"[*] Console switched to {rate} baud")
+                break
+        else:
+            self._log(f"[*] Staying at {self.original} baud")
+
+    def _exit_steps(self):
+        if self.baudrate != self.original and not (yield from self._switch_steps(self.original)):
+            self._log(f"[!] Could not switch the console back to {self.original} baud; scanning")
+            self.baudrate = yield 'detect', [self.original] + self.baudrates
+
+    def _switch_steps(self, rate):
+        current = self.baudrate
+        yield 'device', rate
+        yield 'port', rate
+        if (yield 'handshake', rate):
+            self.baudrate = rate
+            return True
+        self._log(f"[*] No handshake at {rate} baud")
+        # The device may not have switched at all (rate not supported)...
+        yield 'port', current
+        if (yield 'handshake', current):
+            return False
+        # ...or switched and the line is unusable at that rate: send it back blind
+        yield 'port', rate
+        yield 'device', current
+        yield 'port', current
+        if not (yield 'handshake', current):
+            self._log(f"[!] Console does not answer at {current} baud after trying {rate}")
+        return False
+
+    def _interrupt(self):
+        # Drops whatever (garbled) input the shell has pending; the tty flushes
+        # its input on Ctrl-C, so nothing else may be sent until it has
+        self.serial_comm.write(FramePipeline.INTERRUPT)
+        time.sleep(self.settle)
+
+    def _set_device_rate(self, rate):
+        self._interrupt()
+        self.serial_comm.write(self.stty_command.format(rate=rate) + '\n')
+        time.sleep(self.settle)
+
+    def _handshake(self, rate):
+        token = f"baud_ok_{rate}"
+        self._interrupt()
+        stream = self.command_manager.stream_command(f"echo {token}", timeout=self.timeout,
+                                                     max_duration=self.timeout, log_output=False)
+        return token in list(stream) and stream.exit_status == 0
+
+    def _detect(self, baudrates):
+        detect_baudrate(self.serial_comm, baudrates, output_callback=self.output_callback)
+        return self.serial_comm.ser.baudrate
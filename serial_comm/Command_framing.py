@@ -0,0 +1,259 @@
+import collections
+import re
+import uuid
+
+from serial_comm.Prompt_matcher import PromptMatcher
+
+
+class CommandResult:
+    """Output and exit status of a sentinel-framed command."""
+
+    def __init__(self, command, output='', exit_status=None, duration=0.0):
+        self.command = command
+        self.output = output
+        # None when the end marker never arrived (timeout or lost connection)
+        self.exit_status = exit_status
+        self.duration = duration
+
+    @property
+    def timed_out(self):
+        return self.exit_status is None
+
+    @property
+    def ok(self):
+        return self.exit_status == 0
+
+    def __repr__(self):
+        return (f"CommandResult(command={self.command!r}, exit_status={self.exit_status}, "
+                f"duration={self.duration:.3f}, output_lines={len(self.output.splitlines())})")
+
+
+class CommandFrame:
+    """
+    One command wrapped between unique begin/end markers.
+
+    The command is sent as:
+
+        echo __BEGIN_''<id>__; {
+        <command>
+        }; echo __END_''<id>__ $?
+
+    The empty quotes keep the literal markers out of the terminal echo, so only
+    the shell's own output can contain them, and the end marker carries the exit
+    status of the command. The command gets lines of its own, so a trailing
+    '&', ';' or '# comment' cannot swallow the end marker, and the group is read
+    as a whole before it runs, so no prompt lands in front of the output.
+    """
+
+    def __init__(self, command):
+        self.command = command
+        self.token = uuid.uuid4().hex
+        self.begin_marker = f"__BEGIN_{self.token}__"
+        self._end_regex = re.compile(rf"__END_{self.token}__ (\d+)")
+        self.lines = []
+        self.started = False
+        self.exit_status = None
+        self.done = False
+
+    @property
+    def wire(self):
+        """The text to write to the device (without the trailing newline)."""
+        body = self.command.strip().rstrip(';').strip()
+        begin = f"echo __BEGIN_''{self.token}__"
+        end = f"echo __END_''{self.token}__ $?"
+        return f"{begin}; {{\n{body}\n}}; {end}" if body else f"{begin}; {end}"
+
+    def feed_line(self, line):
+        """
+        Consume one received line.
+
+        Returns:
+            bool: True once the end marker has been seen.
+        """
+        if self.done:
+            return True
+        if not self.started:
+            # With type-ahead the prompt is printed on the same line as the marker
+            if self.begin_marker in line:
+                self.started = True
+            return False
+
+        match = self._end_regex.search(line)
+        if match is None:
+            self.lines.append(line)
+            return False
+        # Output without a trailing newline ends up on the marker line
+        prefix = line[:match.start()]
+        if prefix.strip():
+            self.lines.append(prefix)
+        self.exit_status = int(match.group(1))
+        self.done = True
+        return True
+
+    def result(self, duration=0.0):
+        return CommandResult(self.command, '\n'.join(self.lines), self.exit_status, duration)
+
+
+class FrameExchange:
+    """
+    Sans-IO run of a single CommandFrame (run_command_framed(), stream_command());
+    the transports' exchange() loops move the bytes.
+
+    The frame is written first and every received chunk goes to feed(), which
+    returns the output lines of that chunk as one list ([] if there are none).
+    The run ends with the end marker, `timeout` seconds after the start, or
+    after `idle_timeout` seconds without any data (at least one of the two
+    must be given). close() asks for Ctrl-C if
+    the command is still running, so an abandoned or hung command does not
+    keep the shell busy.
+
+    With keep_lines=False the lines are handed out only, not accumulated in
+    frame.lines, so a long output never sits in memory as a whole.
+    """
+
+    def __init__(self, frame, now, timeout=None, idle_timeout=None, keep_lines=True):
+        if timeout is None and idle_timeout is None:
+            raise ValueError("FrameExchange needs a timeout or an idle_timeout")
+        self.frame = frame
+        self.started = now
+        self.idle_timeout = idle_timeout
+        self.keep_lines = keep_lines
+        # Bytes the transport lost because the consumer fell behind (set by exchange())
+        self.dropped = 0
+        self._matcher = PromptMatcher()
+        self._pending = frame.wire + '\n'
+        self._end_time = None if timeout is None else now + timeout
+        self._quiet_until = None if idle_timeout is None else now + idle_timeout
+
+    def take_writes(self, now):
+        data, self._pending = self._pending, ''
+        return data
+
+    def read_timeout(self, now):
+        if self.frame.done:
+            return None
+        deadline = min(t for t in (self._end_time, self._quiet_until) if t is not None)
+        return deadline - now if now < deadline else None
+
+    def feed(self, data, now):
+        if not data:
+            return []
+        if self.idle_timeout is not None:
+            self._quiet_until = now + self.idle_timeout
+        frame = self.frame
+        known = len(frame.lines)
+        for line in self._matcher.feed(data):
+            frame.feed_line(line)
+        if len(frame.lines) == known:
+            return []
+        lines = frame.lines[known:]
+        if not self.keep_lines:
+            frame.lines = []
+        return [lines]
+
+    def close(self):
+        return '' if self.frame.done else FramePipeline.INTERRUPT
+
+
+class FramePipeline:
+    """
+    Scheduler for pipelined frames, independent of how bytes are moved.
+
+    The driver loop writes whatever take_writes() returns, feeds every received
+    line to feed_line(), and calls collect() to get frames that finished (or
+    timed out) in order. Frames are written ahead, bounded both by count and by
+    the device's tty input buffer. Each frame's timeout starts when it becomes
+    the oldest outstanding frame.
+
+    It is also an exchange for the transports' exchange() loops: feed() takes
+    raw chunks and returns the frames finished so far, read_timeout() follows
+    the oldest frame's deadline, and a pending Ctrl-C for a hung command is
+    handed out by the next take_writes().
+    """
+
+    INTERRUPT = '\x03'
+
+    def __init__(self, frames, timeout, window=8, max_inflight_bytes=2048, on_line=None):
+        self.timeout = timeout
+        self.window = window
+        self.max_inflight_bytes = max_inflight_bytes
+        self.on_line = on_line
+        self.deadline = None
+        self._queue = collections.deque(frames)
+        self._in_flight = collections.deque()
+        self._inflight_bytes = 0
+        self._matcher = PromptMatcher()
+        self._interrupt = ''
+
+    @property
+    def finished(self):
+        return not self._queue and not self._in_flight
+
+    def take_writes(self, now):
+        """Return the text to write now ('' when the window is full)."""
+        out = [self._interrupt]
+        self._interrupt = ''
+        while self._queue and len(self._in_flight) < self.window and \
+                (not self._in_flight or
+                 self._inflight_bytes + len(self._queue[0].wire) + 1 <= self.max_inflight_bytes):
+            frame = self._queue.popleft()
+            data = frame.wire + '\n'
+            frame.sent_at = now
+            self._in_flight.append(frame)
+            self._inflight_bytes += len(data)
+            out.append(data)
+        if self.deadline is None and self._in_flight:
+            self.deadline = now + self.timeout
+        return ''.join(out)
+
+    def feed_line(self, line):
+        # Commands run sequentially, so output belongs to the oldest unfinished one
+        for frame in self._in_flight:
+            if not frame.done:
+                was_started = frame.started
+                frame.feed_line(line)
+                if self.on_line and was_started and not frame.done:
+                    self.on_line(frame, line)
+                return
+
+    def collect(self, now):
+        """
+        Returns:
+            tuple: (finished_frames, interrupt) where `interrupt` is text that must
+            be written before anything else ('' if none).
+        """
+        finished = []
+        while self._in_flight and self._in_flight[0].done:
+            frame = self._in_flight.popleft()
+            self._inflight_bytes -= len(frame.wire) + 1
+            frame.duration = now - frame.sent_at
+            self.deadline = now + self.timeout
+            finished.append(frame)
+
+        if not self._in_flight:
+            self.deadline = None
+        elif now >= self.deadline:
+            # Interrupt the hung command; the tty may have flushed everything
+            # queued behind it, so those frames are reported as timed out too.
+            while self._in_flight:
+                frame = self._in_flight.popleft()
+                frame.duration = now - frame.sent_at
+                finished.append(frame)
+            self._inflight_bytes = 0
+            self.deadline = None
+            return finished, self.INTERRUPT
+        return finished, ''
+
+    def read_timeout(self, now):
+        if self.finished:
+            return None
+        return max(0, self.deadline - now)
+
+    def feed(self, data, now):
+        for line in self._matcher.feed(data):
+            self.feed_line(line)
+        finished, self._interrupt = self.collect(now)
+        return finished
+
+    def close(self):
+        return self.INTERRUPT if self._in_flight else ''
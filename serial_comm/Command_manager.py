@@ -4,97 +4,397 @@ import os
 import logging
 from datetime import datetime
 
+from serial_comm.Prompt_matcher import DEFAULT_PROMPT_SETTLE, PromptCapture, prompt_pattern_from_chars
+from serial_comm.Command_framing import CommandFrame, FrameExchange, FramePipeline
+from serial_comm.Command_stream import CommandStream
+from serial_comm.Baud_rate import HighSpeed
+from serial_comm.File_transfer import TransferStats, pull_steps, push_steps, transfer_timeout
+from serial_comm.Log_writer import get_log_writer
+from serial_comm.Log_store import get_log_store
+from serial_comm.Metrics import get_metrics
+
+def default_logs_dir():
+    """Return the project's 'logs' folder (next to the serial_comm package)."""
+    # Get directory of this file (serial_comm folder)
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    # Go one level up to 'serial' folder
+    project_root = os.path.abspath(os.path.join(base_dir, '..'))
+    # Set logs_dir to 'serial/logs'
+    return os.path.join(project_root, 'logs')
+
+
+class CommandLog:
+    """Logger-like handle that appends to one command log file through the shared writer."""
+
+    def __init__(self, writer, filename):
+        self.writer = writer
+        self.filename = filename
+
+    def log(self, level, msg):
+        self.writer.write(self.filename, msg, logging.getLevelName(level))
+
+    def info(self, msg):
+        self.log(logging.INFO, msg)
+
+
+class BatchLog:
+    """
+    Per-batch command log: collects each command's lines and hands them to the
+    log writer as one block once the command has finished.
+    """
+
+    def __init__(self, writer, filename_for, timeout, output_callback=None):
+        self.writer = writer
+        self.filename_for = filename_for
+        self.timeout = timeout
+        self.output_callback = output_callback
+        self._blocks = {}
+
+    def on_line(self, frame, line):
+        self._blocks.setdefault(frame.token, []).append(line)
+        if self.output_callback:
+            self.output_callback(line)
+
+    def write(self, frame):
+        messages = [f"[*] Sending command: {frame.command}"]
+        messages.extend(line for line in self._blocks.pop(frame.token, []) if line)
+        if frame.done:
+            messages.append(f"[*] Exit status: {frame.exit_status}")
+        else:
+            messages.append(f"[!] Command '{frame.command}' timed out after {self.timeout}s")
+        self.writer.write_lines(self.filename_for(frame.command), messages)
+
+    def close(self):
+        self._blocks.clear()
+
+
 class CommandManager:
-    def __init__(self, serial_comm, logs_dir=None):
+    # Blocks handed to one batch during a file transfer (bounds memory on big files)
+    TRANSFER_BATCH_BLOCKS = 256
+
+    def __init__(self, serial_comm, logs_dir=None, prompt_pattern=None, prompt_settle=None,
+                 log_writer=None, log_store=None, device=None, metrics=None):
         self.serial_comm = serial_comm
+        # Device name recorded with every run in the log store (default: the port)
+        self.device = device or getattr(getattr(serial_comm, 'ser', None), 'port', None)
+        # Regex matched against the unterminated tail of the output (None = default prompt)
+        self.prompt_pattern = prompt_pattern
+        # Quiet time required after a prompt match, so a chunk that happens to end in
+        # '$', '#' or '>' mid-line is not mistaken for the prompt (default: the
+        # port's prompt_settle setting, else DEFAULT_PROMPT_SETTLE).
+        if prompt_settle is None:
+            prompt_settle = getattr(serial_comm, 'prompt_settle', None)
+        if prompt_settle is None:
+            prompt_settle = DEFAULT_PROMPT_SETTLE
+        self.prompt_settle = prompt_settle
 
         if logs_dir is None:
-            # Get directory of this file (serial_comm folder)
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            # Go one level up to 'serial' folder
-            project_root = os.path.abspath(os.path.join(base_dir, '..'))
-            # Set logs_dir to 'serial/logs'
-            logs_dir = os.path.join(project_root, 'logs')
+            logs_dir = default_logs_dir()
 
         self.logs_dir = logs_dir
         os.makedirs(self.logs_dir, exist_ok=True)
+        # Shared background writer; keeps command log files open across runs
+        self.log_writer = log_writer or get_log_writer()
+        # Optional indexed store of all captured output ([LogStore] in config.ini)
+        self.log_store = log_store if log_store is not None else get_log_store()
         self.logger = None
+        self.last_dmesg = None
+        # Per-command latency/timeout metrics (shared with the port's by default)
+        if metrics is None:
+            metrics = getattr(serial_comm, 'metrics', None) or get_metrics()
+        self.metrics = metrics
+        self._command_metrics = {}
+
 
+    def _log_filename(self, command):
+        safe_command = re.sub(r'\W+', '_', command.strip())
+        return os.path.join(self.logs_dir, f"{safe_command}.log")
 
     def _setup_logger(self, command):
         """
-        Sets up a logger that writes to a log file named after the command.
-        The log file is appended to on each run (no timestamp in filename).
+        Points self.logger at the log file named after the command.
+        The log file is appended to on each run (no timestamp in filename);
+        writes go through the shared log writer, so no file is opened here.
         """
-        # Create a safe filename based on the full command (sanitized)
-        safe_command = re.sub(r'\W+', '_', command.strip())
-        log_filename = os.path.join(self.logs_dir, f"{safe_command}.log")
+        log_filename = self._log_filename(command)
+        self.logger = CommandLog(self.log_writer, log_filename)
+        return log_filename
 
-        # Create logger
-        logger = logging.getLogger(f"CommandLogger_{safe_command}")
-        logger.setLevel(logging.DEBUG)
+    def _store_run(self, command, lines, started, exit_status=None):
+        """Hand a finished command's output to the log store, if one is configured."""
+        if self.log_store is not None:
+            self.log_store.record_run(self.device, command, lines, started=started,
+                                      exit_status=exit_status)
 
-        # Remove any existing handlers
-        if logger.hasHandlers():
-            logger.handlers.clear()
+    def _record_command(self, kind, command, started, duration, timed_out, exit_status=None):
+        """Count a finished command, add its latency and emit its trace span."""
+        device = str(self.device)
+        entry = self._command_metrics.get(kind)
+        if entry is None:
+            entry = self._command_metrics[kind] = (
+                self.metrics.histogram('command_duration_seconds', "Command round-trip time",
+                                       device=device, kind=kind),
+                self.metrics.counter('commands_total', "Commands run", device=device, kind=kind),
+                self.metrics.counter('command_timeouts_total', "Commands that timed out",
+                                     device=device, kind=kind))
+        durations, runs, timeouts = entry
+        durations.observe(duration)
+        runs.inc()
+        if timed_out:
+            timeouts.inc()
+        self.metrics.span(kind, started, duration, device=device, command=command,
+                          timed_out=timed_out, exit_status=exit_status)
 
-        # Create file handler in append mode
-        fh = logging.FileHandler(log_filename, mode='a', encoding='utf-8')
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s',
-                                      datefmt='%Y-%m-%d %H:%M:%S')
-        fh.setFormatter(formatter)
-        logger.addHandler(fh)
+    def _command_log(self, command, output_callback=None):
+        """Point self.logger at the command's log file; returns log(msg, level) for the run."""
+        self._setup_logger(command)
 
-        self.logger = logger
-        return log_filename
+        def log(msg, level=logging.INFO):
+            if self.logger:
+                self.logger.log(level, msg)
+            if output_callback:
+                output_callback(msg)
+        return log
+
+    def _prompt_capture(self, command, timeout, prompt_chars=None, prompt_pattern=None):
+        if prompt_pattern is None:
+            if prompt_chars is not None:
+                prompt_pattern = prompt_pattern_from_chars(prompt_chars)
+            else:
+                prompt_pattern = self.prompt_pattern
+        return PromptCapture(command, timeout, prompt_pattern, self.prompt_settle, time.time())
 
-    def run_command(self, command, timeout=10, output_callback=None, prompt_chars=None):
+    def _capture_finished(self, command, capture, started, log):
+        prompt = capture.flush()
+        if prompt:
+            log(prompt)
+        self._store_run(command, capture.lines, started)
+        self._record_command('run_command', command, started, time.time() - started, not capture.prompt_seen)
+        return '\n'.join(capture.lines)
+
+    def run_command(self, command, timeout=10, output_callback=None, prompt_chars=None,
+                    prompt_pattern=None):
         """
         Send a command and capture its output until prompt or timeout.
         Logs all output to a file named after the command (appended).
 
+        The output is consumed in raw chunks as they arrive and the call returns as
+        soon as the prompt appears at the tail of the stream, without waiting for a
+        read timeout.
+
         Args:
             command (str): The command to send.
             timeout (int): Timeout in seconds to wait for command completion.
             output_callback (callable): Optional function to receive output lines.
             prompt_chars (list or tuple): Characters indicating command prompt (default: ['$', '#', '>']).
+            prompt_pattern (str or re.Pattern): Regex matched against the output tail;
+                overrides prompt_chars and the manager's prompt_pattern.
 
         Returns:
             str: The full output captured from the command.
         """
-        if prompt_chars is None:
-            prompt_chars = ['$', '#', '>']
+        log = self._command_log(command, output_callback)
+        started = time.time()
+        log(f"[*] Sending command: {command}")
+        try:
+            capture = self._prompt_capture(command, timeout, prompt_chars, prompt_pattern)
+            for line in self.serial_comm.exchange(capture):
+                log(line)
+            return self._capture_finished(command, capture, started, log)
+        except Exception as e:
+            log(f"[Error running command '{command}']: {e}", level=logging.ERROR)
+            return ''
 
-        log_filename = self._setup_logger(command)
+    def _framed_finished(self, exchange, timeout, log):
+        frame = exchange.frame
+        result = frame.result(time.time() - exchange.started)
+        if result.timed_out:
+            log(f"[!] Command '{frame.command}' timed out after {timeout}s", level=logging.WARNING)
+        else:
+            log(f"[*] Exit status: {result.exit_status}")
+        self._store_run(frame.command, frame.lines, exchange.started, result.exit_status)
+        self._record_command('framed', frame.command, exchange.started, result.duration, result.timed_out,
+                             result.exit_status)
+        return result
 
-        def log(msg, level=logging.INFO):
-            if self.logger:
-                self.logger.log(level, msg)
-            if output_callback:
-                output_callback(msg)
+    def run_command_framed(self, command, timeout=10, output_callback=None):
+        """
+        Run a command wrapped in unique begin/end markers and return its exit status.
+
+        Completion is signalled by the end marker itself, so the call returns as
+        soon as the command finishes, and output lines that happen to end in a
+        prompt character cannot cut the capture short. A command still running
+        after `timeout` seconds is interrupted with Ctrl-C.
 
+        Args:
+            command (str): The command to send (a single shell line).
+            timeout (int): Timeout in seconds to wait for the end marker.
+            output_callback (callable): Optional function to receive output lines.
+
+        Returns:
+            CommandResult: Output (without the echo and markers) and exit status;
+            exit_status is None if the end marker did not arrive in time.
+        """
+        log = self._command_log(command, output_callback)
         log(f"[*] Sending command: {command}")
+        exchange = FrameExchange(CommandFrame(command), time.time(), timeout=timeout)
         try:
-            self.serial_comm.write(command + '\n')
-            output_lines = []
-            end_time = time.time() + timeout
-
-            while time.time() < end_time:
-                line = self.serial_comm.read_line()
-                if line:
-                    output_lines.append(line)
-                    log(line)
-                    # Check if line ends with any prompt character
-                    if any(line.strip().endswith(p) for p in prompt_chars):
-                        break
-                else:
-                    time.sleep(0.1)
-
-            #log(f"[*] Command output appended to {log_filename}")
-            return '\n'.join(output_lines)
+            for lines in self.serial_comm.exchange(exchange):
+                for line in lines:
+                    if line:
+                        log(line)
+            return self._framed_finished(exchange, timeout, log)
         except Exception as e:
             log(f"[Error running command '{command}']: {e}", level=logging.ERROR)
-            return ''
+            return exchange.frame.result(time.time() - exchange.started)
+
+    def stream_command(self, command, timeout=10, max_duration=None, spill_path=None, tail_lines=100,
+                       batches=False, output_callback=None, log_output=True):
+        """
+        Run a sentinel-framed command and hand its output out as it arrives.
+
+        Unlike run_command(), the output is never collected: the returned
+        CommandStream yields the lines (or per-read batches of lines) as the
+        caller iterates, and can copy them to a spill file on the way. Memory
+        use is bounded by the receive buffer and the `tail_lines` kept for
+        result(), whatever the size of the output (e.g. `cat` of a large log).
+
+        Usage:
+            stream = cmd_mgr.stream_command('dmesg', spill_path='logs/dmesg.txt')
+            for line in stream:
+                parser.feed(line)
+            if stream.exit_status != 0:
+                print(stream.result().output)
+
+        Args:
+            command (str): The command to send (a single shell line).
+            timeout (float): Seconds without any output after which the
+                command counts as hung (None: no limit, max_duration required).
+            max_duration (float): Optional limit on the total run time.
+            spill_path (str): Optional file receiving every output line.
+            tail_lines (int): Number of last lines kept in memory.
+            batches (bool): Yield lists of lines (one per read) instead of lines.
+            output_callback (callable): Optional function to receive output lines.
+            log_output (bool): Write the command log and log store entries.
+
+        Returns:
+            CommandStream: Iterate it to run the command. A command that is
+            abandoned early (break, close()) or hangs is interrupted with Ctrl-C.
+
+        Raises:
+            ValueError: Neither timeout nor max_duration is given.
+        """
+        if timeout is None and max_duration is None:
+            raise ValueError("stream_command() needs a timeout or a max_duration")
+        stream = CommandStream(command, tail_lines, spill_path, batches, output_callback,
+                               log_writer=self.log_writer if log_output else None,
+                               log_filename=self._log_filename(command),
+                               log_store=self.log_store if log_output else None,
+                               device=self.device)
+        stream._source = self._stream(stream, timeout, max_duration)
+        return stream
+
+    def _stream_exchange(self, stream, timeout, max_duration):
+        stream.start()
+        return FrameExchange(CommandFrame(stream.command), stream.started, timeout=max_duration,
+                             idle_timeout=timeout, keep_lines=False)
+
+    def _stream_finished(self, stream, exchange):
+        stream.finish(exchange.frame.exit_status, exchange.dropped)
+        self._record_command('stream', stream.command, stream.started, stream.duration,
+                             stream.timed_out, stream.exit_status)
+
+    def _stream(self, stream, timeout, max_duration):
+        exchange = self._stream_exchange(stream, timeout, max_duration)
+        reads = self.serial_comm.exchange(exchange)
+        try:
+            for lines in reads:
+                stream.add(lines)
+                if stream.batches:
+                    yield lines
+                else:
+                    yield from lines
+        finally:
+            reads.close()
+            self._stream_finished(stream, exchange)
+
+    def run_batch(self, commands, timeout=10, output_callback=None, window=8, disable_echo=True,
+                  log_output=True):
+        """
+        Run several commands back to back and return all results.
+
+        See iter_batch() for the arguments.
+
+        Returns:
+            list: One CommandResult per command, in order.
+        """
+        return list(self.iter_batch(commands, timeout=timeout, output_callback=output_callback,
+                                    window=window, disable_echo=disable_echo, log_output=log_output))
+
+    def _batch_pipeline(self, commands, timeout, window, batch_log, log_output):
+        frames = [CommandFrame(command) for command in commands]
+        if not frames:
+            return None
+        return FramePipeline(frames, timeout, window, on_line=batch_log.on_line if log_output else None)
+
+    def _batch_result(self, frame, batch_log, log_output):
+        if log_output:
+            batch_log.write(frame)
+            self._store_run(frame.command, frame.lines, frame.sent_at, frame.exit_status)
+        self._record_command('batch', frame.command, frame.sent_at, frame.duration,
+                             not frame.done, frame.exit_status)
+        return frame.result(frame.duration)
+
+    @staticmethod
+    def _echo_pipeline(on, timeout):
+        return FramePipeline([CommandFrame('stty echo' if on else 'stty -echo')], timeout, 1)
+
+    def iter_batch(self, commands, timeout=10, output_callback=None, window=8, disable_echo=True,
+                   log_output=True):
+        """
+        Pipeline sentinel-framed commands and yield their results as they complete.
+
+        Up to `window` commands are written ahead without waiting for the previous
+        one to finish; the returned stream is split into per-command results using
+        each command's unique markers. Terminal echo is switched off for the batch
+        so echoed input cannot interleave with the output of a running command.
+        Each command's log is handed to the shared log writer in a single block.
+
+        If a command does not finish within `timeout` seconds of becoming the
+        oldest outstanding command, it is interrupted with Ctrl-C. Commands that
+        were already written after it may have been discarded by the device, so
+        they are reported as timed out too; the rest of the batch continues.
+
+        Args:
+            commands (iterable): Commands to run (single shell lines).
+            timeout (int): Per-command timeout in seconds.
+            output_callback (callable): Optional function to receive output lines.
+            window (int): Maximum number of commands in flight.
+            disable_echo (bool): Run 'stty -echo' for the duration of the batch.
+            log_output (bool): Write the command logs and log store entries
+                (off for internal traffic such as file transfers).
+
+        Yields:
+            CommandResult: One per command, in order.
+        """
+        batch_log = BatchLog(self.log_writer, self._log_filename, timeout, output_callback)
+        pipeline = self._batch_pipeline(commands, timeout, window, batch_log, log_output)
+        if pipeline is None:
+            return
+
+        if disable_echo:
+            for _ in self.serial_comm.exchange(self._echo_pipeline(False, timeout)):
+                pass
+        finished = self.serial_comm.exchange(pipeline)
+        try:
+            for frame in finished:
+                yield self._batch_result(frame, batch_log, log_output)
+        finally:
+            finished.close()
+            if disable_echo:
+                for _ in self.serial_comm.exchange(self._echo_pipeline(True, timeout)):
+                    pass
+            batch_log.close()
 
     def save_to_file(self, filename, content, output_callback=None):
         """
@@ -118,34 +418,160 @@ class CommandManager:
             if output_callback:
                 output_callback(f"[Error saving {filename}]: {e}")
 
+    def parse_dmesg_output(self, output):
+        """
+        Parse dmesg output into boot time, warning and error lines.
+
+        Args:
+            output (str): Output of 'dmesg' (ANSI colours are stripped).
+
+        Returns:
+            tuple: (boot_time_line or None, warning lines, error lines). The full
+            DmesgTable is kept in self.last_dmesg for per-subsystem timings.
+        """
+        from logs_parser.dmesg_parser import parse_dmesg, WARN, ERR
+
+        table = parse_dmesg(output)
+        self.last_dmesg = table
+        boot_index = table.boot_index()
+        boot_time = table.line(boot_index) if boot_index is not None else None
+        warnings = table.lines(table.indices(severity=WARN))
+        errors = table.lines(table.indices(max_severity=ERR))
+        return boot_time, warnings, errors
+
+    def high_speed(self, baudrates=None, output_callback=None, **kwargs):
+        """
+        Context manager running the console at the fastest working rate for
+        bulk operations (pull_file, dmesg dumps) and switching it back after.
+
+        Usage:
+            with cmd_mgr.high_speed():
+                cmd_mgr.pull_file('/var/log/messages')
+
+        See Baud_rate.HighSpeed for the switch, handshake and fallback.
+        """
+        return HighSpeed(self, baudrates, output_callback=output_callback, **kwargs)
+
+    def _baudrate(self):
+        return getattr(getattr(self.serial_comm, 'ser', None), 'baudrate', None)
+
+    def _transfer_timeout(self, wire_chars, timeout=None):
+        return transfer_timeout(wire_chars, self._baudrate(), timeout)
+
+    def _run_transfer(self, steps, stats, output_callback=None):
+        """Run the batches of a File_transfer step generator (pull_steps, push_steps) and report."""
+        try:
+            for batch in steps:
+                for result in self.iter_batch(batch.commands, timeout=batch.timeout, window=batch.window,
+                                              log_output=False):
+                    batch.add(result)
+        finally:
+            steps.close()
+        return self._finish_transfer(stats, output_callback)
+
+    def _finish_transfer(self, stats, output_callback=None):
+        message = stats.format()
+        if self.logger:
+            self.logger.log(logging.INFO if stats.ok else logging.ERROR, message)
+        if output_callback:
+            output_callback(message)
+        return stats
+
+    def pull_file(self, remote_path, local_path=None, block_size=32768, compress=None, retries=3,
+                  window=4, timeout=None, output_callback=None):
+        """
+        Copy a file from the device to the host, binary-safe.
+
+        The file is read in blocks, each sent as its POSIX cksum followed by the
+        block gzipped (when the device has gzip) and base64 encoded. The block
+        commands are pipelined, so the line stays busy instead of waiting for a
+        round trip per block. Blocks that fail the CRC, do not decode or time
+        out are requested again on their own, up to `retries` more times. A file
+        that grows during the pull is copied up to its size at the start.
+
+        Args:
+            remote_path (str): File on the device.
+            local_path (str): Destination (default: logs_dir/<file name>).
+            block_size (int): Bytes per block.
+            compress (bool): gzip on the device (default: if available).
+            retries (int): Extra attempts for failed blocks.
+            window (int): Maximum number of block commands in flight.
+            timeout (float): Per-block timeout in seconds (default: from the baud rate).
+            output_callback (callable): Optional function to receive the transfer report.
+
+        Returns:
+            TransferStats: Size, duration, throughput and any failed blocks. The
+            local file is only written if every block arrived intact.
+        """
+        if local_path is None:
+            local_path = os.path.join(self.logs_dir, os.path.basename(remote_path.rstrip('/')))
+        stats = TransferStats('pull', remote_path, local_path, block_size=block_size,
+                              baudrate=self._baudrate())
+        self._setup_logger(f"pull_file {remote_path}")
+        return self._run_transfer(pull_steps(stats, compress, retries, window, timeout, self.TRANSFER_BATCH_BLOCKS),
+                                  stats, output_callback)
+
+    def push_file(self, local_path, remote_path, block_size=2048, compress=None, retries=3,
+                  timeout=None, output_callback=None):
+        """
+        Copy a file from the host to the device, binary-safe.
+
+        Each block is written into place on the device by one shell line
+        carrying it base64 encoded (gzipped when the device has gunzip), and the
+        device answers with the cksum of what it wrote; blocks whose CRC does not
+        match are sent again, up to `retries` more times. Every line has to fit
+        in the device's tty input buffer, so keep block_size at or below 2048.
+
+        Args:
+            local_path (str): File on the host.
+            remote_path (str): Destination on the device (created or truncated).
+            block_size (int): Bytes per block.
+            compress (bool): gzip the blocks (default: if the device has gunzip).
+            retries (int): Extra attempts for failed blocks.
+            timeout (float): Per-block timeout in seconds (default: from the baud rate).
+            output_callback (callable): Optional function to receive the transfer report.
+
+        Returns:
+            TransferStats: Size, duration, throughput and any failed blocks.
+        """
+        stats = TransferStats('push', remote_path, local_path, size=os.path.getsize(local_path),
+                              block_size=block_size, baudrate=self._baudrate())
+        self._setup_logger(f"push_file {remote_path}")
+        return self._run_transfer(push_steps(stats, compress, retries, timeout, self.TRANSFER_BATCH_BLOCKS),
+                                  stats, output_callback)
+
     def get_last_n_lines(self, file_path, n=10, timeout=5, output_callback=None):
         """
         Retrieve the last N lines of a file on the remote device via serial command.
 
+        The lines are streamed straight into logs/<path>_last_<n>_lines.log
+        as they arrive, so a large N does not hold the output in memory twice.
+
         Args:
             file_path (str): Absolute path of the file on the device.
             n (int): Number of lines to retrieve from the end of the file.
-            timeout (int): Timeout in seconds for the command execution.
+            timeout (int): Seconds without output before the command counts as hung.
             output_callback (callable): Optional function to receive output lines.
 
         Returns:
             str: Last N lines of the file as a string.
         """
         command = f"tail -n {n} {file_path}"
-        output = self.run_command(command, timeout=timeout, output_callback=output_callback)
-
-        # Prepare safe filename based on file path and number of lines
-        safe_path = re.sub(r'\W+', '_', file_path.strip('/'))
-        log_filename = os.path.join(self.logs_dir, f"{safe_path}_last_{n}_lines.log")
-
-        # Save output to file
+        log_filename = self._last_n_lines_filename(file_path, n)
         try:
-            with open(log_filename, 'w', encoding='utf-8') as f:
-                f.write(output)
-            if output_callback:
-                output_callback(f"[*] Saved last {n} lines of '{file_path}' to {log_filename}")
+            stream = self.stream_command(command, timeout=timeout, spill_path=log_filename, tail_lines=n,
+                                         output_callback=output_callback)
+            for _ in stream:
+                pass
         except Exception as e:
             if output_callback:
                 output_callback(f"[Error saving log file]: {e}")
+            return ''
+        if output_callback:
+            output_callback(f"[*] Saved last {n} lines of '{file_path}' to {log_filename}")
+        return '\n'.join(stream.tail)
 
-        return output
\ No newline at end of file
+    def _last_n_lines_filename(self, file_path, n):
+        # Safe filename based on file path and number of lines
+        safe_path = re.sub(r'\W+', '_', file_path.strip('/'))
+        return os.path.join(self.logs_dir, f"{safe_path}_last_{n}_lines.log")
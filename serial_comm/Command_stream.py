@@ -0,0 +1,118 @@
+import collections
+import time
+
+from serial_comm.Command_framing import CommandResult
+
+
+class CommandStream:
+    """
+    Output of one command, handed out line by line as it arrives.
+
+    Iterate it (`for line in stream`, or `async for` with AsyncCommandManager)
+    to consume the output; with batches=True each item is the list of lines
+    that came in with one read instead. Nothing is read from the device
+    faster than it is consumed, and only the last `tail_lines` lines are kept
+    in memory (for error reports and result()). Every line also goes to the
+    spill file, if one was given, to the command log and, in blocks of
+    `store_block` lines, to the log store, so neither side ever holds the
+    whole output.
+
+    After the iteration ends, exit_status, timed_out, line_count, duration
+    and dropped (bytes lost because the consumer fell more than the receive
+    buffer behind) describe the run.
+    """
+
+    def __init__(self, command, tail_lines=100, spill_path=None, batches=False, output_callback=None,
+                 log_writer=None, log_filename=None, log_store=None, device=None, store_block=1000):
+        self.command = command
+        self.tail = collections.deque(maxlen=tail_lines)
+        self.spill_path = spill_path
+        self.batches = batches
+        self.output_callback = output_callback
+        self.log_writer = log_writer
+        self.log_filename = log_filename
+        self.log_store = log_store
+        self.device = device
+        self.store_block = store_block
+
+        self.started = None
+        self.duration = 0.0
+        self.exit_status = None
+        self.line_count = 0
+        self.dropped = 0
+        self.finished = False
+        self._source = None
+        self._spill = None
+        self._store_lines = []
+        self._run_id = None
+
+    @property
+    def timed_out(self):
+        return self.finished and self.exit_status is None
+
+    def __iter__(self):
+        return self._source
+
+    def __aiter__(self):
+        return self._source
+
+    def close(self):
+        """Stop early: interrupts the command if it is still running."""
+        self._source.close()
+
+    async def aclose(self):
+        await self._source.aclose()
+
+    def result(self):
+        """CommandResult with the kept tail as output."""
+        return CommandResult(self.command, '\n'.join(self.tail), self.exit_status, self.duration)
+
+    def start(self):
+        self.started = time.time()
+        if self.spill_path is not None:
+            self._spill = open(self.spill_path, 'w', encoding='utf-8')
+        if self.log_writer is not None:
+            self.log_writer.write(self.log_filename, f"[*] Sending command: {self.command}")
+
+    def add(self, lines):
+        """Pass newly received lines to the tail and all sinks."""
+        self.line_count += len(lines)
+        self.tail.extend(lines)
+        if self._spill is not None:
+            self._spill.write('\n'.join(lines) + '\n')
+        if self.log_writer is not None:
+            self.log_writer.write_lines(self.log_filename, [line for line in lines if line])
+        if self.log_store is not None:
+            self._store_lines.extend(lines)
+            if len(self._store_lines) >= self.store_block:
+                self._store_block()
+        if self.output_callback:
+            for line in lines:
+                self.output_callback(line)
+
+    def _store_block(self, exit_status=None):
+        self._run_id = self.log_store.record_run(self.device, self.command, self._store_lines,
+                                                 started=self.started, exit_status=exit_status,
+                                                 run_id=self._run_id)
+        self._store_lines = []
+
+    def finish(self, exit_status, dropped=0):
+        if self.finished:
+            return
+        self.finished = True
+        self.exit_status = exit_status
+        self.dropped = dropped
+        self.duration = time.time() - self.started
+        if self._spill is not None:
+            self._spill.close()
+        if self.log_writer is not None:
+            messages = []
+            if dropped:
+                messages.append(f"[!] {dropped} bytes of output lost (consumer too slow)")
+            if exit_status is None:
+                messages.append(f"[!] Command '{self.command}' did not finish")
+            else:
+                messages.append(f"[*] Exit status: {exit_status}")
+            self.log_writer.write_lines(self.log_filename, messages)
+        if self.log_store is not None:
+            self._store_block(exit_status)
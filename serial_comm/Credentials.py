@@ -0,0 +1,332 @@
+import configparser
+import os
+import re
+import stat
+import threading
+
+DEFAULT_SERVICE = 'serial_device'
+DEFAULT_CREDENTIALS_FILE = os.path.join('~', '.serial_credentials.ini')
+
+
+class CredentialProvider:
+    """
+    Source of login credentials.
+
+    Credentials are stored under a key: a device name, a port or a USB serial
+    number, or None for the default shared by all devices. lookup() tries a
+    list of keys and falls back to the default.
+    """
+
+    # False for sources set() cannot write to
+    writable = True
+
+    def get(self, key=None):
+        """Return (login_id, password) stored under `key`, or None."""
+        raise NotImplementedError
+
+    def set(self, key, login_id, password):
+        raise NotImplementedError(f"{type(self).__name__} is read-only")
+
+    def lookup(self, keys=()):
+        """Credentials of the first of `keys` that has any, else the default ones (or None)."""
+        for key in list(keys) + [None]:
+            credentials = self.get(key)
+            if credentials is not None:
+                return credentials
+        return None
+
+
+class MemoryCredentials(CredentialProvider):
+    """Credentials held in a dict; nothing is persisted (tests, benchmarks, CI)."""
+
+    def __init__(self, login_id=None, password=None, devices=None):
+        self._entries = {}
+        if login_id is not None:
+            self._entries[None] = (login_id, password)
+        for key, (device_login, device_password) in (devices or {}).items():
+            self._entries[key] = (device_login, device_password)
+
+    def get(self, key=None):
+        return self._entries.get(key)
+
+    def set(self, key, login_id, password):
+        self._entries[key] = (login_id, password)
+
+
+class EnvCredentials(CredentialProvider):
+    """
+    Credentials from environment variables:
+        SERIAL_LOGIN_ID / SERIAL_PASSWORD                   default
+        SERIAL_LOGIN_ID_<KEY> / SERIAL_PASSWORD_<KEY>       per device
+    <KEY> is the key upper-cased with every other character than A-Z, 0-9
+    replaced by '_' (unit01 -> UNIT01, /dev/ttyUSB0 -> _DEV_TTYUSB0).
+    """
+
+    writable = False
+
+    def __init__(self, prefix='SERIAL', environ=None):
+        self.prefix = prefix
+        self.environ = os.environ if environ is None else environ
+
+    def _names(self, key):
+        suffix = '' if key is None else '_' + re.sub(r'[^A-Z0-9]', '_', str(key).upper())
+        return f"{self.prefix}_LOGIN_ID{suffix}", f"{self.prefix}_PASSWORD{suffix}"
+
+    def get(self, key=None):
+        login_name, password_name = self._names(key)
+        login_id = self.environ.get(login_name)
+        password = self.environ.get(password_name)
+        if login_id and password is not None:
+            return login_id, password
+        return None
+
+
+class FileCredentials(CredentialProvider):
+    """
+    Credentials from an INI file, one section per key and [default] for the
+    shared login:
+
+        [default]
+        login_id = root
+        password = secret
+
+        [unit01]
+        login_id = admin
+        password = other
+
+    The file should only be readable by its owner; set() writes it that way.
+    """
+
+    DEFAULT_SECTION = 'default'
+
+    def __init__(self, path=DEFAULT_CREDENTIALS_FILE):
+        self.path = os.path.expanduser(path)
+        self._config = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._config is None:
+            config = configparser.ConfigParser(interpolation=None, default_section='__none__')
+            if os.path.exists(self.path):
+                mode = os.stat(self.path).st_mode
+                if os.name == 'posix' and mode & (stat.S_IRWXG | stat.S_IRWXO):
+                    print(f"[!] Credentials file {self.path} is accessible by other users (chmod 600 it)")
+                config.read(self.path, encoding='utf-8')
+            self._config = config
+        return self._config
+
+    def get(self, key=None):
+        section = self.DEFAULT_SECTION if key is None else str(key)
+        with self._lock:
+            config = self._load()
+            if not config.has_option(section, 'login_id'):
+                return None
+            return config.get(section, 'login_id'), config.get(section, 'password', fallback='')
+
+    def set(self, key, login_id, password):
+        section = self.DEFAULT_SECTION if key is None else str(key)
+        with self._lock:
+            config = self._load()
+            if not config.has_section(section):
+                config.add_section(section)
+            config.set(section, 'login_id', login_id)
+            config.set(section, 'password', password)
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temp_path = self.path + '.tmp'
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                config.write(f)
+            os.replace(temp_path, self.path)
+
+
+class KeyringCredentials(CredentialProvider):
+    """
+    Credentials in the OS keyring.
+
+    The default login is stored as 'login_id' / 'password' of the service (as
+    set_credentials.py always did); a device's own login under the service
+    '<service>:<key>'. The service also keeps the list of keys that have their
+    own login, so looking up a device without one costs no keyring call.
+    keyring is imported on first use, and an unusable keyring backend counts
+    as "no credentials" so other providers can be tried.
+    """
+
+    _INDEX = 'devices'
+
+    def __init__(self, service_name=DEFAULT_SERVICE):
+        self.service_name = service_name
+        self._device_keys = None
+        self._warned = False
+
+    def _keyring(self):
+        import keyring
+        import keyring.errors
+
+        return keyring
+
+    def _service(self, key):
+        return self.service_name if key is None else f"{self.service_name}:{key}"
+
+    def _read(self, service, name):
+        keyring = self._keyring()
+        try:
+            return keyring.get_password(service, name)
+        except keyring.errors.KeyringError as e:
+            if not self._warned:
+                self._warned = True
+                print(f"[!] Keyring unavailable: {e}")
+            return None
+
+    def device_keys(self):
+        """Keys that have their own login (read from the keyring once)."""
+        if self._device_keys is None:
+            index = self._read(self.service_name, self._INDEX)
+            self._device_keys = set(filter(None, (index or '').split('\n')))
+        return self._device_keys
+
+    def get(self, key=None):
+        if key is not None and str(key) not in self.device_keys():
+            return None
+        service = self._service(key)
+        login_id = self._read(service, 'login_id')
+        if login_id is None:
+            return None
+        password = self._read(service, 'password')
+        return None if password is None else (login_id, password)
+
+    def set(self, key, login_id, password):
+        keyring = self._keyring()
+        service = self._service(key)
+        keyring.set_password(service, 'login_id', login_id)
+        keyring.set_password(service, 'password', password)
+        if key is not None and str(key) not in self.device_keys():
+            self._device_keys.add(str(key))
+            keyring.set_password(self.service_name, self._INDEX, '\n'.join(sorted(self._device_keys)))
+
+
+class ChainCredentials(CredentialProvider):
+    """
+    Several providers in priority order. A per-device login in any provider
+    beats every default: lookup() tries each key in all providers, most
+    specific key first, before falling back to the first provider's default.
+    Later, slower sources such as the keyring are only asked when the earlier
+    ones have nothing for the key; set() writes to the first writable provider.
+    """
+
+    def __init__(self, providers):
+        self.providers = list(providers)
+
+    @property
+    def writable(self):
+        return any(provider.writable for provider in self.providers)
+
+    def get(self, key=None):
+        for provider in self.providers:
+            credentials = provider.get(key)
+            if credentials is not None:
+                return credentials
+        return None
+
+    def set(self, key, login_id, password):
+        for provider in self.providers:
+            if provider.writable:
+                provider.set(key, login_id, password)
+                return
+        raise NotImplementedError("No writable credential provider configured")
+
+
+class CachingCredentials(CredentialProvider):
+    """
+    Remembers every answer of the wrapped provider (misses too) for the life
+    of the process, so opening many sessions reads each key once.
+    """
+
+    def __init__(self, provider):
+        self.provider = provider
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @property
+    def writable(self):
+        return self.provider.writable
+
+    def get(self, key=None):
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = self.provider.get(key)
+            return self._cache[key]
+
+    def set(self, key, login_id, password):
+        with self._lock:
+            if self._cache.get(key) == (login_id, password):
+                return
+            self.provider.set(key, login_id, password)
+            self._cache[key] = (login_id, password)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+_serial_numbers = None
+_serial_numbers_lock = threading.Lock()
+
+
+def port_serial_number(port):
+    """USB serial number of the adapter behind `port` (None if unknown); ports are scanned once."""
+    global _serial_numbers
+    with _serial_numbers_lock:
+        if _serial_numbers is None:
+            import serial.tools.list_ports
+
+            try:
+                _serial_numbers = {info.device: info.serial_number
+                                   for info in serial.tools.list_ports.comports() if info.serial_number}
+            except OSError:
+                _serial_numbers = {}
+        return _serial_numbers.get(port)
+
+
+def device_keys(device=None, port=None):
+    """Lookup keys for one device, most specific first: its name, its adapter's serial number, its port."""
+    keys = []
+    for key in (device, port_serial_number(port) if port else None, port):
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+_PROVIDERS = {
+    'env': lambda section: EnvCredentials(),
+    'file': lambda section: FileCredentials(section.get('file', DEFAULT_CREDENTIALS_FILE)),
+    'keyring': lambda section: KeyringCredentials(section.get('service', DEFAULT_SERVICE)),
+}
+
+_default_provider = None
+_default_provider_lock = threading.Lock()
+
+
+def get_credential_provider(config_file='config.ini'):
+    """
+    Return the process-wide credential provider: the configured sources in
+    order, each behind a cache.
+
+    The sources and their order come from an optional [Credentials] section:
+        [Credentials]
+        providers = env, file, keyring
+        file = ~/.serial_credentials.ini
+        service = serial_device
+    Without it, the environment is checked first and then the keyring.
+    """
+    global _default_provider
+    with _default_provider_lock:
+        if _default_provider is None:
+            config = configparser.ConfigParser()
+            config.read(config_file)
+            section = config['Credentials'] if config.has_section('Credentials') else {}
+            names = [name.strip() for name in section.get('providers', 'env, keyring').split(',') if name.strip()]
+            unknown = [name for name in names if name not in _PROVIDERS]
+            if unknown:
+                raise ValueError(f"Unknown credential provider(s) in [Credentials]: {', '.join(unknown)}")
+            _default_provider = ChainCredentials(CachingCredentials(_PROVIDERS[name](section)) for name in names)
+        return _default_provider
@@ -0,0 +1,377 @@
+import base64
+import binascii
+import gzip
+import os
+import shlex
+import time
+import zlib
+
+# Tools looked for on the device before a transfer
+_PROBE_TOOLS = ('base64', 'cksum', 'dd', 'gzip', 'gunzip')
+
+# Bit-reversal of every byte value, for computing the MSB-first POSIX CRC with zlib
+_REVERSED_BITS = bytes(int(f'{i:08b}'[::-1], 2) for i in range(256))
+
+
+def posix_cksum(data):
+    """
+    CRC of `data` as printed by the POSIX `cksum` utility.
+
+    cksum uses the non-reflected form of the CRC-32 polynomial followed by the
+    data length; zlib only implements the reflected form, so the input is
+    bit-reversed byte by byte and the result reversed back.
+    """
+    length = len(data)
+    suffix = bytearray()
+    while length:
+        suffix.append(length & 0xFF)
+        length >>= 8
+    crc = zlib.crc32((bytes(data) + suffix).translate(_REVERSED_BITS), 0xFFFFFFFF)
+    return int(f'{crc:032b}'[::-1], 2)
+
+
+def probe_command(remote_path=None):
+    """Shell line that lists the available transfer tools (and the file size, if a path is given)."""
+    command = (f"for t in {' '.join(_PROBE_TOOLS)}; do "
+               f"command -v $t >/dev/null 2>&1 && echo tool:$t; done")
+    if remote_path is not None:
+        command += f"; echo size:$(wc -c < {shlex.quote(remote_path)})"
+    return command
+
+
+def transfer_timeout(wire_chars, baudrate, timeout=None):
+    """Per-block timeout: three times the block's time on the wire, plus some slack."""
+    if timeout is not None:
+        return timeout
+    if not baudrate:
+        return 30
+    return 5 + 3 * wire_chars / (baudrate / 10)
+
+
+def parse_probe(output):
+    """
+    Returns:
+        tuple: (set of tool names, file size or None).
+    """
+    tools, size = set(), None
+    for line in output.splitlines():
+        line = line.strip()
+        if line.startswith('tool:'):
+            tools.add(line[5:])
+        elif line.startswith('size:') and line[5:].strip().isdigit():
+            size = int(line[5:])
+    return tools, size
+
+
+class TransferStats:
+    """Outcome and throughput of one pull_file()/push_file() transfer."""
+
+    def __init__(self, direction, remote_path, local_path, size=0, block_size=0, compressed=False,
+                 baudrate=None):
+        self.direction = direction
+        self.remote_path = remote_path
+        self.local_path = local_path
+        self.size = size
+        self.block_size = block_size
+        self.compressed = compressed
+        self.baudrate = baudrate
+        self.blocks = 0
+        # Blocks sent again after a CRC mismatch, decode error or timeout
+        self.retried_blocks = 0
+        self.failed_blocks = []
+        # Characters of encoded payload that crossed the serial line
+        self.wire_bytes = 0
+        self.duration = 0.0
+        self.error = None
+
+    @property
+    def ok(self):
+        return self.error is None and not self.failed_blocks
+
+    @property
+    def throughput(self):
+        """File bytes per second."""
+        return self.size / self.duration if self.duration > 0 else 0.0
+
+    @property
+    def line_utilization(self):
+        """Fraction of the raw line rate (baudrate / 10 bytes/s) spent on payload, or None."""
+        if not self.baudrate or self.duration <= 0:
+            return None
+        return self.wire_bytes / self.duration / (self.baudrate / 10)
+
+    def format(self):
+        if self.error:
+            return f"[Error {self.direction} '{self.remote_path}']: {self.error}"
+        verb = 'Pulled' if self.direction == 'pull' else 'Pushed'
+        text = (f"[*] {verb} '{self.remote_path}' ({self.size} bytes, {self.blocks} blocks"
+                f"{', gzip' if self.compressed else ''}) in {self.duration:.2f}s: "
+                f"{self.throughput / 1024:.1f} KB/s")
+        if self.line_utilization is not None:
+            text += f", {self.line_utilization:.0%} of line rate"
+        if self.retried_blocks:
+            text += f", {self.retried_blocks} blocks retried"
+        if self.failed_blocks:
+            text += f", FAILED blocks {self.failed_blocks}"
+        return text
+
+    def __repr__(self):
+        return (f"TransferStats(direction={self.direction!r}, remote_path={self.remote_path!r}, "
+                f"size={self.size}, ok={self.ok}, duration={self.duration:.3f})")
+
+
+class PullTransfer:
+    """
+    Block plan for copying a device file to the host.
+
+    Each block is one shell line that prints the POSIX cksum of the block
+    followed by the block itself, gzipped (when the device has gzip) and base64
+    encoded:
+
+        dd if=FILE bs=B skip=I count=1 | cksum; dd ... | gzip -c | base64
+
+    The text is binary-safe and never looks like a prompt, and the CRC lets a
+    corrupted block be requested again on its own. Blocks are written straight
+    to their offset in the local file, so retries can arrive in any order. The
+    last block is cut at `size` (`| head -c N`), so a file that keeps growing
+    during the pull (a live log) is copied as it was when it was probed.
+    """
+
+    def __init__(self, remote_path, local_file, size, block_size, compress):
+        self.remote_path = remote_path
+        self.local_file = local_file
+        self.size = size
+        self.block_size = block_size
+        self.compress = compress
+
+    @property
+    def block_count(self):
+        return (self.size + self.block_size - 1) // self.block_size
+
+    def command(self, block):
+        read = (f"dd if={shlex.quote(self.remote_path)} bs={self.block_size} skip={block} count=1 "
+                f"2>/dev/null")
+        length = self.expected_length(block)
+        if length < self.block_size:
+            read += f" | head -c {length}"
+        encode = f"{read} | gzip -c | base64" if self.compress else f"{read} | base64"
+        return f"{read} | cksum; {encode}"
+
+    def expected_length(self, block):
+        return min(self.block_size, self.size - block * self.block_size)
+
+    def accept(self, block, result):
+        """
+        Check one block's output and write it to the local file.
+
+        Returns:
+            bool: True if the block arrived intact.
+        """
+        if not result.ok or not result.output:
+            return False
+        lines = result.output.split('\n')
+        fields = lines[0].split()
+        if len(fields) < 2 or not fields[0].isdigit() or not fields[1].isdigit():
+            return False
+        crc, length = int(fields[0]), int(fields[1])
+        try:
+            data = base64.b64decode(''.join(lines[1:]), validate=True)
+            if self.compress:
+                data = gzip.decompress(data)
+        except (binascii.Error, OSError, EOFError, zlib.error):
+            return False
+        if length != self.expected_length(block) or len(data) != length or posix_cksum(data) != crc:
+            return False
+        self.local_file.seek(block * self.block_size)
+        self.local_file.write(data)
+        return True
+
+
+class PushTransfer:
+    """
+    Block plan for copying a host file to the device.
+
+    Each block is base64 encoded (gzipped first when the device has gunzip and
+    it helps) into one shell line that decodes it into place and prints the
+    cksum of what landed on the device:
+
+        echo DATA | base64 -d | dd of=FILE bs=B seek=I conv=notrunc; dd ... | cksum
+
+    The block size is kept small because every line must fit in the device's
+    tty input buffer (4095 characters in canonical mode).
+    """
+
+    def __init__(self, local_file, remote_path, size, block_size, compress):
+        self.local_file = local_file
+        self.remote_path = remote_path
+        self.size = size
+        self.block_size = block_size
+        self.compress = compress
+
+    @property
+    def block_count(self):
+        return (self.size + self.block_size - 1) // self.block_size
+
+    def create_command(self):
+        return f": > {shlex.quote(self.remote_path)}"
+
+    def read_block(self, block):
+        self.local_file.seek(block * self.block_size)
+        return self.local_file.read(self.block_size)
+
+    def command(self, block, data):
+        remote = shlex.quote(self.remote_path)
+        decode = 'base64 -d'
+        if self.compress:
+            packed = gzip.compress(data, compresslevel=6, mtime=0)
+            if len(packed) < len(data):
+                data = packed
+                decode = 'base64 -d | gunzip -c'
+        payload = base64.b64encode(data).decode('ascii')
+        write = f"echo {payload} | {decode} | dd of={remote} bs={self.block_size} seek={block} conv=notrunc 2>/dev/null"
+        check = f"dd if={remote} bs={self.block_size} skip={block} count=1 2>/dev/null | cksum"
+        return f"{write} && {check}"
+
+    @staticmethod
+    def accept(data, result):
+        """True if the device reports the block's CRC and length back unchanged."""
+        if not result.ok:
+            return False
+        fields = result.output.split()
+        return (len(fields) >= 2 and fields[0] == str(posix_cksum(data))
+                and fields[1] == str(len(data)))
+
+
+class TransferBatch:
+    """
+    Shell lines a transfer needs run as one pipelined batch.
+
+    The manager runs `commands` (run_batch() options `timeout` and `window`,
+    no command logs) and passes each result to add() in order; with an
+    `on_result(index, result)` callback the results are handed over as they
+    arrive instead of being kept in `results`.
+    """
+
+    def __init__(self, commands, timeout=10, window=8, on_result=None):
+        self.commands = commands
+        self.timeout = timeout
+        self.window = window
+        self.on_result = on_result
+        self.results = []
+        self._count = 0
+
+    def add(self, result):
+        if self.on_result is None:
+            self.results.append(result)
+        else:
+            self.on_result(self._count, result)
+        self._count += 1
+
+
+def _block_batches(stats, block_count, retries, batch_blocks, batch_for):
+    """
+    Yield the batches for all blocks, then again for the failed ones, up to
+    `retries` more times; the blocks that never made it end up in
+    stats.failed_blocks. batch_for(blocks, failed) builds the batch for
+    `blocks` and appends the ones that fail to `failed`.
+    """
+    pending = list(range(block_count))
+    for attempt in range(retries + 1):
+        if not pending:
+            break
+        if attempt:
+            stats.retried_blocks += len(pending)
+        failed = []
+        for batch_start in range(0, len(pending), batch_blocks):
+            yield batch_for(pending[batch_start:batch_start + batch_blocks], failed)
+        pending = failed
+    stats.failed_blocks = pending
+
+
+def pull_steps(stats, compress=None, retries=3, window=4, timeout=None, batch_blocks=256):
+    """
+    The batches of one pull (CommandManager.pull_file()), independent of how
+    they are run: probe the tools and size, then the block rounds.
+
+    Yields TransferBatch objects; each must have been run before the next one
+    is asked for. Fills in `stats`, and moves the downloaded file from
+    <local_path>.part into place once every block arrived intact; the .part
+    file is removed if the pull fails or is abandoned.
+    """
+    probe = TransferBatch([probe_command(stats.remote_path)])
+    yield probe
+    tools, size = parse_probe(probe.results[0].output)
+    missing = {'base64', 'cksum', 'dd'} - tools
+    if missing or size is None:
+        stats.error = (f"missing tools on the device: {', '.join(sorted(missing))}" if missing
+                       else "cannot read the file size")
+        return
+    stats.size = size
+    stats.compressed = 'gzip' in tools if compress is None else bool(compress) and 'gzip' in tools
+
+    block_timeout = transfer_timeout(stats.block_size * 1.4 + 64, stats.baudrate, timeout)
+    part_path = stats.local_path + '.part'
+    start = time.time()
+    complete = False
+    try:
+        with open(part_path, 'wb') as f:
+            f.truncate(size)
+            plan = PullTransfer(stats.remote_path, f, size, stats.block_size, stats.compressed)
+            stats.blocks = plan.block_count
+
+            def batch_for(blocks, failed):
+                def on_result(index, result):
+                    stats.wire_bytes += len(result.output) + 1
+                    if not plan.accept(blocks[index], result):
+                        failed.append(blocks[index])
+                return TransferBatch([plan.command(block) for block in blocks], block_timeout, window, on_result)
+
+            yield from _block_batches(stats, plan.block_count, retries, batch_blocks, batch_for)
+        complete = stats.ok
+    finally:
+        stats.duration = time.time() - start
+        if complete:
+            os.replace(part_path, stats.local_path)
+        elif os.path.exists(part_path):
+            os.remove(part_path)
+
+
+def push_steps(stats, compress=None, retries=3, timeout=None, batch_blocks=256):
+    """
+    The batches of one push (CommandManager.push_file()), independent of how
+    they are run: probe the tools, create the file, then the block rounds.
+    Same protocol as pull_steps().
+    """
+    probe = TransferBatch([probe_command()])
+    yield probe
+    tools, _ = parse_probe(probe.results[0].output)
+    missing = {'base64', 'cksum', 'dd'} - tools
+    if missing:
+        stats.error = f"missing tools on the device: {', '.join(sorted(missing))}"
+        return
+    stats.compressed = 'gunzip' in tools if compress is None else bool(compress) and 'gunzip' in tools
+
+    block_timeout = transfer_timeout(stats.block_size * 1.4 + 256, stats.baudrate, timeout)
+    start = time.time()
+    with open(stats.local_path, 'rb') as f:
+        plan = PushTransfer(f, stats.remote_path, stats.size, stats.block_size, stats.compressed)
+        stats.blocks = plan.block_count
+        create = TransferBatch([plan.create_command()])
+        yield create
+        if not create.results[0].ok:
+            stats.error = "cannot create the file on the device"
+            return
+
+        def batch_for(blocks, failed):
+            batch = [(block, plan.read_block(block)) for block in blocks]
+            commands = [plan.command(block, data) for block, data in batch]
+            stats.wire_bytes += sum(len(command) + 1 for command in commands)
+
+            def on_result(index, result):
+                block, data = batch[index]
+                if not plan.accept(data, result):
+                    failed.append(block)
+            return TransferBatch(commands, block_timeout, on_result=on_result)
+
+        yield from _block_batches(stats, plan.block_count, retries, batch_blocks, batch_for)
+    stats.duration = time.time() - start
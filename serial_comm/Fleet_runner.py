@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+
+from serial_comm.Serial_Comm import read_fleet_config
+from serial_comm.Command_manager import default_logs_dir
+from serial_comm.Async_serial import AsyncSerialComm, AsyncCommandManager, AsyncLoginManager
+
+
+class FleetRunner:
+    """
+    Run the same command list on every unit in the config inventory at once.
+
+    All units are driven from a single asyncio event loop (one AsyncSerialComm
+    per port), so the total run time is bounded by the slowest device rather
+    than the sum of all of them. Each unit logs into its own logs/<name>/ folder.
+    """
+
+    def __init__(self, config_file='config.ini', logs_dir=None, login=True, max_concurrency=None,
+                 command_timeout=10, login_timeout=15):
+        self.config_file = config_file
+        self.logs_dir = logs_dir or default_logs_dir()
+        self.login = login
+        self.max_concurrency = max_concurrency
+        self.command_timeout = command_timeout
+        self.login_timeout = login_timeout
+        self.devices = read_fleet_config(config_file)
+
+    def run(self, commands, output_callback=None):
+        """
+        Run `commands` on every device and wait for all of them.
+
+        Args:
+            commands (list): Commands to run on each unit.
+            output_callback (callable): Optional function receiving "[name] message" lines.
+
+        Returns:
+            list: One report dict per device (see _run_device).
+        """
+        return asyncio.run(self.run_async(commands, output_callback))
+
+    async def run_async(self, commands, output_callback=None):
+        commands = list(commands)
+        semaphore = asyncio.Semaphore(self.max_concurrency or max(1, len(self.devices)))
+        tasks = [self._run_device(name, section, commands, semaphore, output_callback)
+                 for name, section in self.devices.items()]
+        return await asyncio.gather(*tasks)
+
+    async def _run_device(self, name, section, commands, semaphore, output_callback):
+        def log(msg):
+            if output_callback:
+                output_callback(f"[{name}] {msg}")
+
+        report = {
+            'device': name,
+            'port': None,
+            'logged_in': None,
+            'login_time': None,
+            'total_time': None,
+            'error': None,
+            'results': [],
+        }
+        async with semaphore:
+            start = time.time()
+            comm = None
+            try:
+                comm = AsyncSerialComm(self.config_file, section=section)
+                report['port'] = comm.ser.port
+                await comm.open()
+                if comm.closed:
+                    raise RuntimeError(f"could not open {comm.ser.port}")
+
+                if self.login:
+                    login_start = time.time()
+                    login_manager = AsyncLoginManager(comm, device=name)
+                    report['logged_in'] = await login_manager.login_sequence(
+                        timeout=self.login_timeout, output_callback=log)
+                    report['login_time'] = time.time() - login_start
+                    if not report['logged_in']:
+                        raise RuntimeError("login failed")
+
+                command_manager = AsyncCommandManager(comm, logs_dir=os.path.join(self.logs_dir, name),
+                                                       device=name)
+                async for result in command_manager.iter_batch(commands, timeout=self.command_timeout):
+                    report['results'].append({
+                        'command': result.command,
+                        'exit_status': result.exit_status,
+                        'duration': result.duration,
+                        'output': result.output,
+                    })
+            except Exception as e:
+                report['error'] = str(e)
+                log(f"[Error]: {e}")
+            finally:
+                if comm is not None:
+                    comm.close()
+                report['total_time'] = time.time() - start
+        return report
+
+    @staticmethod
+    def summarize(reports):
+        """Aggregate per-device reports into fleet-wide counts and timings."""
+        failed_commands = sum(1 for report in reports for result in report['results']
+                              if result['exit_status'] != 0)
+        total_times = [report['total_time'] for report in reports if report['total_time'] is not None]
+        return {
+            'devices': len(reports),
+            'devices_ok': sum(1 for report in reports if not report['error']),
+            'commands_run': sum(len(report['results']) for report in reports),
+            'commands_failed': failed_commands,
+            'slowest_device_time': max(total_times) if total_times else None,
+            'sum_of_device_times': sum(total_times),
+        }
+
+    def save_report(self, reports, filename=None):
+        """Write the reports and summary as JSON; returns the file path."""
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = os.path.join(self.logs_dir, f"fleet_report_{timestamp}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump({'summary': self.summarize(reports), 'devices': reports}, f, indent=2)
+        return filename
@@ -0,0 +1,329 @@
+import atexit
+import configparser
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# "[CRIT]"-style level tokens of the gain logs, normalized
+_SEVERITY_RE = re.compile(r'\[(EMERG|ALERT|CRIT|ERR|ERROR|WARN|WARNING|NOTICE|INFO|DEBUG)\]')
+_SEVERITY_ALIASES = {'ERROR': 'ERR', 'WARNING': 'WARN'}
+
+# Line prefix written by the command logs: "2025-07-02 00:49:21 - INFO - message"
+_LOG_LINE_RE = re.compile(r'^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d) - [A-Z]+ - (.*)$')
+_SEND_PREFIX = '[*] Sending command: '
+_EXIT_PREFIX = '[*] Exit status: '
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    device TEXT,
+    command TEXT,
+    started REAL,
+    exit_status INTEGER
+);
+CREATE TABLE IF NOT EXISTS lines (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    severity TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lines_ts ON lines (ts);
+CREATE INDEX IF NOT EXISTS lines_severity_ts ON lines (severity, ts);
+CREATE INDEX IF NOT EXISTS lines_run ON lines (run_id);
+CREATE INDEX IF NOT EXISTS runs_device_command ON runs (device, command);
+"""
+
+
+def line_severity(line):
+    """Level token of a log line ('CRIT', 'ERR', ...) or None."""
+    match = _SEVERITY_RE.search(line)
+    if not match:
+        return None
+    level = match.group(1)
+    return _SEVERITY_ALIASES.get(level, level)
+
+
+def parse_time(value):
+    """
+    Parse a time filter: epoch seconds, 'YYYY-MM-DD[ HH:MM[:SS]]', or a relative
+    age such as '90s', '15m', '2h' or '7d' (meaning that long ago).
+    """
+    if value is None or isinstance(value, (int, float)):
+        return value
+    value = value.strip()
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smhd])', value)
+    if match:
+        seconds = float(match.group(1)) * {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[match.group(2)]
+        return time.time() - seconds
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    return float(value)
+
+
+class LogStore:
+    """
+    Indexed SQLite store of captured command output.
+
+    Every captured line is stored with its device, command, run id and time, and
+    indexed by time and severity; the text goes into an FTS5 full-text index
+    (plain LIKE scans are used if this SQLite build has no FTS5). Recording is
+    asynchronous: record_run() only queues the lines and a background thread
+    inserts them in batched transactions, so capturing output never waits on
+    the disk.
+
+    Usage:
+        store = LogStore('logs/log_store.db')
+        store.record_run('unit01', 'cat gain.log', lines, exit_status=0)
+        store.search(severity='CRIT', since='7d')
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        try:
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts "
+                         "USING fts5(text, content='lines', content_rowid='id')")
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False
+        conn.commit()
+        conn.close()
+
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="LogStore", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def record_run(self, device, command, lines, started=None, exit_status=None, timestamps=None,
+                   run_id=None):
+        """
+        Queue one command run and its output lines for insertion.
+
+        Args:
+            device (str): Device name (config section / port).
+            command (str): Command that produced the output.
+            lines (list): Output lines.
+            started (float): Start time (epoch seconds, default now).
+            exit_status (int): Exit status if known.
+            timestamps (list): Optional per-line times; default is `started`.
+            run_id (str): Id returned by an earlier call: append these lines to
+                that run (and update its exit status) instead of starting a new one.
+
+        Returns:
+            str: The run id.
+        """
+        run_id = run_id or uuid.uuid4().hex
+        started = time.time() if started is None else started
+        self._queue.put((run_id, device, command, started, exit_status, list(lines), timestamps))
+        return run_id
+
+    def flush(self, timeout=10):
+        """Block until everything queued so far is committed."""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+    def _run(self):
+        conn = self._connect()
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            runs, waiters = [], []
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    runs.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if runs:
+                try:
+                    self._insert(conn, runs)
+                except sqlite3.Error as e:
+                    print(f"Error writing log store {self.db_path}: {e}")
+            for waiter in waiters:
+                waiter.set()
+        conn.close()
+
+    def _insert(self, conn, runs):
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)",
+                             [run[:5] for run in runs])
+            for run_id, _, _, started, _, lines, timestamps in runs:
+                if not lines:
+                    continue
+                stamps = timestamps or [started] * len(lines)
+                cursor = conn.execute("SELECT COALESCE(MAX(id), 0) FROM lines")
+                first_id = cursor.fetchone()[0] + 1
+                rows = [(first_id + i, run_id, ts, line_severity(line), line)
+                        for i, (ts, line) in enumerate(zip(stamps, lines))]
+                conn.executemany("INSERT INTO lines VALUES (?, ?, ?, ?, ?)", rows)
+                if self.has_fts:
+                    conn.executemany("INSERT INTO lines_fts (rowid, text) VALUES (?, ?)",
+                                     [(row[0], row[4]) for row in rows])
+
+    def search(self, text=None, severity=None, device=None, command=None, since=None, until=None,
+               limit=100):
+        """
+        Find stored lines, newest first.
+
+        Args:
+            text (str): Phrase to search for (full-text; substring without FTS5).
+            severity (str or list): Level token(s), e.g. 'CRIT' or ['CRIT', 'ERR'].
+            device (str): Device name.
+            command (str): Exact command.
+            since, until: Time bounds (see parse_time()).
+            limit (int): Maximum number of rows.
+
+        Returns:
+            list: dicts with ts, device, command, run_id, exit_status, severity, text.
+        """
+        clauses, params = [], []
+        source = "lines JOIN runs ON runs.run_id = lines.run_id"
+        if text:
+            if self.has_fts:
+                source = ("lines_fts JOIN lines ON lines.id = lines_fts.rowid "
+                          "JOIN runs ON runs.run_id = lines.run_id")
+                clauses.append("lines_fts MATCH ?")
+                params.append('"' + text.replace('"', '""') + '"')
+            else:
+                clauses.append("lines.text LIKE ? ESCAPE '\\'")
+                params.append('%' + re.sub(r'([%_\\])', r'\\\1', text) + '%')
+        if severity:
+            levels = [severity] if isinstance(severity, str) else list(severity)
+            levels = [_SEVERITY_ALIASES.get(level.upper(), level.upper()) for level in levels]
+            clauses.append(f"lines.severity IN ({', '.join('?' * len(levels))})")
+            params.extend(levels)
+        if device:
+            clauses.append("runs.device = ?")
+            params.append(device)
+        if command:
+            clauses.append("runs.command = ?")
+            params.append(command)
+        if since is not None:
+            clauses.append("lines.ts >= ?")
+            params.append(parse_time(since))
+        if until is not None:
+            clauses.append("lines.ts <= ?")
+            params.append(parse_time(until))
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = (f"SELECT lines.ts, runs.device, runs.command, lines.run_id, runs.exit_status, "
+                 f"lines.severity, lines.text FROM {source} {where} "
+                 f"ORDER BY lines.ts DESC, lines.id DESC LIMIT ?")
+        params.append(limit)
+        conn = self._connect()
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+        keys = ('ts', 'device', 'command', 'run_id', 'exit_status', 'severity', 'text')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def ingest_file(self, file_path, device=None):
+        """
+        Import an existing flat command log (logs/<command>.log).
+
+        Each "[*] Sending command: ..." line starts a new run; line times come
+        from the log prefix.
+
+        Returns:
+            int: Number of runs queued.
+        """
+        runs = 0
+        command, started, lines, stamps, exit_status = None, None, [], [], None
+
+        def finish():
+            nonlocal runs
+            if command is not None:
+                self.record_run(device, command, lines, started=started, exit_status=exit_status,
+                                timestamps=stamps)
+                runs += 1
+
+        stamp_cache = {}
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            for raw in f:
+                match = _LOG_LINE_RE.match(raw.rstrip('\n'))
+                if not match:
+                    continue
+                stamp, message = match.groups()
+                ts = stamp_cache.get(stamp)
+                if ts is None:
+                    ts = stamp_cache[stamp] = datetime.strptime(stamp, '%Y-%m-%d %H:%M:%S').timestamp()
+                if message.startswith(_SEND_PREFIX):
+                    finish()
+                    command, started, lines, stamps, exit_status = message[len(_SEND_PREFIX):], ts, [], [], None
+                elif message.startswith(_EXIT_PREFIX):
+                    status = message[len(_EXIT_PREFIX):]
+                    exit_status = int(status) if status.lstrip('-').isdigit() else None
+                elif command is not None:
+                    lines.append(message)
+                    stamps.append(ts)
+        finish()
+        return runs
+
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'logs', 'log_store.db')
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def log_store_path(config_file='config.ini'):
+    """Database path of the log store: [LogStore] path from the config, else DEFAULT_DB_PATH."""
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    if config.has_section('LogStore'):
+        return config['LogStore'].get('path', DEFAULT_DB_PATH)
+    return DEFAULT_DB_PATH
+
+
+def get_log_store(config_file='config.ini'):
+    """
+    Return the process-wide LogStore if enabled in the config, else None.
+
+    Enabled with an optional [LogStore] section:
+        [LogStore]
+        enabled = true
+        path = logs/log_store.db   (default: log_store.db in the project's logs folder)
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            config = configparser.ConfigParser()
+            config.read(config_file)
+            if not (config.has_section('LogStore') and config['LogStore'].getboolean('enabled', False)):
+                return None
+            _default_store = LogStore(log_store_path(config_file))
+            atexit.register(_default_store.close)
+        return _default_store
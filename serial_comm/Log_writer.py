@@ -0,0 +1,222 @@
+import atexit
+import collections
+import configparser
+import gzip
+import os
+import queue
+import shutil
+import threading
+import time
+
+from serial_comm.Metrics import get_metrics
+
+
+class CommandLogWriter:
+    """
+    Shared, buffered writer for the per-command log files.
+
+    Callers only enqueue text; one background thread drains the queue in
+    batches, keeps a single open handle per log file (least recently used
+    handles are closed beyond `max_open_files`), and flushes once per batch
+    instead of once per line. Files are rotated when they exceed `max_bytes`
+    (UTF-8 encoded size) or the file is older than `max_age` seconds, keeping
+    `backup_count` old copies (<name>.1, <name>.2, ... or <name>.1.gz ... with
+    `compress`). The age is the file's, not the open handle's: an existing
+    file counts from its creation time where the platform records one (its
+    last change otherwise), a file started here from its rotation.
+
+    Lines keep the format of the logging-based setup this replaces:
+        2025-07-02 00:49:21 - INFO - message
+    """
+
+    def __init__(self, max_bytes=10 * 1024 * 1024, max_age=None, backup_count=5, compress=False,
+                 flush_interval=0.5, max_open_files=64, metrics=None):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backup_count = backup_count
+        self.compress = compress
+        self.flush_interval = flush_interval
+        self.max_open_files = max_open_files
+
+        self._queue = queue.SimpleQueue()
+        # filename -> [file object, size in bytes, file created at]
+        self._files = collections.OrderedDict()
+        self._stamp_second = None
+        self._stamp = ''
+        self._closed = False
+        metrics = metrics if metrics is not None else get_metrics()
+        self._write_time = metrics.histogram('log_write_seconds', "Time spent writing one batch of log lines")
+        self._bytes_logged = metrics.counter('log_bytes_written_total', "Bytes written to command logs")
+        self._thread = threading.Thread(target=self._run, name="CommandLogWriter", daemon=True)
+        self._thread.start()
+
+    def _timestamp(self):
+        now = int(time.time())
+        if now != self._stamp_second:
+            self._stamp_second = now
+            self._stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))
+        return self._stamp
+
+    def write(self, filename, message, level='INFO'):
+        """Queue one log line for `filename`."""
+        self._queue.put((filename, f"{self._timestamp()} - {level} - {message}\n"))
+
+    def write_lines(self, filename, messages, level='INFO'):
+        """Queue several log lines for `filename` as one block."""
+        prefix = f"{self._timestamp()} - {level} - "
+        self._queue.put((filename, ''.join(f"{prefix}{message}\n" for message in messages)))
+
+    def flush(self, timeout=5):
+        """Block until everything queued so far is on disk."""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put((None, done))
+        return done.wait(timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            pending = collections.defaultdict(list)
+            waiters = []
+            stop = False
+            while item is not None or not stop:
+                if item is None:
+                    stop = True
+                elif item[0] is None:
+                    waiters.append(item[1])
+                else:
+                    pending[item[0]].append(item[1])
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            started = time.perf_counter()
+            for filename, chunks in pending.items():
+                data = ''.join(chunks).encode('utf-8')
+                try:
+                    self._write_file(filename, data)
+                    self._bytes_logged.inc(len(data))
+                except OSError as e:
+                    print(f"Error writing log file {filename}: {e}")
+                except Exception as e:
+                    # Never let one bad file or rotation stop the writer thread
+                    print(f"Unexpected error writing log file {filename}: {type(e).__name__}: {e}")
+            for filename, entry in list(self._files.items()):
+                try:
+                    entry[0].flush()
+                except Exception as e:
+                    print(f"Error flushing log file {filename}: {e}")
+            if pending:
+                self._write_time.observe(time.perf_counter() - started)
+            for waiter in waiters:
+                waiter.set()
+
+            if stop:
+                for filename, entry in self._files.items():
+                    try:
+                        entry[0].close()
+                    except Exception as e:
+                        print(f"Error closing log file {filename}: {e}")
+                self._files.clear()
+                return
+
+    def _write_file(self, filename, data):
+        entry = self._files.get(filename)
+        if entry is None:
+            entry = self._open(filename)
+        else:
+            self._files.move_to_end(filename)
+        if self.max_age is not None and entry[1] and time.time() - entry[2] > self.max_age:
+            self._rotate(filename)
+            entry = self._open(filename)
+
+        entry[0].write(data)
+        entry[1] += len(data)
+        if self.max_bytes and entry[1] >= self.max_bytes:
+            self._rotate(filename)
+
+    def _open(self, filename):
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        f = open(filename, 'ab')
+        info = os.fstat(f.fileno())
+        if info.st_size:
+            # st_birthtime where the platform has it; the last change otherwise
+            created = getattr(info, 'st_birthtime', info.st_mtime)
+        else:
+            created = time.time()
+        entry = [f, info.st_size, created]
+        self._files[filename] = entry
+        while len(self._files) > self.max_open_files:
+            _, (old_file, _, _) = self._files.popitem(last=False)
+            old_file.close()
+        return entry
+
+    def _rotate(self, filename):
+        entry = self._files.pop(filename, None)
+        if entry is not None:
+            entry[0].close()
+        if not self.backup_count:
+            open(filename, 'w').close()
+            return
+
+        suffix = '.gz' if self.compress else ''
+        oldest = f"{filename}.{self.backup_count}{suffix}"
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{filename}.{i}{suffix}"
+            if os.path.exists(src):
+                os.replace(src, f"{filename}.{i + 1}{suffix}")
+        if not os.path.exists(filename):
+            return
+        if self.compress:
+            with open(filename, 'rb') as src, gzip.open(f"{filename}.1.gz", 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(filename)
+        else:
+            os.replace(filename, f"{filename}.1")
+
+
+_default_writer = None
+_default_writer_lock = threading.Lock()
+
+
+def get_log_writer(config_file='config.ini'):
+    """
+    Return the process-wide CommandLogWriter, creating it on first use.
+
+    Rotation settings come from an optional [Logging] section of the config file
+    (max_bytes, max_age_hours, backup_count, compress).
+    """
+    global _default_writer
+    with _default_writer_lock:
+        if _default_writer is None:
+            options = {}
+            config = configparser.ConfigParser()
+            config.read(config_file)
+            if config.has_section('Logging'):
+                section = config['Logging']
+                if 'max_bytes' in section:
+                    options['max_bytes'] = section.getint('max_bytes')
+                if 'max_age_hours' in section:
+                    options['max_age'] = section.getfloat('max_age_hours') * 3600
+                if 'backup_count' in section:
+                    options['backup_count'] = section.getint('backup_count')
+                if 'compress' in section:
+                    options['compress'] = section.getboolean('compress')
+            _default_writer = CommandLogWriter(**options)
+            atexit.register(_default_writer.close)
+        return _default_writer
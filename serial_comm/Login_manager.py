@@ -1,23 +1,161 @@
 import time
-import keyring
+
+from serial_comm.Prompt_matcher import PromptMatcher
+from serial_comm.Credentials import (DEFAULT_SERVICE, CachingCredentials, KeyringCredentials, device_keys,
+                                     get_credential_provider)
+
+
+class ConsoleProbe:
+    """
+    Sans-IO probe: send a bare newline and see what the device answers with.
+
+    `answer` ends up 'shell' if a shell prompt came back, 'login' if a
+    login/password prompt came back, None if nothing recognisable arrived
+    within `timeout` seconds. A prompt line that is not valid UTF-8 (the line
+    noise of a baud rate mismatch) counts as nothing recognisable.
+    """
+
+    def __init__(self, timeout, now, prompt_pattern=None):
+        self.answer = None
+        self._matcher = PromptMatcher(prompt_pattern)
+        self._received = bytearray()
+        self._pending = '\n'
+        self._end_time = now + timeout
+
+    def take_writes(self, now):
+        data, self._pending = self._pending, ''
+        return data
+
+    def read_timeout(self, now):
+        if self.answer is not None or now >= self._end_time:
+            return None
+        return self._end_time - now
+
+    def feed(self, data, now):
+        if not data:
+            return []
+        received = self._received
+        received += data
+        self._matcher.feed(data)
+        if LoginManager._login_action(self._matcher.partial):
+            answer = 'login'
+        elif self._matcher.at_prompt():
+            answer = 'shell'
+        else:
+            return []
+        try:
+            received[received.rfind(b'\n') + 1:].decode('utf-8')
+        except UnicodeDecodeError:
+            return []
+        self.answer = answer
+        return []
+
+    def close(self):
+        return ''
+
+
+class LoginDialog:
+    """
+    Sans-IO login exchange: answers the login and password prompts with the
+    credentials until a shell prompt appears or `timeout` runs out.
+
+    feed() returns the messages for the login log (device lines and the
+    answers given, the password masked); `logged_in` tells the outcome.
+    """
+
+    def __init__(self, login_id, password, timeout, now, prompt_pattern=None):
+        self.login_id = login_id
+        self.password = password
+        self.logged_in = False
+        self._matcher = PromptMatcher(prompt_pattern)
+        self._pending = '\n'
+        self._end_time = now + timeout
+
+    def take_writes(self, now):
+        data, self._pending = self._pending, ''
+        return data
+
+    def read_timeout(self, now):
+        if self.logged_in or now >= self._end_time:
+            return None
+        return self._end_time - now
+
+    def feed(self, data, now):
+        if not data:
+            return []
+        matcher = self._matcher
+        messages = [line for line in matcher.feed(data) if line]
+        # Login and password prompts have no trailing newline, so they are
+        # matched against the unterminated tail as soon as they arrive.
+        action = LoginManager._login_action(matcher.partial)
+        if action == 'login':
+            messages.append(matcher.flush())
+            self._pending += self.login_id + '\n'
+            messages.append(f"> {self.login_id}")
+        elif action == 'password':
+            messages.append(matcher.flush())
+            self._pending += self.password + '\n'
+            messages.append("> [password entered]")
+        elif matcher.at_prompt():
+            messages.append(matcher.flush())
+            messages.append("[*] Login successful!")
+            self.logged_in = True
+        return messages
+
+    def close(self):
+        return ''
+
+
+def probe_console(serial_comm, timeout=0.5, prompt_pattern=None):
+    """
+    Send a bare newline and see what the device answers with (see ConsoleProbe).
+
+    Returns:
+        str or None: 'shell', 'login' or None.
+    """
+    probe = ConsoleProbe(timeout, time.time(), prompt_pattern)
+    for _ in serial_comm.exchange(probe):
+        pass
+    return probe.answer
+
 
 class LoginManager:
-    def __init__(self, serial_comm, service_name='serial_device'):
+    def __init__(self, serial_comm, service_name=DEFAULT_SERVICE, prompt_pattern=None, credentials=None,
+                 device=None):
         self.serial_comm = serial_comm
         self.service_name = service_name
+        self.prompt_pattern = prompt_pattern
+        # Where credentials come from (default: the shared, cached provider from config.ini)
+        if credentials is None:
+            if service_name == DEFAULT_SERVICE:
+                credentials = get_credential_provider()
+            else:
+                credentials = CachingCredentials(KeyringCredentials(service_name))
+        self.credentials = credentials
+        # Name used for a per-device login, tried before the port and the default login
+        self.device = device
         self.login_id = None
         self.password = None
         self.logged_in = False
         self._load_credentials()
 
+    def credential_keys(self):
+        """Keys this device's login is looked up under, most specific first."""
+        return device_keys(self.device, getattr(getattr(self.serial_comm, 'ser', None), 'port', None))
+
     def _load_credentials(self):
-        self.login_id = keyring.get_password(self.service_name, 'login_id')
-        self.password = keyring.get_password(self.service_name, 'password')
+        found = self.credentials.lookup(self.credential_keys())
+        self.login_id, self.password = found if found is not None else (None, None)
+
+    def set_credentials(self, login_id, password, key=None):
+        """
+        Store credentials with the credential provider and use them from now on.
 
-    def set_credentials(self, login_id, password):
-        """Store credentials securely in keyring and update internal state."""
-        keyring.set_password(self.service_name, 'login_id', login_id)
-        keyring.set_password(self.service_name, 'password', password)
+        Args:
+            key: Device key (name, port or serial number) the login belongs to;
+                None stores the default login shared by all devices.
+        """
+        self.credentials.set(key, login_id, password)
         self.login_id = login_id
         self.password = password
 
@@ -25,47 +163,78 @@ class LoginManager:
         """Return True if login was successful previously, else False."""
         return self.logged_in
 
-    def login_sequence(self, timeout=15, output_callback=None):
-        """Perform login using stored credentials, no arguments needed."""
+    def probe_session(self, timeout=0.5):
+        """
+        Send a bare newline and see what the device answers with.
+
+        Returns:
+            str or None: 'shell' if a shell prompt came back (still logged in),
+            'login' if a login/password prompt came back, None if nothing
+            recognisable arrived within `timeout` seconds.
+        """
+        return probe_console(self.serial_comm, timeout, self.prompt_pattern)
+
+    def ensure_logged_in(self, timeout=15, output_callback=None, probe_timeout=0.5):
+        """
+        Make sure the device has a logged-in shell, logging in only if needed.
+
+        A cheap prompt probe comes first; the full login exchange only runs when
+        the shell prompt is gone (reboot, serial reset, logout).
+
+        Returns:
+            bool: True if a shell prompt is available.
+        """
+        if self.probe_session(probe_timeout) == 'shell':
+            self.logged_in = True
+            return True
+        self.logged_in = False
+        return self.login_sequence(timeout=timeout, output_callback=output_callback)
+
+    @staticmethod
+    def _login_action(tail):
+        """Return 'login', 'password' or None for the current unterminated output tail."""
+        tail = tail.lower()
+        if 'login:' in tail or 'username:' in tail:
+            return 'login'
+        if 'password:' in tail:
+            return 'password'
+        return None
+
+    @staticmethod
+    def _login_log(output_callback):
         def log(msg):
             if output_callback:
                 output_callback(msg)
             else:
                 print(msg)
+        return log
 
+    def _login_dialog(self, timeout, log):
+        """The LoginDialog to run, or None (after logging why) without credentials."""
+        self.logged_in = False
         if not self.login_id or not self.password:
-            log("[Error] Login credentials not set in keyring.")
-            self.logged_in = False
-            return False
-
+            log("[Error] Login credentials not set.")
+            return None
         log("[*] Starting login sequence...")
-        try:
-            self.serial_comm.write('\n')
-            time.sleep(0.5)
-            end_time = time.time() + timeout
-
-            while time.time() < end_time:
-                line = self.serial_comm.read_line()
-                if line:
-                    log(line)
-                    if 'login:' in line.lower() or 'username:' in line.lower():
-                        self.serial_comm.write(self.login_id + '\n')
-                        log(f"> {self.login_id}")
-                        time.sleep(0.5)
-                    elif 'password:' in line.lower():
-                        self.serial_comm.write(self.password + '\n')
-                        log("> [password entered]")
-                        time.sleep(1)
-                    elif any(prompt in line for prompt in ['$', '#', '>']):
-                        log("[*] Login successful!")
-                        self.logged_in = True
-                        return True
-                else:
-                    time.sleep(0.1)
+        return LoginDialog(self.login_id, self.password, timeout, time.time(), self.prompt_pattern)
+
+    def _login_finished(self, dialog, log):
+        if not dialog.logged_in:
             log("[!] Login timed out or failed.")
-            self.logged_in = False
+        self.logged_in = dialog.logged_in
+        return self.logged_in
+
+    def login_sequence(self, timeout=15, output_callback=None):
+        """Perform login using stored credentials, no arguments needed."""
+        log = self._login_log(output_callback)
+        dialog = self._login_dialog(timeout, log)
+        if dialog is None:
             return False
+        try:
+            for msg in self.serial_comm.exchange(dialog):
+                log(msg)
         except Exception as e:
             log(f"[Error during login]: {e}")
             self.logged_in = False
             return False
+        return self._login_finished(dialog, log)
@@ -0,0 +1,274 @@
+import atexit
+import bisect
+import collections
+import configparser
+import json
+import os
+import threading
+import time
+
+# Upper bounds (seconds) of the default histogram buckets
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_value(value):
+    # Prometheus text format: backslash, double quote and newline are escaped
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(labels):
+    return ','.join(f'{key}="{_label_value(value)}"' for key, value in labels)
+
+
+class Counter:
+    """Monotonic counter; inc() is a locked add, cheap enough for per-chunk use."""
+
+    __slots__ = ('name', 'labels', 'value', '_lock')
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations (seconds) with count and sum."""
+
+    __slots__ = ('name', 'labels', 'bounds', 'counts', 'count', 'sum', '_lock')
+
+    def __init__(self, name, labels, bounds=DEFAULT_BUCKETS):
+        self.name = name
+        self.labels = labels
+        self.bounds = tuple(bounds)
+        # One slot per bound plus the +Inf bucket
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        slot = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[slot] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None if empty)."""
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for slot, count in enumerate(counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[slot] if slot < len(self.bounds) else float('inf')
+        return float('inf')
+
+    def cumulative(self):
+        with self._lock:
+            counts = list(self.counts)
+        running, out = 0, []
+        for count in counts:
+            running += count
+            out.append(running)
+        return out
+
+
+class Metrics:
+    """
+    In-process registry of counters and duration histograms.
+
+    Metrics are identified by name plus labels (e.g. port='COM7'); counter()
+    and histogram() return the same object for the same key, so hot paths
+    look a metric up once and keep the reference. snapshot() gives a JSON
+    view, to_prometheus() the Prometheus text format, and start_dump()
+    rewrites either into a file every few seconds (e.g. for the node-exporter
+    textfile collector).
+
+    With tracing enabled, span() also keeps each finished span (name, start,
+    duration, attributes) in a bounded in-memory list and, if `trace_path` is
+    set, appends it as one JSON line to that file.
+    """
+
+    def __init__(self, trace=False, trace_path=None, max_spans=1000):
+        self.trace = trace or trace_path is not None
+        self.trace_path = trace_path
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+        self._spans = collections.deque(maxlen=max_spans)
+        self._trace_file = None
+        self._dump_thread = None
+        self._dump_stop = threading.Event()
+
+    def counter(self, name, help_text='', **labels):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._counters.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._counters.setdefault(key, Counter(name, key[1]))
+                self._help.setdefault(name, help_text)
+        return metric
+
+    def histogram(self, name, help_text='', buckets=DEFAULT_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._histograms.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._histograms.setdefault(key, Histogram(name, key[1], buckets))
+                self._help.setdefault(name, help_text)
+        return metric
+
+    def span(self, name, started, duration, **attributes):
+        """Record a finished trace span (no-op unless tracing is enabled)."""
+        if not self.trace:
+            return
+        record = {'name': name, 'start': started, 'duration': duration}
+        record.update(attributes)
+        with self._lock:
+            self._spans.append(record)
+            if self.trace_path is not None:
+                try:
+                    if self._trace_file is None:
+                        os.makedirs(os.path.dirname(os.path.abspath(self.trace_path)), exist_ok=True)
+                        self._trace_file = open(self.trace_path, 'a', encoding='utf-8')
+                    self._trace_file.write(json.dumps(record) + '\n')
+                    self._trace_file.flush()
+                except OSError as e:
+                    print(f"Error writing trace file {self.trace_path}: {e}")
+                    self.trace_path = None
+
+    def recent_spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    def snapshot(self):
+        """JSON-friendly view of every metric."""
+        with self._lock:
+            counters = list(self._counters.values())
+            histograms = list(self._histograms.values())
+        out = {'time': time.time(), 'counters': {}, 'histograms': {}}
+        for metric in counters:
+            out['counters'].setdefault(metric.name, []).append(
+                {'labels': dict(metric.labels), 'value': metric.value})
+        for metric in histograms:
+            out['histograms'].setdefault(metric.name, []).append({
+                'labels': dict(metric.labels),
+                'count': metric.count,
+                'sum': metric.sum,
+                'p50': metric.quantile(0.5),
+                'p99': metric.quantile(0.99),
+            })
+        return out
+
+    def to_prometheus(self):
+        """Prometheus text exposition format."""
+        with self._lock:
+            counters = sorted(self._counters.values(), key=lambda m: (m.name, m.labels))
+            histograms = sorted(self._histograms.values(), key=lambda m: (m.name, m.labels))
+        lines = []
+        last = None
+        for metric in counters:
+            if metric.name != last:
+                last = metric.name
+                lines.append(f"# HELP {metric.name} {self._help.get(metric.name, '')}")
+                lines.append(f"# TYPE {metric.name} counter")
+            labels = _label_text(metric.labels)
+            lines.append(f"{metric.name}{{{labels}}} {metric.value}" if labels else f"{metric.name} {metric.value}")
+        for metric in histograms:
+            if metric.name != last:
+                last = metric.name
+                lines.append(f"# HELP {metric.name} {self._help.get(metric.name, '')}")
+                lines.append(f"# TYPE {metric.name} histogram")
+            labels = _label_text(metric.labels)
+            prefix = labels + ',' if labels else ''
+            for bound, count in zip(metric.bounds + ('+Inf',), metric.cumulative()):
+                lines.append(f'{metric.name}_bucket{{{prefix}le="{bound}"}} {count}')
+            suffix = f"{{{labels}}}" if labels else ''
+            lines.append(f"{metric.name}_sum{suffix} {metric.sum}")
+            lines.append(f"{metric.name}_count{suffix} {metric.count}")
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path, fmt=None):
+        """Write the metrics to `path` atomically ('json' or 'prometheus'; default from the extension)."""
+        if fmt is None:
+            fmt = 'json' if path.endswith('.json') else 'prometheus'
+        text = json.dumps(self.snapshot(), indent=2) if fmt == 'json' else self.to_prometheus()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+
+    def start_dump(self, path, interval=10.0, fmt=None):
+        """Rewrite `path` every `interval` seconds from a background thread."""
+        self.stop_dump()
+        self._dump_stop.clear()
+
+        def run():
+            while True:
+                stopping = self._dump_stop.wait(interval)
+                try:
+                    self.dump(path, fmt)
+                except OSError as e:
+                    print(f"Error writing metrics file {path}: {e}")
+                if stopping:
+                    break
+
+        self._dump_thread = threading.Thread(target=run, name="MetricsDump", daemon=True)
+        self._dump_thread.start()
+
+    def stop_dump(self):
+        if self._dump_thread is not None:
+            self._dump_stop.set()
+            self._dump_thread.join(timeout=5)
+            self._dump_thread = None
+
+    def close(self):
+        self.stop_dump()
+        with self._lock:
+            if self._trace_file is not None:
+                self._trace_file.close()
+                self._trace_file = None
+
+
+_default_metrics = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_metrics(config_file='config.ini'):
+    """
+    Return the process-wide Metrics registry.
+
+    Dumping and tracing are configured with an optional [Metrics] section:
+        [Metrics]
+        dump_path = logs/metrics.prom   (.json for the JSON snapshot)
+        dump_interval = 10
+        trace = false
+        trace_path = logs/trace.jsonl
+    """
+    global _default_metrics
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            config = configparser.ConfigParser()
+            config.read(config_file)
+            section = config['Metrics'] if config.has_section('Metrics') else {}
+            trace_path = section.get('trace_path') or None
+            trace = config.getboolean('Metrics', 'trace', fallback=False) if section else False
+            _default_metrics = Metrics(trace=trace, trace_path=trace_path)
+            dump_path = section.get('dump_path') if section else None
+            if dump_path:
+                interval = float(section.get('dump_interval', 10))
+                _default_metrics.start_dump(dump_path, interval)
+            atexit.register(_default_metrics.close)
+        return _default_metrics
@@ -0,0 +1,126 @@
+import codecs
+import re
+
+# A shell prompt is the tail of the stream ending in $, # or > (optionally
+# followed by the space most shells print after it), with no newline after it.
+DEFAULT_PROMPT_PATTERN = r'[$#>] ?$'
+
+# Quiet time after a prompt-like tail before it counts as the prompt. It must
+# cover at least one USB-serial latency period (16 ms on FTDI by default), or
+# output such as "a -> b" split after the '>' ends a capture early.
+DEFAULT_PROMPT_SETTLE = 0.03
+
+
+def prompt_pattern_from_chars(prompt_chars):
+    """Build a tail regex equivalent to the legacy prompt_chars list."""
+    return '[' + ''.join(re.escape(c) for c in prompt_chars) + r']\s*$'
+
+
+class PromptMatcher:
+    """
+    Streaming line splitter and prompt detector for raw serial chunks.
+
+    Chunks are decoded incrementally and split into complete lines; whatever
+    follows the last newline is kept as the partial tail, which is where a
+    prompt (which has no trailing newline) shows up. Callers feed every chunk
+    they read and check at_prompt() instead of waiting for a read timeout.
+
+    Lines lose their line ending and trailing whitespace only; leading
+    whitespace (indentation, column alignment) is kept.
+    """
+
+    def __init__(self, pattern=None):
+        if pattern is None:
+            pattern = DEFAULT_PROMPT_PATTERN
+        self.regex = re.compile(pattern) if isinstance(pattern, str) else pattern
+        self.partial = ''
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+
+    def feed(self, data):
+        """
+        Add a chunk (bytes or str).
+
+        Returns:
+            list: Complete lines received so far, right-stripped like read_line().
+        """
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = self._decoder.decode(data)
+        if '\n' not in data:
+            self.partial += data
+            return []
+        lines = (self.partial + data).split('\n')
+        self.partial = lines.pop()
+        return [line.rstrip() for line in lines]
+
+    def at_prompt(self):
+        """True if the partial tail currently looks like a prompt."""
+        return bool(self.partial) and self.regex.search(self.partial) is not None
+
+    def flush(self):
+        """Return and clear the partial tail (right-stripped)."""
+        partial = self.partial.rstrip()
+        self.partial = ''
+        return partial
+
+
+class PromptCapture:
+    """
+    Sans-IO capture of one command's output up to the shell prompt, as used
+    by run_command(); the transports' exchange() loops move the bytes.
+
+    The command is written first; every received chunk goes to feed(), which
+    returns the new non-empty lines. The capture ends once the prompt has been
+    the tail of the stream for `settle` seconds without more data (so a chunk
+    that happens to end in '$', '#' or '>' mid-line is not mistaken for it),
+    or when `timeout` runs out. The first line is the echo of the command
+    itself, so a prompt character in it does not count.
+    """
+
+    def __init__(self, command, timeout, pattern=None, settle=DEFAULT_PROMPT_SETTLE, now=0.0):
+        self.matcher = PromptMatcher(pattern)
+        self.settle = settle
+        self.lines = []
+        self.prompt_seen = False
+        self._pending = command + '\n'
+        self._end_time = now + timeout
+        self._settle_until = None
+        self._seen_line = False
+        self._done = False
+
+    def take_writes(self, now):
+        data, self._pending = self._pending, ''
+        return data
+
+    def read_timeout(self, now):
+        if self._done:
+            return None
+        if self._settle_until is not None and now >= self._settle_until:
+            self.prompt_seen = True
+            self._done = True
+            return None
+        if now >= self._end_time and self._settle_until is None:
+            self._done = True
+            return None
+        return (self._settle_until or self._end_time) - now
+
+    def feed(self, data, now):
+        if not data:
+            return []
+        new_lines = []
+        for line in self.matcher.feed(data):
+            self._seen_line = True
+            if line:
+                new_lines.append(line)
+        self.lines.extend(new_lines)
+        self._settle_until = now + self.settle if self._seen_line and self.matcher.at_prompt() else None
+        return new_lines
+
+    def close(self):
+        return ''
+
+    def flush(self):
+        """Add the prompt line left at the tail to the output and return it ('' if none)."""
+        prompt = self.matcher.flush()
+        if prompt:
+            self.lines.append(prompt)
+        return prompt
@@ -0,0 +1,196 @@
+import base64
+import binascii
+import gzip
+import json
+import os
+import shlex
+import time
+import zlib
+
+from serial_comm.File_transfer import probe_command, parse_probe
+
+_HEADER = 'follow:'
+
+
+class _RemoteFile:
+    """Pull state of one device file: inode, byte offset and unterminated last line."""
+
+    def __init__(self, path, mirror_path, inode=None, offset=None):
+        self.path = path
+        self.mirror_path = mirror_path
+        self.inode = inode
+        # None until the first poll; bytes before offset have been pulled (or skipped)
+        self.offset = offset
+        self.partial = b''
+
+    def command(self, from_start, max_bytes, compress):
+        """
+        One shell line that prints "follow: <inode> <size> <start>" and then the
+        bytes from <start> (at most max_bytes, never past the size just read) as
+        base64. <start> falls back to 0 when the inode changed or the file shrank.
+        """
+        path = shlex.quote(self.path)
+        if self.offset is None:
+            # Unknown file: either take it from the top or only note where it ends
+            offset, limit = 0, (max_bytes if from_start else 0)
+            inode = '-'
+        else:
+            offset, limit, inode = self.offset, max_bytes, self.inode
+        encode = 'gzip -c | base64' if compress else 'base64'
+        return (f"set -- $(stat -c '%i %s' {path} 2>/dev/null); s={offset}; "
+                f"[ \"$1\" = \"{inode}\" ] && [ \"${{2:-0}}\" -ge $s ] || s=0; "
+                f"echo \"{_HEADER} ${{1:--}} ${{2:-0}} $s\"; n=$((${{2:-0}}-s)); "
+                f"[ $n -gt {limit} ] && n={limit}; "
+                f"[ $n -gt 0 ] && tail -c +$((s+1)) {path} | head -c $n | {encode}; true")
+
+    def to_state(self):
+        return {'inode': self.inode, 'offset': self.offset}
+
+
+class RemoteFollower:
+    """
+    Mirror growing files on the device incrementally over the serial console.
+
+    For every followed file the inode and the number of bytes already pulled
+    are remembered (and saved in a JSON state file, so a restart carries on
+    where it stopped). Each poll runs one pipelined batch with a command per
+    file that checks the file's inode and size and sends only the bytes past
+    the saved offset (`tail -c +offset | head -c n`, base64 encoded and gzipped
+    when the device has gzip). New bytes are appended to a local mirror of the
+    file, so serial traffic grows with the new data, not with the file.
+
+    A changed inode or a smaller size (rotation or truncation) restarts at
+    offset 0 of the new file; whatever was appended to the old file after the
+    last poll is not recovered.
+
+    Usage:
+        follower = RemoteFollower(command_manager, ['/var/log/gain.log', '/var/log/messages'])
+        for path, line in follower.follow(interval=2):
+            ...
+    """
+
+    def __init__(self, command_manager, paths=(), mirror_dir=None, state_file=None, from_start=False,
+                 max_bytes_per_poll=1 << 20, timeout=None):
+        self.command_manager = command_manager
+        device = command_manager.device or 'device'
+        safe_device = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in str(device))
+        if mirror_dir is None:
+            mirror_dir = os.path.join(command_manager.logs_dir, 'mirror', safe_device)
+        self.mirror_dir = mirror_dir
+        self.state_file = state_file or os.path.join(mirror_dir, '.follow_state.json')
+        self.from_start = from_start
+        self.max_bytes_per_poll = max_bytes_per_poll
+        self.timeout = timeout
+        self.compress = None
+        self._files = {}
+        self._state = self._load_state()
+        for path in paths:
+            self.add(path)
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self):
+        """Write the inode/offset of every followed file (atomically)."""
+        self._state.update({path: remote.to_state() for path, remote in self._files.items()
+                            if remote.offset is not None})
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_file)), exist_ok=True)
+        temp_path = self.state_file + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._state, f, indent=2)
+        os.replace(temp_path, self.state_file)
+
+    def mirror_path(self, path):
+        """Local mirror of a device file: <mirror_dir>/<device path>."""
+        return os.path.join(self.mirror_dir, path.lstrip('/'))
+
+    def add(self, path):
+        if path in self._files:
+            return
+        saved = self._state.get(path, {})
+        self._files[path] = _RemoteFile(path, self.mirror_path(path), saved.get('inode'),
+                                        saved.get('offset'))
+
+    def remove(self, path):
+        self._files.pop(path, None)
+
+    def _block_timeout(self):
+        # Worst case: a full poll's worth of base64 text on the wire
+        return self.command_manager._transfer_timeout(self.max_bytes_per_poll * 1.4 + 256, self.timeout)
+
+    def poll(self):
+        """
+        Pull whatever was appended to the followed files since the last poll.
+
+        Returns:
+            list: (path, line) tuples for the new complete lines, in file order
+            per path. Every new byte is also appended to the file's mirror.
+        """
+        if not self._files:
+            return []
+        manager = self.command_manager
+        if self.compress is None:
+            tools, _ = parse_probe(manager.run_batch([probe_command()], log_output=False)[0].output)
+            self.compress = 'gzip' in tools
+
+        remotes = list(self._files.values())
+        commands = [remote.command(self.from_start, self.max_bytes_per_poll, self.compress)
+                    for remote in remotes]
+        results = manager.run_batch(commands, timeout=self._block_timeout(), log_output=False)
+        lines = []
+        for remote, result in zip(remotes, results):
+            lines.extend((remote.path, line) for line in self._apply(remote, result))
+        self.save_state()
+        return lines
+
+    def _apply(self, remote, result):
+        if result.timed_out or not result.output.startswith(_HEADER):
+            return []
+        header, _, payload = result.output.partition('\n')
+        fields = header[len(_HEADER):].split()
+        if len(fields) != 3 or fields[0] == '-':
+            # The file does not exist (yet); take it from the top once it appears
+            if remote.offset is None:
+                remote.inode, remote.offset = '-', 0
+            return []
+        inode, size, start = fields[0], int(fields[1]), int(fields[2])
+        try:
+            data = base64.b64decode(payload.replace('\n', ''), validate=True)
+            if self.compress and data:
+                data = gzip.decompress(data)
+        except (binascii.Error, OSError, EOFError, zlib.error):
+            # Corrupted on the way; the same bytes are requested again next poll
+            return []
+
+        if remote.offset is None and not self.from_start:
+            # First look at a file: start following at its current end
+            remote.inode, remote.offset = inode, size
+            return []
+        lines = []
+        if start == 0 and remote.offset:
+            # Rotated or truncated: the old file's unterminated last line is complete now
+            if remote.partial:
+                lines.append(remote.partial.rstrip(b'\r').decode('utf-8', errors='replace'))
+                remote.partial = b''
+        remote.inode, remote.offset = inode, start + len(data)
+        if not data:
+            return lines
+
+        os.makedirs(os.path.dirname(remote.mirror_path), exist_ok=True)
+        with open(remote.mirror_path, 'ab') as f:
+            f.write(data)
+        parts = (remote.partial + data).split(b'\n')
+        remote.partial = parts.pop()
+        lines.extend(part.rstrip(b'\r').decode('utf-8', errors='replace') for part in parts)
+        return lines
+
+    def follow(self, interval=1.0):
+        """Yield (path, line) for every new line, polling every `interval` seconds, forever."""
+        while True:
+            started = time.time()
+            yield from self.poll()
+            time.sleep(max(0.0, interval - (time.time() - started)))
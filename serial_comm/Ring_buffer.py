@@ -0,0 +1,287 @@
+import threading
+import time
+
+
+def incomplete_utf8_tail(data):
+    """
+    Number of bytes at the end of `data` that begin a multibyte UTF-8
+    character without completing it (0 if the data ends on a boundary).
+    """
+    for back in range(1, min(4, len(data)) + 1):
+        byte = data[-back]
+        if byte & 0xC0 != 0x80:
+            # Lead byte: how long its sequence should be
+            need = 4 if byte >= 0xF0 else 3 if byte >= 0xE0 else 2 if byte >= 0xC0 else 1
+            return back if need > back else 0
+    return 0
+
+
+class RingBuffer:
+    """
+    Bounded byte ring buffer with one writer and any number of independent readers.
+
+    The writer never blocks on readers: it copies into a fixed bytearray and
+    advances a monotonically increasing head offset. Readers keep their own
+    absolute cursor (see Subscription) and copy without taking a lock; a reader
+    that falls more than `capacity` bytes behind loses the oldest data and is
+    told how many bytes were dropped. The condition variable is only used to
+    wake readers that are waiting for new data.
+    """
+
+    def __init__(self, capacity=1 << 20):
+        if capacity <= 0:
+            raise ValueError("RingBuffer capacity must be positive")
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        # Total bytes committed; data in [head - capacity, head) is readable.
+        self._head = 0
+        # Set before the writer starts copying, so readers can detect bytes
+        # that were overwritten while they were reading them.
+        self._reserved = 0
+        self._cond = threading.Condition()
+        self.closed = False
+
+    @property
+    def head(self):
+        return self._head
+
+    def write(self, data):
+        """Append bytes, overwriting the oldest data when the buffer is full."""
+        n = len(data)
+        if not n:
+            return
+        cap = self.capacity
+        view = memoryview(data)
+        if n > cap:
+            # Only the newest `capacity` bytes can ever be read back.
+            self._reserved = self._head + n
+            self._head += n - cap
+            view = view[n - cap:]
+            n = cap
+
+        head = self._head
+        self._reserved = head + n
+        start = head % cap
+        first = min(n, cap - start)
+        self._buf[start:start + first] = view[:first]
+        if first < n:
+            self._buf[:n - first] = view[first:]
+        self._head = head + n
+
+        with self._cond:
+            self._cond.notify_all()
+
+    def read_from(self, cursor, max_bytes=None):
+        """
+        Copy the bytes available after `cursor` without blocking.
+
+        Returns:
+            tuple: (new_cursor, data, dropped) where `dropped` is the number of
+            bytes that were overwritten before they could be read.
+        """
+        head = self._head
+        if cursor >= head:
+            return cursor, b'', 0
+
+        cap = self.capacity
+        dropped = 0
+        if head - cursor > cap:
+            dropped = head - cap - cursor
+            cursor = head - cap
+        if max_bytes is not None and head - cursor > max_bytes:
+            head = cursor + max_bytes
+
+        n = head - cursor
+        start = cursor % cap
+        # Copy straight out of the ring (slicing the bytearray would copy twice)
+        with memoryview(self._buf) as view:
+            if start + n <= cap:
+                data = bytes(view[start:start + n])
+            else:
+                data = b''.join((view[start:], view[:start + n - cap]))
+
+        # Anything older than `reserved - capacity` may have been overwritten
+        # by a concurrent write while we were copying.
+        oldest_valid = self._reserved - cap
+        if cursor < oldest_valid:
+            lost = min(oldest_valid - cursor, n)
+            dropped += lost
+            cursor += lost
+            data = data[lost:]
+
+        return cursor + len(data), data, dropped
+
+    def read_into(self, cursor, target):
+        """
+        Like read_from(), but append the bytes to the bytearray `target`
+        instead of returning a copy.
+
+        Returns:
+            tuple: (new_cursor, dropped)
+        """
+        head = self._head
+        if cursor >= head:
+            return cursor, 0
+
+        cap = self.capacity
+        dropped = 0
+        if head - cursor > cap:
+            dropped = head - cap - cursor
+            cursor = head - cap
+
+        n = head - cursor
+        start = cursor % cap
+        mark = len(target)
+        with memoryview(self._buf) as view:
+            if start + n <= cap:
+                target += view[start:start + n]
+            else:
+                target += view[start:]
+                target += view[:start + n - cap]
+
+        oldest_valid = self._reserved - cap
+        if cursor < oldest_valid:
+            lost = min(oldest_valid - cursor, n)
+            dropped += lost
+            del target[mark:mark + lost]
+        return cursor + n, dropped
+
+    def wait_for_data(self, cursor, timeout=None):
+        """Block until data past `cursor` is available, the buffer closes, or timeout."""
+        if self._head > cursor:
+            return True
+        with self._cond:
+            return self._cond.wait_for(lambda: self._head > cursor or self.closed, timeout) \
+                and self._head > cursor
+
+    def close(self):
+        """Wake all waiting readers; no more data will arrive."""
+        self.closed = True
+        with self._cond:
+            self._cond.notify_all()
+
+    def reopen(self):
+        self.closed = False
+
+    def subscribe(self, from_start=False):
+        """Create a new reader cursor at the current head (or the oldest retained byte)."""
+        start = max(0, self._head - self.capacity) if from_start else self._head
+        return Subscription(self, start)
+
+
+class Subscription:
+    """
+    Independent reader of a RingBuffer.
+
+    Every subscription sees every byte written after it was created, so the UI,
+    the command runner and the login flow can all consume the same stream.
+
+    The line readers pull whole chunks out of the ring into one bytearray and
+    cut lines out of it by index: bytes are searched for a newline once, and a
+    line costs one copy (plus its decode for read_line()).
+    """
+
+    def __init__(self, ring, cursor):
+        self._ring = ring
+        self.cursor = cursor
+        self.dropped = 0
+        # Received but unconsumed bytes are _pending[_start:]; the newline
+        # search resumes at _scanned.
+        self._pending = bytearray()
+        self._start = 0
+        self._scanned = 0
+
+    def pending(self):
+        """Number of bytes written to the ring that this subscription has not consumed."""
+        return self._ring.head - self.cursor + len(self._pending) - self._start
+
+    def read_nowait(self, max_bytes=None):
+        """Return everything currently available (possibly b'') without blocking."""
+        if len(self._pending) > self._start:
+            data = bytes(self._pending[self._start:])
+            self._clear()
+            return data
+        self.cursor, data, dropped = self._ring.read_from(self.cursor, max_bytes)
+        self.dropped += dropped
+        return data
+
+    def read(self, timeout=None, max_bytes=None):
+        """Wait up to `timeout` seconds for data and return what is available."""
+        data = self.read_nowait(max_bytes)
+        if data or not self._ring.wait_for_data(self.cursor, timeout):
+            return data
+        return self.read_nowait(max_bytes)
+
+    def read_line_bytes(self, timeout=None):
+        """
+        Return the next line as raw bytes, including its line ending.
+
+        For consumers that never need text. Like pyserial's readline(),
+        whatever has arrived is returned when the timeout expires; b'' means
+        nothing arrived.
+        """
+        end = self._next_line_end(timeout)
+        if end is None:
+            return self._take_partial(keep_incomplete=False)
+        line = bytes(self._pending[self._start:end + 1])
+        self._consume(end + 1)
+        return line
+
+    def read_line(self, timeout=None):
+        """
+        Return the next line, decoded, without its line ending and trailing
+        whitespace (leading whitespace, e.g. column alignment, is kept).
+
+        A partial line is returned when the timeout expires, which is how
+        prompts without a trailing newline are seen. A multibyte character cut
+        off at that point is kept back and completed by the next read instead
+        of being dropped. Returns '' when nothing arrived within the timeout.
+        """
+        end = self._next_line_end(timeout)
+        if end is None:
+            return self._take_partial().decode('utf-8', errors='ignore').rstrip()
+        line = self._pending[self._start:end].decode('utf-8', errors='ignore')
+        self._consume(end + 1)
+        return line.rstrip()
+
+    def _next_line_end(self, timeout):
+        """Index of the next newline in _pending, waiting up to `timeout`; None on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        pending = self._pending
+        while True:
+            idx = pending.find(b'\n', self._scanned)
+            if idx >= 0:
+                return idx
+            if self._start:
+                # Drop consumed bytes before appending more (cheap at the front of a bytearray)
+                del pending[:self._start]
+                self._start = 0
+            self._scanned = len(pending)
+
+            self.cursor, dropped = self._ring.read_into(self.cursor, pending)
+            self.dropped += dropped
+            if len(pending) > self._scanned:
+                continue
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if (remaining is not None and remaining <= 0) or self._ring.closed:
+                return None
+            self._ring.wait_for_data(self.cursor, remaining)
+
+    def _consume(self, end):
+        if end >= len(self._pending):
+            self._clear()
+        else:
+            self._start = self._scanned = end
+
+    def _clear(self):
+        self._pending.clear()
+        self._start = self._scanned = 0
+
+    def _take_partial(self, keep_incomplete=True):
+        pending = self._pending
+        keep = incomplete_utf8_tail(pending) if keep_incomplete and not self._ring.closed else 0
+        end = len(pending) - keep
+        line = bytes(pending[self._start:end])
+        self._consume(end)
+        return line
@@ -1,72 +1,305 @@
 import serial
+import codecs
 import threading
 import configparser
 import serial.tools.list_ports
-import os
-class SerialComm:
-    
+import time
 
-    print("Current working directory:", os.getcwd())
-    print("Looking for config file at:", os.path.abspath('config.ini'))
+from serial_comm.Ring_buffer import RingBuffer
+from serial_comm.Metrics import get_metrics
 
-    def __init__(self, config_file='config.ini', timeout=1):
-        config = configparser.ConfigParser()
-        config.read(config_file)
 
-        # No default values; require both port and baudrate in config
-        try:
-            if config.has_section('SerialPort'):
-                if config.has_option('SerialPort', 'port'):
-                    port = config.get('SerialPort', 'port')
-                else:
-                    raise ValueError("Missing 'port' in [SerialPort] section of config.ini")
-
-                if config.has_option('SerialPort', 'baudrate'):
-                    baudrate = config.getint('SerialPort', 'baudrate')
-                else:
-                    raise ValueError("Missing 'baudrate' in [SerialPort] section of config.ini")
+def read_port_config(config_file='config.ini', section='SerialPort'):
+    """
+    Read the port and baudrate from a [SerialPort] style section of a config file.
+
+    Returns:
+        tuple: (port, baudrate)
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file)
+
+    # No default values; require both port and baudrate in config
+    try:
+        if config.has_section(section):
+            if config.has_option(section, 'port'):
+                port = config.get(section, 'port')
             else:
-                raise ValueError("Missing [SerialPort] section in config.ini")
-        except ValueError as e:
-            raise serial.SerialException(f"Configuration error: {e}")
+                raise ValueError(f"Missing 'port' in [{section}] section of config.ini")
+
+            if config.has_option(section, 'baudrate'):
+                baudrate = config.getint(section, 'baudrate')
+            else:
+                raise ValueError(f"Missing 'baudrate' in [{section}] section of config.ini")
+        else:
+            raise ValueError(f"Missing [{section}] section in config.ini")
+    except ValueError as e:
+        raise serial.SerialException(f"Configuration error: {e}")
+    return port, baudrate
+
+
+def read_baud_config(config_file='config.ini', section='SerialPort'):
+    """
+    Read the optional baud rate negotiation keys of a [SerialPort] style section:
+        auto_baud = true                        scan for the device's rate on open
+        scan_baudrates = 115200, 57600, 9600    rates tried by the scan
+        high_speed_baudrates = 921600, 460800   rates tried for bulk operations
+
+    Returns:
+        tuple: (auto_baud, scan_baudrates, high_speed_baudrates); the lists are
+        None where the section does not set them.
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    if not config.has_section(section):
+        return False, None, None
+
+    def rates(option):
+        if not config.has_option(section, option):
+            return None
+        try:
+            return [int(rate) for rate in config.get(section, option).split(',') if rate.strip()]
+        except ValueError:
+            raise serial.SerialException(f"Configuration error: invalid '{option}' in [{section}]")
+
+    auto_baud = config.getboolean(section, 'auto_baud', fallback=False)
+    return auto_baud, rates('scan_baudrates'), rates('high_speed_baudrates')
+
+
+def read_prompt_settle(config_file='config.ini', section='SerialPort'):
+    """
+    Read the optional `prompt_settle` key (seconds of quiet after a prompt-like
+    tail before run_command() takes it as the prompt) of a [SerialPort] style
+    section; None where it is not set.
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    try:
+        return config.getfloat(section, 'prompt_settle', fallback=None)
+    except ValueError:
+        raise serial.SerialException(f"Configuration error: invalid 'prompt_settle' in [{section}]")
+
+
+def list_com_ports():
+    """Device names of the serial ports present on this machine."""
+    return [port.device for port in serial.tools.list_ports.comports()]
+
+
+def read_fleet_config(config_file='config.ini'):
+    """
+    Read the device inventory from a config file.
+
+    Each unit is a [SerialPort:<name>] section with the same keys as [SerialPort].
+    Without any such sections the plain [SerialPort] section is the only device.
+
+    Returns:
+        dict: {name: section} for every device, in file order.
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    devices = {}
+    for section in config.sections():
+        if section.startswith('SerialPort:'):
+            devices[section.split(':', 1)[1].strip()] = section
+    if not devices and config.has_section('SerialPort'):
+        devices['default'] = 'SerialPort'
+    return devices
+
+
+class SerialComm:
+
+    def __init__(self, config_file='config.ini', timeout=1, buffer_size=1 << 20, section='SerialPort',
+                 metrics=None, port=None, baudrate=None, auto_baud=None):
+        # An explicit port and baudrate override (or replace) the config file
+        if port is None or baudrate is None:
+            config_port, config_baudrate = read_port_config(config_file, section)
+            port = port or config_port
+            baudrate = baudrate or config_baudrate
+        # Baud rate negotiation (see Baud_rate.py); off unless configured
+        config_auto_baud, self.scan_baudrates, self.high_speed_baudrates = read_baud_config(config_file, section)
+        self.auto_baud = config_auto_baud if auto_baud is None else auto_baud
+        # Prompt settle time for run_command() on this port (None = the default)
+        self.prompt_settle = read_prompt_settle(config_file, section)
 
         self.ser = serial.Serial()
         self.ser.port = port
         self.ser.baudrate = baudrate
         self.ser.timeout = timeout
+        # Guards writes only; reads are served by the background reader thread.
         self.lock = threading.Lock()
 
+        self.rx_buffer = RingBuffer(buffer_size)
+        self._reader_thread = None
+        self._reader_running = False
+        # Cursor used by the legacy read_line()/read_all() API.
+        self._default_subscription = self.rx_buffer.subscribe()
+        # Keeps a multibyte character split across read_all() calls intact
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+
+        # Per-port traffic counters, looked up once so the hot paths only add
+        self.metrics = metrics if metrics is not None else get_metrics(config_file)
+        self._bytes_read = self.metrics.counter('serial_bytes_read_total', "Bytes received", port=port)
+        self._lines_read = self.metrics.counter('serial_lines_read_total', "Lines received", port=port)
+        self._bytes_written = self.metrics.counter('serial_bytes_written_total', "Bytes sent", port=port)
+        self._lines_written = self.metrics.counter('serial_lines_written_total', "Lines sent", port=port)
+        self._lock_wait = self.metrics.histogram('serial_write_lock_wait_seconds',
+                                                 "Time spent waiting for the write lock", port=port)
+        self._readline_timeouts = self.metrics.counter('serial_readline_timeouts_total',
+                                                       "read_line() calls that timed out with no data",
+                                                       port=port)
+
     def open(self):
         try:
             if not self.ser.is_open:
                 self.ser.open()
                 print(f"Serial port {self.ser.port} opened at {self.ser.baudrate} baud.")
+            self._start_reader()
         except serial.SerialException as e:
             print(f"Error opening serial port: {e}")
+            available_ports = list_com_ports()
+            if self.ser.port not in available_ports:
+                print(f"Available serial ports: {', '.join(available_ports) or 'none'}")
+            return
+        if self.auto_baud:
+            from serial_comm.Baud_rate import detect_baudrate
+
+            detect_baudrate(self, self.scan_baudrates, output_callback=print)
 
     def close(self):
+        self._stop_reader()
         if self.ser.is_open:
             self.ser.close()
             print(f"Serial port {self.ser.port} closed.")
 
+    def _start_reader(self):
+        if self._reader_thread is not None and self._reader_thread.is_alive():
+            return
+        self.rx_buffer.reopen()
+        self._reader_running = True
+        self._reader_thread = threading.Thread(target=self._reader_loop,
+                                               name=f"SerialReader-{self.ser.port}",
+                                               daemon=True)
+        self._reader_thread.start()
+
+    def _stop_reader(self):
+        self._reader_running = False
+        thread = self._reader_thread
+        if thread is None:
+            return
+        try:
+            # Wake the reader out of a blocking read (POSIX only).
+            self.ser.cancel_read()
+        except (AttributeError, serial.SerialException, OSError):
+            pass
+        if thread is not threading.current_thread():
+            thread.join(timeout=(self.ser.timeout or 1) + 1)
+        self._reader_thread = None
+        self.rx_buffer.close()
+
+    def _reader_loop(self):
+        """Drain the port in bulk into the ring buffer until close() is called."""
+        ser = self.ser
+        while self._reader_running:
+            try:
+                data = ser.read(ser.in_waiting or 1)
+            except (serial.SerialException, OSError, TypeError) as e:
+                if self._reader_running:
+                    print(f"Error reading serial port: {e}")
+                break
+            if data:
+                self.rx_buffer.write(data)
+                self._bytes_read.inc(len(data))
+                self._lines_read.inc(data.count(b'\n'))
+        self.rx_buffer.close()
+
+    def subscribe(self):
+        """
+        Return a new reader that sees every byte received from now on.
+
+        Each consumer (UI, command runner, login flow) should use its own
+        subscription so that no consumer steals lines from another.
+        """
+        return self.rx_buffer.subscribe()
+
+    def exchange(self, exchange):
+        """
+        Drive a sans-IO exchange over the port and yield what it produces.
+
+        An exchange (PromptCapture, FrameExchange, FramePipeline, LoginDialog,
+        ConsoleProbe) holds the parsing and state of one conversation with the
+        device and no I/O:
+            take_writes(now)    text to send now ('' for nothing)
+            read_timeout(now)   seconds to wait for data, None once finished
+            feed(data, now)     consume received bytes (b'' after a quiet
+                                wait); returns a list of results
+            close()             text to send when it ends or is abandoned
+        and gets `dropped`, the bytes lost because its reader fell more than
+        the receive buffer behind. This loop only moves bytes and clock
+        readings between the exchange and the port; AsyncSerialComm.exchange()
+        is the asyncio counterpart.
+        """
+        subscription = self.subscribe()
+        try:
+            while True:
+                data = exchange.take_writes(time.time())
+                if data:
+                    self.write(data)
+                timeout = exchange.read_timeout(time.time())
+                if timeout is None:
+                    break
+                chunk = subscription.read(timeout=timeout)
+                yield from exchange.feed(chunk, time.time())
+        finally:
+            exchange.dropped = subscription.dropped
+            data = exchange.close()
+            if data:
+                self.write(data)
+
+    def set_baudrate(self, baudrate):
+        """Change the local line speed once everything already written has gone out."""
+        with self.lock:
+            if self.ser.is_open:
+                self.ser.flush()
+            self.ser.baudrate = baudrate
+
     def write(self, data):
+        waiting = time.perf_counter()
         with self.lock:
+            self._lock_wait.observe(time.perf_counter() - waiting)
             try:
                 if self.ser.is_open:
-                    self.ser.write(data.encode('utf-8'))
+                    encoded = data.encode('utf-8')
+                    self.ser.write(encoded)
+                    self._bytes_written.inc(len(encoded))
+                    self._lines_written.inc(encoded.count(b'\n'))
             except serial.SerialTimeoutException as e:
                 print(f"Write timeout: {e}")
 
     def read_line(self):
-        with self.lock:
-            if self.ser.is_open:
-                line = self.ser.readline()
-                return line.decode('utf-8', errors='ignore').strip()
-            return ''
+        if self.ser.is_open:
+            line = self._default_subscription.read_line(timeout=self.ser.timeout)
+            if not line:
+                self._readline_timeouts.inc()
+            return line
+        return ''
+
+    def read_line_bytes(self):
+        """Raw counterpart of read_line(): the next line as bytes, line ending included."""
+        if self.ser.is_open:
+            line = self._default_subscription.read_line_bytes(timeout=self.ser.timeout)
+            if not line:
+                self._readline_timeouts.inc()
+            return line
+        return b''
 
     def read_all(self):
-        with self.lock:
-            if self.ser.is_open:
-                data = self.ser.read(self.ser.in_waiting or 1)
-                return data.decode('utf-8', errors='ignore')
-            return ''
+        if self.ser.is_open:
+            data = self._default_subscription.read(timeout=self.ser.timeout)
+            return self._decoder.decode(data)
+        return ''
+
+    def read_bytes(self):
+        """Raw counterpart of read_all(): whatever arrived within the timeout, as bytes."""
+        if self.ser.is_open:
+            return self._default_subscription.read(timeout=self.ser.timeout)
+        return b''
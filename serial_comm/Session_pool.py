@@ -0,0 +1,121 @@
+import atexit
+import contextlib
+import threading
+import time
+
+from serial_comm.Serial_Comm import SerialComm, read_fleet_config
+from serial_comm.Login_manager import LoginManager
+from serial_comm.Command_manager import CommandManager
+
+
+class Session:
+    """An open, logged-in serial console: port, login manager and command manager."""
+
+    def __init__(self, name, serial_comm, login_manager, command_manager):
+        self.name = name
+        self.serial_comm = serial_comm
+        self.login_manager = login_manager
+        self.command_manager = command_manager
+        # time.time() of the last confirmed shell prompt
+        self.verified_at = 0.0
+        self.lock = threading.Lock()
+
+
+class SessionPool:
+    """
+    Keeps one open, logged-in session per port for the lifetime of the process.
+
+    checkout() hands out a session's CommandManager exclusively. Before handing
+    it out, a session that has been idle for longer than `probe_interval` seconds
+    is checked with a short prompt probe, and the full login exchange only runs
+    again when the prompt is gone (reboot, serial reset, logout). A freshly
+    opened port also starts with the probe, so a device that is still logged in
+    from a previous script is reused without paying for a new login.
+    """
+
+    def __init__(self, config_file='config.ini', logs_dir=None, probe_interval=5.0,
+                 probe_timeout=0.5, login_timeout=15):
+        self.config_file = config_file
+        self.logs_dir = logs_dir
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.login_timeout = login_timeout
+        self.sections = read_fleet_config(config_file)
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _open_session(self, name):
+        section = self.sections.get(name)
+        if section is None and name == 'default':
+            section = 'SerialPort'
+        if section is None:
+            raise KeyError(f"No [SerialPort] section for device '{name}' in {self.config_file}")
+        serial_comm = SerialComm(self.config_file, section=section)
+        serial_comm.open()
+        return Session(name, serial_comm, LoginManager(serial_comm, device=name),
+                       CommandManager(serial_comm, logs_dir=self.logs_dir, device=name))
+
+    def _get_session(self, name):
+        with self._lock:
+            session = self._sessions.get(name)
+            if session is None:
+                session = self._sessions[name] = self._open_session(name)
+            return session
+
+    def _ensure_ready(self, session, output_callback=None):
+        if not session.serial_comm.ser.is_open:
+            session.serial_comm.open()
+            session.verified_at = 0.0
+        if time.time() - session.verified_at < self.probe_interval:
+            return True
+        if not session.login_manager.ensure_logged_in(timeout=self.login_timeout,
+                                                      output_callback=output_callback,
+                                                      probe_timeout=self.probe_timeout):
+            return False
+        session.verified_at = time.time()
+        return True
+
+    @contextlib.contextmanager
+    def checkout(self, name='default', output_callback=None):
+        """
+        Borrow a logged-in session's CommandManager.
+
+        Usage:
+            with pool.checkout('unit01') as cmd_mgr:
+                cmd_mgr.run_command_framed('uptime')
+
+        Raises:
+            RuntimeError: If the device cannot be logged in.
+        """
+        session = self._get_session(name)
+        with session.lock:
+            if not self._ensure_ready(session, output_callback):
+                raise RuntimeError(f"Could not log in to device '{name}'")
+            yield session.command_manager
+
+    def invalidate(self, name='default'):
+        """Force a probe (and re-login if needed) on the next checkout."""
+        session = self._sessions.get(name)
+        if session is not None:
+            session.verified_at = 0.0
+
+    def close_all(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.serial_comm.close()
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool(config_file='config.ini'):
+    """Return the process-wide SessionPool, creating it on first use."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = SessionPool(config_file)
+            atexit.register(_default_pool.close_all)
+        return _default_pool
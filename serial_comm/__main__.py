@@ -0,0 +1,229 @@
+"""
+Headless command line for one device:
+
+    python -m serial_comm login
+    python -m serial_comm run "uname -a" "df -h"
+    python -m serial_comm batch commands.txt
+    python -m serial_comm pull /var/log/gain.log
+    python -m serial_comm push firmware.bin /tmp/firmware.bin
+    python -m serial_comm follow /var/log/gain.log /var/log/messages
+    python -m serial_comm ui
+
+Only argparse is imported up front; pyserial and the managers are imported by
+the subcommand that needs them, keyring only when logging in, and tkinter only
+for `ui`, so cron and CI invocations start quickly.
+"""
+import argparse
+import contextlib
+import os
+import sys
+
+# Exit status of a command that did not finish in time (as timeout(1))
+TIMEOUT_STATUS = 124
+
+
+def load_commands(path):
+    """One command per line ('-' reads stdin); blank lines and '#' comments are ignored."""
+    if path == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith('#')]
+
+
+def _status(msg):
+    print(msg, file=sys.stderr)
+
+
+class _Session:
+    """Open port plus CommandManager for one subcommand; status output goes to stderr."""
+
+    def __init__(self, args):
+        from serial_comm.Serial_Comm import SerialComm, read_fleet_config
+        from serial_comm.Command_manager import CommandManager
+
+        section = 'SerialPort'
+        if args.device:
+            section = read_fleet_config(args.config).get(args.device, f"SerialPort:{args.device}")
+        with contextlib.redirect_stdout(sys.stderr):
+            self.serial_comm = SerialComm(args.config, section=section, port=args.port, baudrate=args.baud,
+                                          auto_baud=args.auto_baud or None)
+            self.serial_comm.open()
+        self.args = args
+        self.manager = CommandManager(self.serial_comm, logs_dir=args.logs_dir, device=args.device)
+
+    def login(self):
+        """Log in unless the shell prompt is already there."""
+        from serial_comm.Login_manager import LoginManager
+
+        try:
+            login_manager = LoginManager(self.serial_comm, device=self.args.device)
+        except Exception as e:
+            _status(f"[Error loading credentials]: {e}")
+            return False
+        return login_manager.ensure_logged_in(timeout=self.args.login_timeout,
+                                              output_callback=self._verbose)
+
+    def _verbose(self, msg):
+        if self.args.verbose:
+            _status(msg)
+
+    def run(self, func):
+        """Run a subcommand, at the console's top speed with --high-speed."""
+        if not self.args.high_speed:
+            return func(self, self.args)
+        with self.manager.high_speed(output_callback=self._verbose):
+            return func(self, self.args)
+
+    def close(self):
+        with contextlib.redirect_stdout(sys.stderr):
+            self.serial_comm.close()
+
+
+def _print_result(result):
+    if result.output:
+        print(result.output)
+    if result.timed_out:
+        _status(f"[!] '{result.command}' timed out")
+        return TIMEOUT_STATUS
+    return result.exit_status
+
+
+def cmd_login(session, args):
+    return 0
+
+
+def cmd_run(session, args):
+    status = 0
+    for command in args.commands:
+        result = session.manager.run_command_framed(command, timeout=args.timeout)
+        code = _print_result(result)
+        status = status or code
+    return status
+
+
+def cmd_batch(session, args):
+    status = 0
+    commands = load_commands(args.commands_file)
+    for result in session.manager.iter_batch(commands, timeout=args.timeout, window=args.window):
+        if args.verbose:
+            _status(f"[*] {result.command}")
+        code = _print_result(result)
+        status = status or code
+    return status
+
+
+def cmd_pull(session, args):
+    stats = session.manager.pull_file(args.remote_path, args.local_path, timeout=args.transfer_timeout,
+                                      output_callback=_status)
+    return 0 if stats.ok else 1
+
+
+def cmd_push(session, args):
+    stats = session.manager.push_file(args.local_path, args.remote_path, timeout=args.transfer_timeout,
+                                      output_callback=_status)
+    return 0 if stats.ok else 1
+
+
+def cmd_follow(session, args):
+    from serial_comm.Remote_follower import RemoteFollower
+
+    follower = RemoteFollower(session.manager, args.paths, from_start=args.from_start)
+    try:
+        for path, line in follower.follow(args.interval):
+            print(f"{path}: {line}" if len(args.paths) > 1 else line, flush=True)
+    except KeyboardInterrupt:
+        pass
+    except BrokenPipeError:
+        # Reader went away (e.g. `| head`); keep the interpreter from flushing into it again
+        sys.stdout = open(os.devnull, 'w')
+    return 0
+
+
+def cmd_ui(args):
+    from ui.ui_manager import main as ui_main
+
+    ui_main()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m serial_comm',
+                                     description="Talk to a device over its serial console.")
+    parser.add_argument('--config', default='config.ini', help="Config file (default: config.ini)")
+    parser.add_argument('--device', default=None,
+                        help="Unit name of a [SerialPort:<name>] section (default: [SerialPort])")
+    parser.add_argument('--port', default=None, help="Serial port, overrides the config")
+    parser.add_argument('--baud', type=int, default=None, help="Baud rate, overrides the config")
+    parser.add_argument('--auto-baud', action='store_true',
+                        help="Scan for the device's baud rate if it does not answer at the configured one")
+    parser.add_argument('--high-speed', action='store_true',
+                        help="Switch the console to its fastest working rate for the subcommand (needs a shell)")
+    parser.add_argument('--logs-dir', default=None, help="Folder of the command logs")
+    parser.add_argument('--login', action='store_true',
+                        help="Log in first (credentials from the environment or keyring, see [Credentials])")
+    parser.add_argument('--login-timeout', type=float, default=15, help="Seconds allowed for the login")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Show the login exchange and progress")
+    subparsers = parser.add_subparsers(dest='subcommand', required=True)
+
+    sub = subparsers.add_parser('login', help="Log in (or confirm the shell prompt) and exit")
+    sub.set_defaults(func=cmd_login, login=True)
+
+    sub = subparsers.add_parser('run', help="Run commands one by one and print their output")
+    sub.add_argument('commands', nargs='+', help="Shell commands")
+    sub.add_argument('--timeout', type=float, default=10, help="Per-command timeout in seconds")
+    sub.set_defaults(func=cmd_run)
+
+    sub = subparsers.add_parser('batch', help="Run a command file as one pipelined batch")
+    sub.add_argument('commands_file', help="One command per line ('-' for stdin)")
+    sub.add_argument('--timeout', type=float, default=10, help="Per-command timeout in seconds")
+    sub.add_argument('--window', type=int, default=8, help="Commands in flight at once")
+    sub.set_defaults(func=cmd_batch)
+
+    sub = subparsers.add_parser('pull', help="Copy a file from the device")
+    sub.add_argument('remote_path')
+    sub.add_argument('local_path', nargs='?', default=None, help="Default: logs folder")
+    sub.add_argument('--transfer-timeout', type=float, default=None, help="Per-block timeout in seconds")
+    sub.set_defaults(func=cmd_pull)
+
+    sub = subparsers.add_parser('push', help="Copy a file to the device")
+    sub.add_argument('local_path')
+    sub.add_argument('remote_path')
+    sub.add_argument('--transfer-timeout', type=float, default=None, help="Per-block timeout in seconds")
+    sub.set_defaults(func=cmd_push)
+
+    sub = subparsers.add_parser('follow', help="Mirror growing device logs and print new lines")
+    sub.add_argument('paths', nargs='+', help="Device files")
+    sub.add_argument('--interval', type=float, default=2.0, help="Seconds between polls")
+    sub.add_argument('--from-start', action='store_true', help="Pull existing content of new files too")
+    sub.set_defaults(func=cmd_follow)
+
+    sub = subparsers.add_parser('ui', help="Start the graphical interface")
+    sub.set_defaults(func=None)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.func is None:
+        return cmd_ui(args)
+
+    try:
+        session = _Session(args)
+    except Exception as e:
+        _status(f"[Error] {e}")
+        return 1
+    try:
+        if not session.serial_comm.ser.is_open:
+            return 1
+        if args.login and not session.login():
+            _status("[!] Login failed.")
+            return 1
+        return session.run(args.func) or 0
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
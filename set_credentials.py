@@ -1,16 +1,21 @@
 
 
-import keyring
+import getpass
+import sys
+
+from serial_comm.Credentials import DEFAULT_SERVICE, KeyringCredentials
 
 def main():
-    service = 'serial_device'
+    # Optional device key (unit name, port or USB serial number); without one the
+    # credentials are the default login shared by all devices.
+    device = sys.argv[1] if len(sys.argv) > 1 else None
 
     login_id = input("Enter login ID: ")
-    password = input("Enter password: ")
+    password = getpass.getpass("Enter password: ")
 
-    keyring.set_password(service, 'login_id', login_id)
-    keyring.set_password(service, 'password', password)
-    print("Credentials saved securely in keyring.")
+    KeyringCredentials(DEFAULT_SERVICE).set(device, login_id, password)
+    target = f"device '{device}'" if device else "all devices"
+    print(f"Credentials for {target} saved securely in keyring.")
 
 if __name__ == '__main__':
     main()
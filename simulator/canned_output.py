@@ -0,0 +1,153 @@
+import random
+import re
+import time
+
+# Line prefix written by the command logs: "2025-07-02 00:49:21 - INFO - message"
+_LOG_LINE_RE = re.compile(r'^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d - [A-Z]+ - (.*)$')
+_SEND_PREFIX = '[*] Sending command: '
+_EXIT_PREFIX = '[*] Exit status: '
+# Shell prompt captured as the last line of a run
+_PROMPT_RE = re.compile(r'[$#>] ?$')
+
+# (subsystem, message) pairs in the style of an AM437x boot log
+_DMESG_INFO = [
+    ('CPU', 'ARMv7 Processor [412fc09a] revision 10 (ARMv7), cr=10c5387d'),
+    ('OF', 'fdt: Machine model: TI AM437x SK EVM'),
+    ('Memory', '981308K/1048576K available (9216K kernel code, 469K rwdata, 3316K rodata)'),
+    ('clocksource', 'dmtimer: mask: 0xffffffff max_cycles: 0xffffffff, max_idle_ns: 79635851949 ns'),
+    ('sched_clock', '32 bits at 24MHz, resolution 41ns, wraps every 89478484971ns'),
+    ('thermal_sys', "Registered thermal governor 'step_wise'"),
+    ('usbcore', 'registered new interface driver usbfs'),
+    ('NET', 'Registered protocol family 16'),
+    ('DMA', 'preallocated 256 KiB pool for atomic coherent allocations'),
+    ('omap_i2c 44e0b000.i2c', 'bus 0 rev0.12 at 400 kHz'),
+    ('mmc0', 'new high speed SDHC card at address aaaa'),
+    ('c_can_platform 481cc000.can', 'c_can_platform device registered (regs=(ptrval), irq=53)'),
+    ('', 'Calibrating delay loop... 1987.37 BogoMIPS (lpj=9936896)'),
+    ('', 'SCSI subsystem initialized'),
+]
+_DMESG_WARN = [
+    ('WARNING', "Your 'console=ttyO0' has been replaced by 'ttyS0'"),
+    ('omap_rtc 44e3e000.rtc', 'already running'),
+    ('random', '7 urandom warning(s) missed due to ratelimiting'),
+]
+_DMESG_ERR = [
+    ('mmc1', 'error -110 whilst initialising SDIO card'),
+    ('omap_hsmmc 47810000.mmc', 'could not set regulator OCR (-22)'),
+    ('tps65218 0-0024', 'Failed to read register 0x0b: -121'),
+]
+
+_GAIN_RECORDS = [
+    ('INFO', 'GAIN-EXTERN-COMM', 'Successfully created CAN socket'),
+    ('INFO', 'GAIN-EXTERN-COMM', 'Starting GAIN-EXTERN-COMM'),
+    ('ERR', 'GAIN-NW-MNGR', 'SCAN 0 command failed.'),
+    ('INFO', 'GAIN-NW-MNGR', 'Server RegisterUrl at 4: http://127.0.0.1:8002/'),
+    ('INFO', 'GAIN-USER-INTF', 'Server listening at url: http://127.0.0.1:8001/'),
+    ('WARNING', 'GAIN-USER-INTF', 'operation error: Unexpected status key'),
+    ('INFO', 'GAIN-HM-PBIT', 'RTC detected'),
+    ('INFO', 'GAIN-HM-PBIT', 'Frame buffer is available.'),
+    ('ERR', 'GAIN-PBIT', 'PBIT failed with return value: 1'),
+    ('CRIT', 'GAIN-HM-PBIT', 'Configuration Error: Front Panel Connector Issue'),
+]
+# Relative frequency of the records above (the real logs are dominated by the first three)
+_GAIN_WEIGHTS = [25, 25, 40, 2, 2, 2, 1, 1, 1, 1]
+
+
+def generate_dmesg(lines=1000, seed=0, color=True):
+    """
+    Deterministic dmesg output of `lines` lines: boot messages with increasing
+    timestamps, a few warnings and errors, and the init / 'Freeing unused
+    kernel memory' markers the parsers use as boot time.
+
+    With color=True the text is coloured like `dmesg --color=always` on the
+    device (green timestamps, yellow subsystems, bold warnings, red errors).
+    """
+    rng = random.Random(seed)
+    out = []
+    stamp = 0.0
+    init_at = max(1, lines * 3 // 4)
+    for i in range(lines):
+        if i == init_at:
+            entry, kind = ('', 'Run /sbin/init as init process'), 'info'
+        elif i == init_at - 1:
+            entry, kind = ('', 'Freeing unused kernel memory: 1024K'), 'info'
+        else:
+            roll = rng.random()
+            if roll < 0.02:
+                entry, kind = rng.choice(_DMESG_ERR), 'err'
+            elif roll < 0.06:
+                entry, kind = rng.choice(_DMESG_WARN), 'warn'
+            else:
+                entry, kind = rng.choice(_DMESG_INFO), 'info'
+        subsystem, message = entry
+        if color:
+            # The level colour starts at the ': ' after the subsystem, as on the device
+            head = f"\x1b[33m{subsystem}\x1b[0m" if subsystem else ''
+            body = f": {message}" if subsystem else message
+            if kind != 'info':
+                body = f"\x1b[{'31' if kind == 'err' else '1'}m{body}\x1b[0m"
+            out.append(f"\x1b[32m[{stamp:12.6f}] \x1b[0m{head}{body}")
+        else:
+            head = f"{subsystem}: " if subsystem else ''
+            out.append(f"[{stamp:12.6f}] {head}{message}")
+        stamp += rng.expovariate(1 / 0.004)
+    return '\n'.join(out) + '\n'
+
+
+def generate_gain_log(records=10000, seed=0, start='2020-09-20T10:44:16', rate=5.0, host='LOCALHOST'):
+    """
+    Deterministic gain.log text of `records` records, about `rate` per second
+    starting at `start`, in the device format:
+
+        2020-09-20T10:44:16 2020-09-20T10:44:16 LOCALHOST [CRIT] [GAIN-HM-PBIT] Configuration Error: ...
+    """
+    rng = random.Random(seed)
+    epoch = time.mktime(time.strptime(start, '%Y-%m-%dT%H:%M:%S'))
+    out = []
+    stamp_cache = {}
+    for _ in range(records):
+        second = int(epoch)
+        stamp = stamp_cache.get(second)
+        if stamp is None:
+            stamp = stamp_cache[second] = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(second))
+        level, component, message = rng.choices(_GAIN_RECORDS, _GAIN_WEIGHTS)[0]
+        out.append(f"{stamp} {stamp} {host} [{level}] [{component}] {message}")
+        epoch += rng.expovariate(rate)
+    return '\n'.join(out) + '\n'
+
+
+def load_command_log(file_path):
+    """
+    Read back one of our command logs (logs/<command>.log) for replay.
+
+    Returns:
+        dict: command -> output text of its last run that produced output
+        (without the echoed command, the trailing prompt and our status lines).
+    """
+    outputs = {}
+    command, lines = None, []
+
+    def finish():
+        if command is not None:
+            if lines and _PROMPT_RE.search(lines[-1]):
+                lines.pop()
+            if lines or command not in outputs:
+                outputs[command] = lines
+
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        for raw in f:
+            match = _LOG_LINE_RE.match(raw.rstrip('\n'))
+            if not match:
+                continue
+            message = match.group(1)
+            if message.startswith(_SEND_PREFIX):
+                finish()
+                command, lines = message[len(_SEND_PREFIX):], []
+            elif message.startswith(_EXIT_PREFIX) or message.startswith('[!] ') or command is None:
+                continue
+            elif not lines and message == command:
+                continue  # echo of the command itself
+            else:
+                lines.append(message)
+    finish()
+    return {command: '\n'.join(lines) + '\n' if lines else '' for command, lines in outputs.items()}
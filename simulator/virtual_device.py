@@ -0,0 +1,517 @@
+import argparse
+import collections
+import os
+import pty
+import random
+import re
+import select
+import shlex
+import shutil
+import signal
+import tempfile
+import termios
+import threading
+import time
+import tty
+import warnings
+
+from simulator.canned_output import generate_dmesg, generate_gain_log, load_command_log
+
+# termios speed constant -> baud rate
+_TTY_SPEEDS = {getattr(termios, name): int(name[1:]) for name in dir(termios) if re.fullmatch(r'B\d+', name)}
+
+
+def _tty_speed(fd):
+    """Output baud rate a tty is set to (None if unknown)."""
+    try:
+        return _TTY_SPEEDS.get(termios.tcgetattr(fd)[5])
+    except termios.error:
+        return None
+
+
+class _PacedLink:
+    """
+    One direction of the simulated serial line.
+
+    Bytes handed to send() are written to `fd` after `latency` seconds and no
+    faster than baudrate / 10 bytes per second (8N1 framing). With `noise` > 0,
+    that fraction of the bytes is replaced by random garbage on the way.
+    While `mismatch()` returns True (the two ends disagree on the rate), every
+    byte arrives as garbage.
+    """
+
+    # Granularity of the pacing, in seconds of line time
+    SLICE_SECONDS = 0.005
+
+    def __init__(self, fd, baudrate, latency=0.0, noise=0.0, rng=None, name='link', mismatch=None):
+        self.fd = fd
+        self.baudrate = baudrate
+        self.latency = latency
+        self.noise = noise
+        self.rng = rng or random.Random()
+        self.mismatch = mismatch
+        self.bytes_sent = 0
+        self.bytes_corrupted = 0
+        self._pending = collections.deque()
+        self._cond = threading.Condition()
+        self._free_at = 0.0
+        self._next_error = self._error_gap()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"VirtualDevice-{name}", daemon=True)
+        self._thread.start()
+
+    def send(self, data):
+        if not data:
+            return
+        with self._cond:
+            self._pending.append((time.monotonic() + self.latency, bytes(data)))
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=2)
+
+    def _error_gap(self):
+        return self.rng.expovariate(self.noise) if self.noise > 0 else float('inf')
+
+    def _corrupt(self, data):
+        if self.mismatch is not None and self.mismatch():
+            # Framing errors: high-bit junk, never a valid line
+            self.bytes_corrupted += len(data)
+            return bytes(0x80 | self.rng.randrange(128) for _ in range(len(data)))
+        if self._next_error >= len(data):
+            self._next_error -= len(data)
+            return data
+        data = bytearray(data)
+        position = int(self._next_error)
+        while position < len(data):
+            data[position] = self.rng.randrange(256)
+            self.bytes_corrupted += 1
+            position += 1 + int(self._error_gap())
+        self._next_error = position - len(data)
+        return bytes(data)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                due, data = self._pending.popleft()
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                self._write_paced(data)
+            except OSError:
+                return
+
+    def _write_paced(self, data):
+        bytes_per_second = self.baudrate / 10 if self.baudrate else 0
+        if not bytes_per_second:
+            self._write_all(self._corrupt(data))
+            return
+        slice_size = max(1, int(bytes_per_second * self.SLICE_SECONDS))
+        self._free_at = max(self._free_at, time.monotonic())
+        view = memoryview(data)
+        for start in range(0, len(data), slice_size):
+            piece = view[start:start + slice_size]
+            self._write_all(self._corrupt(piece))
+            self._free_at += len(piece) / bytes_per_second
+            wait = self._free_at - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+    def _write_all(self, data):
+        data = memoryview(data)
+        while data:
+            written = os.write(self.fd, data)
+            self.bytes_sent += written
+            data = data[written:]
+
+
+class VirtualDevice:
+    """
+    Hardware-free stand-in for a board on a serial console.
+
+    A Linux pseudo-terminal plays the serial port: the framework opens its
+    slave side (VirtualDevice.port) like any tty, e.g. through a config file
+    written by write_config(). Behind it the device runs a getty-style login
+    (login prompt, password without echo, 'Login incorrect' on bad
+    credentials) and then a real /bin/sh on its own pty, so stty, $?, quoting,
+    pipes and Ctrl-C behave as on the board. `exit` returns to the login
+    prompt.
+
+    Canned command outputs (default: a generated `dmesg`) are installed as
+    commands on the shell's PATH, and canned files (default: a generated
+    gain.log) are placed in its working directory, all inside a temporary
+    directory. Both directions of the line are paced at `baudrate`, delayed
+    by `latency` seconds each way, and device output can be corrupted at a
+    byte error rate of `noise`; everything random is seeded, so runs are
+    repeatable. With `strict_baud`, the line only works while the framework's
+    port is set to the device's rate, and `stty <rate>` in the shell changes
+    that rate, as on a real UART console.
+
+    Usage:
+        with VirtualDevice(baudrate=115200) as device:
+            device.write_config('sim.ini')
+            serial_comm = SerialComm('sim.ini')
+    """
+
+    def __init__(self, baudrate=115200, latency=0.0, noise=0.0, seed=0, login_id=None, password=None,
+                 require_login=True, hostname='localhost', prompt=None, commands=None, files=None,
+                 dmesg_lines=500, gain_records=2000, shell='/bin/sh', strict_baud=False):
+        """
+        Args:
+            baudrate (int): Simulated line speed (None or 0 = unpaced).
+            latency (float): One-way delay in seconds, applied in both directions.
+            noise (float): Fraction of output bytes replaced by garbage.
+            seed (int): Seed for the generated logs and the noise.
+            login_id, password (str): Accepted credentials (None = accept any).
+            require_login (bool): Start at the login prompt instead of a shell.
+            hostname (str): Shown in the login prompt and the default prompt.
+            prompt (str): Shell prompt (default "root@<hostname>:~# ").
+            commands (dict): Extra canned outputs, command name -> text. A key
+                of the form "cat <file>" becomes a canned file instead.
+            files (dict): Extra canned files, relative path -> text or bytes.
+            dmesg_lines (int): Size of the generated dmesg output.
+            gain_records (int): Size of the generated gain.log.
+            shell (str): Shell run after login.
+            strict_baud (bool): Garble both directions while the host port's
+                rate differs from `baudrate`; `stty <rate>` sets `baudrate`.
+        """
+        self.latency = latency
+        self.noise = noise
+        self.seed = seed
+        self.login_id = login_id
+        self.password = password
+        self.require_login = require_login
+        self.hostname = hostname
+        self.prompt = prompt or f"root@{hostname}:~# "
+        self.shell = shell
+        self.strict_baud = strict_baud
+        self._baudrate = baudrate
+        self._shell_speed = None
+        self.commands = {'dmesg': generate_dmesg(dmesg_lines, seed=seed)}
+        self.files = {'gain.log': generate_gain_log(gain_records, seed=seed)}
+        for command, output in (commands or {}).items():
+            if command.startswith('cat '):
+                self.files[command[4:].strip()] = output
+            else:
+                self.commands[command] = output
+        self.files.update(files or {})
+
+        self.port = None
+        self.workdir = None
+        self.logins = 0
+        self._master = None
+        self._slave = None
+        self._shell_fd = None
+        self._shell_pid = None
+        self._to_host = None
+        self._to_shell = None
+        self._state = None
+        self._line = bytearray()
+        self._last_byte = b''
+        self._user = None
+        self._running = False
+        self._wake_r = self._wake_w = None
+        self._thread = None
+
+    @classmethod
+    def from_logs(cls, logs_dir, **kwargs):
+        """Device that replays the outputs captured in our command logs (logs/*.log)."""
+        commands = {}
+        for name in sorted(os.listdir(logs_dir)):
+            if name.endswith('.log'):
+                commands.update(load_command_log(os.path.join(logs_dir, name)))
+        # Only single commands and 'cat <file>' can be replayed
+        commands = {command: output for command, output in commands.items()
+                    if len(command.split()) == 1 or command.startswith('cat ')}
+        commands.update(kwargs.pop('commands', None) or {})
+        return cls(commands=commands, **kwargs)
+
+    @property
+    def baudrate(self):
+        return self._baudrate
+
+    @baudrate.setter
+    def baudrate(self, value):
+        self._baudrate = value
+        for link in (self._to_host, self._to_shell):
+            if link is not None:
+                link.baudrate = value
+
+    @property
+    def bytes_out(self):
+        """Bytes the device has sent to the host."""
+        return self._to_host.bytes_sent if self._to_host else 0
+
+    @property
+    def bytes_corrupted(self):
+        return self._to_host.bytes_corrupted if self._to_host else 0
+
+    def start(self):
+        """Create the pseudo-terminal and start the device; returns the port path."""
+        if self._running:
+            return self.port
+        self.workdir = tempfile.mkdtemp(prefix='virtual_device_')
+        self._install_canned()
+        self._master, self._slave = pty.openpty()
+        # The device side is a plain byte pipe; the framework configures its own end
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._wake_r, self._wake_w = os.pipe()
+        self._to_host = _PacedLink(self._master, self._baudrate, self.latency, self.noise,
+                                   random.Random(self.seed), name='tx', mismatch=self._baud_mismatch)
+        self._running = True
+        if self.require_login:
+            self._state = 'login'
+            self._to_host.send(self._login_prompt())
+        else:
+            self._spawn_shell()
+        self._thread = threading.Thread(target=self._run, name="VirtualDevice", daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        os.write(self._wake_w, b'x')
+        self._thread.join(timeout=2)
+        self._kill_shell()
+        self._to_host.close()
+        for fd in (self._master, self._slave, self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def write_config(self, config_file, section='SerialPort'):
+        """Write a config file whose [section] points the framework at this device."""
+        with open(config_file, 'w', encoding='utf-8') as f:
+            f.write(f"[{section}]\nport = {self.port}\nbaudrate = {self._baudrate or 115200}\n")
+        return config_file
+
+    def _install_canned(self):
+        bin_dir = os.path.join(self.workdir, 'bin')
+        data_dir = os.path.join(self.workdir, 'canned')
+        home = os.path.join(self.workdir, 'home')
+        for directory in (bin_dir, data_dir, home):
+            os.makedirs(directory)
+        for index, (command, output) in enumerate(self.commands.items()):
+            if len(command.split()) != 1:
+                raise ValueError(f"canned command must be a single word: {command!r}")
+            data_path = os.path.join(data_dir, str(index))
+            self._write(data_path, output)
+            script = os.path.join(bin_dir, command)
+            with open(script, 'w', encoding='utf-8') as f:
+                f.write(f"#!/bin/sh\ncat {shlex.quote(data_path)}\n")
+            os.chmod(script, 0o755)
+        for name, content in self.files.items():
+            path = os.path.join(home, name.lstrip('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._write(path, content)
+
+    @staticmethod
+    def _write(path, content):
+        with open(path, 'wb') as f:
+            f.write(content.encode('utf-8') if isinstance(content, str) else content)
+
+    def _login_prompt(self):
+        return f"\r\n{self.hostname} login: ".encode()
+
+    def _spawn_shell(self):
+        home = os.path.join(self.workdir, 'home')
+        env = {
+            'PATH': os.path.join(self.workdir, 'bin') + os.pathsep + '/usr/bin:/bin:/usr/sbin:/sbin',
+            'HOME': home,
+            'PS1': self.prompt,
+            'TERM': 'vt100',
+            'LANG': 'C',
+            'USER': self._user or 'root',
+        }
+        with warnings.catch_warnings():
+            # The child only changes directory and execs, so forking with threads is safe here
+            warnings.simplefilter('ignore', DeprecationWarning)
+            pid, fd = pty.fork()
+        if pid == 0:
+            try:
+                os.chdir(home)
+                os.execve(self.shell, [self.shell, '-i'], env)
+            finally:
+                os._exit(127)
+        self._shell_pid, self._shell_fd = pid, fd
+        self._to_shell = _PacedLink(fd, self._baudrate, self.latency, rng=random.Random(self.seed), name='rx',
+                                    mismatch=self._baud_mismatch)
+        self._shell_speed = _tty_speed(fd)
+        self._state = 'shell'
+        self.logins += 1
+
+    def _kill_shell(self):
+        if self._shell_pid is None:
+            return
+        try:
+            os.kill(self._shell_pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self._reap_shell()
+
+    def _reap_shell(self):
+        try:
+            os.waitpid(self._shell_pid, 0)
+        except OSError:
+            pass
+        self._to_shell.close()
+        try:
+            os.close(self._shell_fd)
+        except OSError:
+            pass
+        self._shell_pid = self._shell_fd = self._to_shell = None
+
+    def _run(self):
+        while self._running:
+            fds = [self._master, self._wake_r]
+            if self._shell_fd is not None:
+                fds.append(self._shell_fd)
+            ready, _, _ = select.select(fds, [], [])
+            if self._master in ready:
+                try:
+                    data = os.read(self._master, 4096)
+                except OSError:
+                    data = b''
+                if data:
+                    self._from_host(data)
+            if self._shell_fd is not None and self._shell_fd in ready:
+                try:
+                    data = os.read(self._shell_fd, 4096)
+                except OSError:
+                    data = b''
+                if data:
+                    if self.strict_baud:
+                        self._follow_stty()
+                    self._to_host.send(data)
+                else:
+                    # The shell exited (logout): back to the login prompt
+                    self._reap_shell()
+                    if self.require_login:
+                        self._state = 'login'
+                        self._to_host.send(b"\r\n" + self._login_prompt())
+                    else:
+                        self._spawn_shell()
+
+    def _baud_mismatch(self):
+        if not self.strict_baud or not self._baudrate:
+            return False
+        return _tty_speed(self._slave) != self._baudrate
+
+    def _follow_stty(self):
+        # The shell's pty stands in for the console UART: a speed set on it with stty applies to the line
+        speed = _tty_speed(self._shell_fd)
+        if speed != self._shell_speed:
+            self._shell_speed = speed
+            if speed:
+                self.baudrate = speed
+
+    def _from_host(self, data):
+        if self._state == 'shell':
+            self._to_shell.send(data)
+            return
+        # getty: line editing with echo for the name, no echo for the password
+        for i in range(len(data)):
+            byte = data[i:i + 1]
+            previous, self._last_byte = self._last_byte, byte
+            if byte == b'\n' and previous == b'\r':
+                continue
+            if byte in (b'\r', b'\n'):
+                line = self._line.decode('utf-8', errors='replace').strip()
+                self._line.clear()
+                self._end_login_line(line)
+                if self._state == 'shell':
+                    # Type-ahead after the password goes to the new shell
+                    rest = data[i + 1:]
+                    if rest.startswith(b'\n') and byte == b'\r':
+                        rest = rest[1:]
+                    self._to_shell.send(rest)
+                    return
+            elif byte in (b'\x7f', b'\x08'):
+                if self._line:
+                    self._line.pop()
+                    if self._state == 'login':
+                        self._to_host.send(b'\x08 \x08')
+            elif byte == b'\x03':
+                self._line.clear()
+                self._state = 'login'
+                self._to_host.send(b'^C' + self._login_prompt())
+            else:
+                self._line += byte
+                if self._state == 'login':
+                    self._to_host.send(byte)
+
+    def _end_login_line(self, line):
+        if self._state == 'login':
+            if not line:
+                self._to_host.send(self._login_prompt())
+                return
+            self._user = line
+            self._state = 'password'
+            self._to_host.send(b"\r\nPassword: ")
+            return
+        user, self._user = self._user, None
+        if (self.login_id is None or user == self.login_id) and \
+                (self.password is None or line == self.password):
+            self._user = user
+            self._to_host.send(b"\r\n")
+            self._spawn_shell()
+        else:
+            self._state = 'login'
+            self._to_host.send(b"\r\n\r\nLogin incorrect" + self._login_prompt())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a virtual serial-console device on a pseudo-terminal.")
+    parser.add_argument('--baud', type=int, default=115200, help="Simulated line speed (0 = unpaced)")
+    parser.add_argument('--latency', type=float, default=0.0, help="One-way delay in seconds")
+    parser.add_argument('--noise', type=float, default=0.0, help="Byte error rate of the device output")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for generated logs and noise")
+    parser.add_argument('--login', default=None, help="Accepted login (default: any)")
+    parser.add_argument('--password', default=None, help="Accepted password (default: any)")
+    parser.add_argument('--no-login', action='store_true', help="Start with a shell instead of the login prompt")
+    parser.add_argument('--strict-baud', action='store_true',
+                        help="Only talk at the device's rate; `stty <rate>` in the shell changes it")
+    parser.add_argument('--dmesg-lines', type=int, default=500, help="Lines of generated dmesg output")
+    parser.add_argument('--gain-records', type=int, default=2000, help="Records in the generated gain.log")
+    parser.add_argument('--replay-logs', default=None, metavar='DIR',
+                        help="Replay the outputs captured in this logs folder")
+    parser.add_argument('--config', default=None, help="Write a [SerialPort] config for this device here")
+    args = parser.parse_args()
+
+    options = dict(baudrate=args.baud, latency=args.latency, noise=args.noise, seed=args.seed,
+                   login_id=args.login, password=args.password, require_login=not args.no_login,
+                   dmesg_lines=args.dmesg_lines, gain_records=args.gain_records, strict_baud=args.strict_baud)
+    device = VirtualDevice.from_logs(args.replay_logs, **options) if args.replay_logs else VirtualDevice(**options)
+    device.start()
+    print(f"[*] Virtual device on {device.port} at {args.baud or 'unpaced'} baud")
+    if args.config:
+        device.write_config(args.config)
+        print(f"[*] Saved to {args.config}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        device.stop()
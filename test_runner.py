@@ -1,6 +1,7 @@
 import subprocess
 import sys
 import os
+import runpy
 
 def run_test_script(script_path):
     if not os.path.isfile(script_path):
@@ -34,13 +35,44 @@ def run_test_script(script_path):
     print(f"\nTest script exited with code {exit_code}")
     return exit_code
 
+def run_test_script_in_process(script_path):
+    """
+    Run a test script inside this interpreter.
+
+    Scripts that use serial_comm.Session_pool.get_default_pool() then share
+    open, logged-in sessions instead of reconnecting and logging in again.
+    """
+    if not os.path.isfile(script_path):
+        print(f"Error: Test script '{script_path}' does not exist.")
+        return 1
+
+    print(f"Running test script: {script_path}\n{'='*60}")
+    exit_code = 0
+    try:
+        runpy.run_path(script_path, run_name='__main__')
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        exit_code = 1
+    print(f"\nTest script exited with code {exit_code}")
+    return exit_code
+
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python test_runner.py <test_script.py>")
+    args = sys.argv[1:]
+    in_process = '--in-process' in args
+    scripts = [arg for arg in args if arg != '--in-process']
+    if not scripts:
+        print("Usage: python test_runner.py [--in-process] <test_script.py> [<test_script.py> ...]")
         sys.exit(1)
 
-    test_script = sys.argv[1]
-    exit_code = run_test_script(test_script)
+    if in_process:
+        # Make 'serial_comm' importable for the scripts, as they do for themselves
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    runner = run_test_script_in_process if in_process else run_test_script
+    exit_code = 0
+    for test_script in scripts:
+        exit_code = runner(test_script) or exit_code
     sys.exit(exit_code)
 
 if __name__ == "__main__":
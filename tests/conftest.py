@@ -0,0 +1,69 @@
+"""
+Fixtures for the automated tests: a virtual device on a pseudo-terminal
+(simulator/virtual_device.py) and the framework connected to it, so the
+suite runs without hardware. The interactive scripts next to this file
+(test_login.py, test_dmesg.py) still need a real board.
+"""
+import os
+
+import pytest
+
+from serial_comm.Metrics import Metrics
+from serial_comm.Log_writer import CommandLogWriter
+
+
+def _virtual_device(**kwargs):
+    if os.name != 'posix':
+        pytest.skip("the virtual device needs a POSIX pseudo-terminal")
+    from simulator.virtual_device import VirtualDevice
+
+    kwargs.setdefault('require_login', False)
+    kwargs.setdefault('baudrate', 0)
+    return VirtualDevice(**kwargs)
+
+
+@pytest.fixture
+def device():
+    """Unpaced virtual device with a shell (no login prompt)."""
+    with _virtual_device() as device:
+        yield device
+
+
+@pytest.fixture
+def login_device():
+    """Unpaced virtual device at its login prompt, accepting root/secret."""
+    with _virtual_device(require_login=True, login_id='root', password='secret') as device:
+        yield device
+
+
+@pytest.fixture
+def strict_device():
+    """Virtual device at 115200 baud whose line only works while the host port matches its rate."""
+    with _virtual_device(baudrate=115200, strict_baud=True) as device:
+        yield device
+
+
+@pytest.fixture
+def serial_comm(device, tmp_path):
+    from serial_comm.Serial_Comm import SerialComm
+
+    serial_comm = SerialComm(device.write_config(str(tmp_path / 'sim.ini')), metrics=Metrics())
+    serial_comm.open()
+    yield serial_comm
+    serial_comm.close()
+
+
+@pytest.fixture
+def log_writer():
+    writer = CommandLogWriter()
+    yield writer
+    writer.close()
+
+
+@pytest.fixture
+def cmd_mgr(serial_comm, log_writer, tmp_path):
+    from serial_comm.Command_manager import CommandManager
+
+    logs_dir = tmp_path / 'logs'
+    return CommandManager(serial_comm, logs_dir=str(logs_dir), log_writer=log_writer, log_store=None,
+                          metrics=serial_comm.metrics)
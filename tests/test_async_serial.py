@@ -0,0 +1,142 @@
+import asyncio
+import os
+
+import pytest
+
+from serial_comm.Credentials import MemoryCredentials
+from serial_comm.Metrics import Metrics
+
+
+def _run(config, tmp_path, session, credentials=None):
+    from serial_comm.Async_serial import AsyncCommandManager, AsyncLoginManager, AsyncSerialComm
+
+    async def main():
+        comm = AsyncSerialComm(config, metrics=Metrics())
+        await comm.open()
+        try:
+            login_manager = AsyncLoginManager(comm, credentials=credentials or MemoryCredentials())
+            cmd_mgr = AsyncCommandManager(comm, logs_dir=str(tmp_path / 'logs'), log_store=None,
+                                          metrics=comm.metrics)
+            return await session(login_manager, cmd_mgr)
+        finally:
+            comm.close()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def config(device, tmp_path):
+    return device.write_config(str(tmp_path / 'sim.ini'))
+
+
+def test_async_run_command_and_framed(config, tmp_path):
+    async def session(login_manager, cmd_mgr):
+        output = await cmd_mgr.run_command('echo plain', timeout=5)
+        framed = await cmd_mgr.run_command_framed('echo x # comment', timeout=5)
+        hung = await cmd_mgr.run_command_framed('sleep 10', timeout=0.5)
+        after = await cmd_mgr.run_command_framed('echo after', timeout=5)
+        return output, framed, hung, after
+
+    output, framed, hung, after = _run(config, tmp_path, session)
+    assert 'plain' in output
+    assert (framed.exit_status, framed.output) == (0, 'x')
+    assert hung.timed_out
+    assert (after.exit_status, after.output) == (0, 'after')
+
+
+def test_async_batch_and_stream(config, tmp_path):
+    commands = [f'echo line{i}' for i in range(10)] + ['false']
+
+    async def session(login_manager, cmd_mgr):
+        results = await cmd_mgr.run_batch(commands, timeout=5, window=4)
+        stream = cmd_mgr.stream_command('seq 1 500', timeout=5, tail_lines=10, log_output=False)
+        lines = [line async for line in stream]
+        return results, lines, stream
+
+    results, lines, stream = _run(config, tmp_path, session)
+    assert [result.output for result in results[:10]] == [f'line{i}' for i in range(10)]
+    assert results[-1].exit_status == 1
+    assert lines == [str(i) for i in range(1, 501)]
+    assert stream.exit_status == 0
+    assert list(stream.tail) == [str(i) for i in range(491, 501)]
+
+
+def test_async_login_sequence(login_device, tmp_path):
+    config = login_device.write_config(str(tmp_path / 'sim.ini'))
+
+    async def session(login_manager, cmd_mgr):
+        logged_in = await login_manager.login_sequence(timeout=5, output_callback=lambda msg: None)
+        return logged_in, await cmd_mgr.run_command_framed('echo hi', timeout=5)
+
+    logged_in, result = _run(config, tmp_path, session, MemoryCredentials('root', 'secret'))
+    assert logged_in
+    assert result.output == 'hi'
+
+
+def test_async_pull_and_push(device, config, tmp_path):
+    data = bytes(range(256)) * 20
+    (tmp_path / 'payload.bin').write_bytes(data)
+
+    async def session(login_manager, cmd_mgr):
+        pulled = await cmd_mgr.pull_file('gain.log', str(tmp_path / 'gain.log'), block_size=4096)
+        pushed = await cmd_mgr.push_file(str(tmp_path / 'payload.bin'), 'payload.bin', block_size=1024)
+        return pulled, pushed
+
+    pulled, pushed = _run(config, tmp_path, session)
+    assert pulled.ok and pushed.ok
+    home = os.path.join(device.workdir, 'home')
+    with open(os.path.join(home, 'gain.log'), 'rb') as f:
+        assert (tmp_path / 'gain.log').read_bytes() == f.read()
+    with open(os.path.join(home, 'payload.bin'), 'rb') as f:
+        assert f.read() == data
+
+
+@pytest.mark.parametrize('use_thread', [False, True])
+def test_lost_port_wakes_waiting_readers(device, config, tmp_path, monkeypatch, use_thread):
+    from serial_comm.Async_serial import AsyncCommandManager, AsyncSerialComm
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        if use_thread:
+            # As on platforms without add_reader() for serial ports
+            def no_reader(fd, callback):
+                raise NotImplementedError
+            monkeypatch.setattr(loop, 'add_reader', no_reader)
+        comm = AsyncSerialComm(config, metrics=Metrics())
+        await comm.open()
+        cmd_mgr = AsyncCommandManager(comm, logs_dir=str(tmp_path / 'logs'), log_store=None, metrics=comm.metrics)
+        loop.call_later(0.3, device.stop)
+        started = loop.time()
+        result = await cmd_mgr.run_command_framed('sleep 30', timeout=20)
+        return result, loop.time() - started, comm.closed
+
+    result, elapsed, closed = asyncio.run(main())
+    assert result.timed_out
+    assert closed
+    assert elapsed < 5
+
+
+def test_empty_read_counts_as_hang_up(config):
+    from serial_comm.Async_serial import AsyncSerialComm
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        comm = AsyncSerialComm(config, metrics=Metrics())
+        await comm.open()
+        # A descriptor at EOF reads b'' forever, like a hung-up tty
+        hung_up, writer = os.pipe()
+        os.close(writer)
+        loop.remove_reader(comm._fd)
+        comm._fd = hung_up
+        loop.add_reader(hung_up, comm._on_readable)
+        try:
+            subscription = comm.subscribe()
+            started = loop.time()
+            await subscription.read(timeout=10)
+            return loop.time() - started, comm.closed
+        finally:
+            os.close(hung_up)
+
+    elapsed, closed = asyncio.run(main())
+    assert closed
+    assert elapsed < 5
@@ -0,0 +1,70 @@
+import asyncio
+
+from serial_comm.Baud_rate import detect_baudrate
+from serial_comm.Command_manager import CommandManager
+from serial_comm.Metrics import Metrics
+from serial_comm.Serial_Comm import SerialComm
+
+
+def _open(device, tmp_path, baudrate=None):
+    serial_comm = SerialComm(device.write_config(str(tmp_path / 'sim.ini')), metrics=Metrics(), baudrate=baudrate)
+    serial_comm.open()
+    return serial_comm
+
+
+def test_detect_baudrate_finds_the_device_rate(strict_device, tmp_path):
+    serial_comm = _open(strict_device, tmp_path, baudrate=9600)
+    try:
+        assert detect_baudrate(serial_comm, [57600, 115200]) == 115200
+        assert serial_comm.ser.baudrate == 115200
+    finally:
+        serial_comm.close()
+
+
+def test_high_speed_switches_and_restores(strict_device, tmp_path, log_writer):
+    serial_comm = _open(strict_device, tmp_path)
+    cmd_mgr = CommandManager(serial_comm, logs_dir=str(tmp_path / 'logs'), log_writer=log_writer, log_store=None,
+                             metrics=serial_comm.metrics)
+    try:
+        with cmd_mgr.high_speed(baudrates=[460800]) as speed:
+            assert speed.baudrate == serial_comm.ser.baudrate == 460800
+            assert cmd_mgr.run_command_framed('echo fast', timeout=5).output == 'fast'
+        assert serial_comm.ser.baudrate == 115200
+        assert cmd_mgr.run_command_framed('echo slow', timeout=5).output == 'slow'
+    finally:
+        serial_comm.close()
+
+
+def test_async_high_speed_switches_and_restores(strict_device, tmp_path):
+    from serial_comm.Async_serial import AsyncCommandManager, AsyncSerialComm
+
+    async def main():
+        comm = AsyncSerialComm(strict_device.write_config(str(tmp_path / 'sim.ini')), metrics=Metrics())
+        await comm.open()
+        try:
+            cmd_mgr = AsyncCommandManager(comm, logs_dir=str(tmp_path / 'logs'), log_store=None,
+                                          metrics=comm.metrics)
+            async with cmd_mgr.high_speed(baudrates=[460800]) as speed:
+                inside = speed.baudrate, comm.ser.baudrate, (await cmd_mgr.run_command_framed('echo fast')).output
+            after = comm.ser.baudrate, (await cmd_mgr.run_command_framed('echo slow')).output
+            return inside, after
+        finally:
+            comm.close()
+
+    assert asyncio.run(main()) == ((460800, 460800, 'fast'), (115200, 'slow'))
+
+
+def test_async_open_detects_the_baudrate(strict_device, tmp_path):
+    from serial_comm.Async_serial import AsyncSerialComm
+
+    async def main():
+        comm = AsyncSerialComm(strict_device.write_config(str(tmp_path / 'sim.ini')), metrics=Metrics(),
+                               baudrate=9600, auto_baud=True)
+        comm.scan_baudrates = [57600, 115200]
+        await comm.open()
+        try:
+            return comm.ser.baudrate
+        finally:
+            comm.close()
+
+    assert asyncio.run(main()) == 115200
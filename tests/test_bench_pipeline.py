@@ -0,0 +1,48 @@
+import json
+import sys
+
+from benchmarks import bench_pipeline
+from benchmarks.bench_pipeline import compare, percentile
+
+
+def test_percentile_is_nearest_rank():
+    samples = [5, 1, 4, 2, 3]
+    assert percentile(samples, 0.5) == 3
+    assert percentile(samples, 0.99) == 5
+    assert percentile(samples, 0.0) == 1
+
+
+def test_compare_flags_only_regressions_beyond_the_tolerance():
+    baseline = {'run_batch': {'commands_per_s': 100.0}, 'login': {'p50_ms': 10.0, 'max_ms': 0}}
+    results = {'run_batch': {'commands_per_s': 85.0, 'peak_mb': 1.0}, 'login': {'p50_ms': 13.0, 'max_ms': 5.0}}
+    report, regressions = compare(results, baseline, tolerance=0.2)
+    # Throughput 15% down is within 20%; latency 30% up is not; metrics without a baseline are skipped
+    assert regressions == ['login.p50_ms']
+    assert len(report) == 3 and report[-1].endswith('REGRESSION')
+
+
+def _main(monkeypatch, *args):
+    monkeypatch.setattr(sys, 'argv', ['bench_pipeline.py', '--only', 'run_batch', 'flag_parse', 'ui_append',
+                                      '--commands', '20', '--lines', '2000', '--capture-lines', '100',
+                                      '--repeat', '1', '--no-memory', *args])
+    return bench_pipeline.main()
+
+
+def test_main_writes_results_and_checks_a_baseline(monkeypatch, tmp_path, capsys):
+    output = tmp_path / 'results.json'
+    assert _main(monkeypatch, '--output', str(output)) == 0
+    with open(output, encoding='utf-8') as f:
+        document = json.load(f)
+    assert set(document['results']) == {'run_batch', 'flag_parse', 'ui_append'}
+    assert document['results']['run_batch']['commands_per_s'] > 0
+    assert document['meta']['commands'] == 20
+
+    # A baseline far faster than anything this run can reach fails the comparison
+    for metrics in document['results'].values():
+        for metric in metrics:
+            metrics[metric] *= 1000
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps(document), encoding='utf-8')
+    capsys.readouterr()
+    assert _main(monkeypatch, '--baseline', str(baseline)) == 1
+    assert 'Regression in run_batch.commands_per_s' in capsys.readouterr().out
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from serial_comm.__main__ import TIMEOUT_STATUS, load_commands, main
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def config(device, tmp_path):
+    return device.write_config(str(tmp_path / 'sim.ini'))
+
+
+def _cli(config, tmp_path, *args):
+    return main(['--config', config, '--logs-dir', str(tmp_path / 'logs'), *args])
+
+
+def test_parsing_the_cli_imports_no_serial_gui_or_keyring_modules():
+    code = ("import sys; from serial_comm.__main__ import build_parser; "
+            "build_parser().parse_args(['run', 'true']); "
+            "print(sorted(m for m in ('serial', 'tkinter', 'keyring', 'serial_comm.Serial_Comm') "
+            "if m in sys.modules))")
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == '[]'
+
+
+def test_run_prints_output_and_returns_the_first_failure(config, tmp_path, capsys):
+    assert _cli(config, tmp_path, 'run', 'echo hi', 'sh -c "exit 4"', 'echo after') == 4
+    assert capsys.readouterr().out == "hi\nafter\n"
+
+
+def test_run_timeout_exits_like_timeout_1(config, tmp_path, capsys):
+    assert _cli(config, tmp_path, 'run', '--timeout', '0.3', 'sleep 2') == TIMEOUT_STATUS
+    assert "timed out" in capsys.readouterr().err
+
+
+def test_batch_file_and_pull(config, device, tmp_path, capsys):
+    commands = tmp_path / 'commands.txt'
+    commands.write_text("# comment\necho one\n\necho two\n", encoding='utf-8')
+    assert load_commands(str(commands)) == ['echo one', 'echo two']
+    assert _cli(config, tmp_path, 'batch', str(commands)) == 0
+    assert capsys.readouterr().out == "one\ntwo\n"
+
+    remote = os.path.join(device.workdir, 'home', 'data.bin')
+    with open(remote, 'wb') as f:
+        f.write(bytes(range(256)) * 40)
+    local = tmp_path / 'data.bin'
+    assert _cli(config, tmp_path, 'pull', remote, str(local)) == 0
+    assert local.read_bytes() == bytes(range(256)) * 40
+
+
+def test_unopenable_port_fails(tmp_path, capsys):
+    assert main(['--port', str(tmp_path / 'no-such-tty'), '--baud', '115200', 'run', 'true']) == 1
+    assert capsys.readouterr().out == ''
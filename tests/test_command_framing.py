@@ -0,0 +1,79 @@
+import pytest
+
+from serial_comm.Command_framing import CommandFrame, FrameExchange
+
+
+def test_framed_command_returns_output_and_status(cmd_mgr):
+    result = cmd_mgr.run_command_framed('echo one; echo two', timeout=5)
+    assert result.exit_status == 0
+    assert result.output.splitlines() == ['one', 'two']
+
+    result = cmd_mgr.run_command_framed('sh -c "exit 3"', timeout=5)
+    assert result.exit_status == 3
+
+
+def test_background_command_does_not_swallow_end_marker(cmd_mgr):
+    result = cmd_mgr.run_command_framed('sleep 1 &', timeout=5)
+    assert result.exit_status == 0
+    assert result.duration < 1
+
+
+def test_comment_does_not_swallow_end_marker(cmd_mgr):
+    result = cmd_mgr.run_command_framed('echo x # comment', timeout=5)
+    assert result.exit_status == 0
+    assert result.output == 'x'
+
+
+def test_trailing_semicolon(cmd_mgr):
+    result = cmd_mgr.run_command_framed('echo y;', timeout=5)
+    assert (result.exit_status, result.output) == (0, 'y')
+
+
+def test_output_without_trailing_newline(cmd_mgr):
+    result = cmd_mgr.run_command_framed("printf abc", timeout=5)
+    assert (result.exit_status, result.output) == (0, 'abc')
+
+
+def test_timeout_interrupts_and_next_command_runs(cmd_mgr):
+    result = cmd_mgr.run_command_framed('sleep 10', timeout=0.5)
+    assert result.timed_out
+    result = cmd_mgr.run_command_framed('echo after', timeout=5)
+    assert (result.exit_status, result.output) == (0, 'after')
+
+
+def test_batch_keeps_order_and_statuses(cmd_mgr):
+    commands = [f'echo line{i}' for i in range(20)] + ['false', 'echo x # comment', 'sleep 1 &']
+    results = cmd_mgr.run_batch(commands, timeout=5, window=4)
+    assert [result.command for result in results] == commands
+    assert [result.output for result in results[:20]] == [f'line{i}' for i in range(20)]
+    assert [result.exit_status for result in results[20:]] == [1, 0, 0]
+
+
+def test_batch_timeout_interrupts_hung_command(cmd_mgr):
+    results = cmd_mgr.run_batch(['echo before', 'sleep 10', 'echo after'], timeout=0.5, window=1)
+    assert results[0].exit_status == 0
+    assert results[1].timed_out
+    assert cmd_mgr.run_command_framed('echo again', timeout=5).output == 'again'
+
+
+def test_frame_parses_marker_lines():
+    frame = CommandFrame('ls')
+    assert not frame.feed_line('root@localhost:~# ls')
+    assert not frame.feed_line(f'> > {frame.begin_marker}')
+    assert not frame.feed_line('file')
+    assert frame.feed_line(f'last__END_{frame.token}__ 2')
+    assert frame.result().output == 'file\nlast'
+    assert frame.exit_status == 2
+
+
+def test_stream_without_any_time_limit_is_rejected(cmd_mgr):
+    with pytest.raises(ValueError):
+        cmd_mgr.stream_command('cat', timeout=None)
+    with pytest.raises(ValueError):
+        FrameExchange(CommandFrame('cat'), 0.0)
+
+
+def test_stream_with_only_max_duration(cmd_mgr):
+    stream = cmd_mgr.stream_command('seq 1 3', timeout=None, max_duration=5, log_output=False)
+    assert list(stream) == ['1', '2', '3']
+    assert stream.exit_status == 0
@@ -0,0 +1,61 @@
+import itertools
+
+import pytest
+
+from serial_comm.Command_manager import CommandManager
+from serial_comm.Log_store import LogStore
+
+
+@pytest.fixture
+def log_store(tmp_path):
+    store = LogStore(str(tmp_path / 'store.db'))
+    yield store
+    store.close()
+
+
+def test_spill_file_bounded_tail_and_logs(serial_comm, log_writer, log_store, tmp_path):
+    cmd_mgr = CommandManager(serial_comm, logs_dir=str(tmp_path / 'logs'), log_writer=log_writer,
+                             log_store=log_store, metrics=serial_comm.metrics, device='unit01')
+    spill = tmp_path / 'seq.txt'
+    stream = cmd_mgr.stream_command('seq 1 2500', timeout=5, spill_path=str(spill), tail_lines=5)
+    count = sum(1 for _ in stream)
+
+    assert count == stream.line_count == 2500
+    assert (stream.exit_status, stream.timed_out, stream.dropped) == (0, False, 0)
+    assert list(stream.tail) == ['2496', '2497', '2498', '2499', '2500']
+    assert stream.result().output == '2496\n2497\n2498\n2499\n2500'
+    assert spill.read_text(encoding='utf-8').splitlines() == [str(i) for i in range(1, 2501)]
+
+    assert log_writer.flush()
+    log = (tmp_path / 'logs' / 'seq_1_2500.log').read_text(encoding='utf-8').splitlines()
+    assert log[0].endswith('[*] Sending command: seq 1 2500')
+    assert log[-1].endswith('[*] Exit status: 0') and len(log) == 2502
+
+    # Stored in blocks of store_block lines, all under one run
+    assert log_store.flush()
+    first, last = log_store.search(text='1')[0], log_store.search(text='2500')[0]
+    assert first['run_id'] == last['run_id'] and last['exit_status'] == 0
+    assert (last['device'], last['command']) == ('unit01', 'seq 1 2500')
+
+
+def test_batches_yield_lists_of_lines(cmd_mgr):
+    stream = cmd_mgr.stream_command('seq 1 300', timeout=5, batches=True, log_output=False)
+    batches = list(stream)
+    assert all(isinstance(batch, list) for batch in batches)
+    assert list(itertools.chain.from_iterable(batches)) == [str(i) for i in range(1, 301)]
+
+
+def test_closing_early_interrupts_the_command(cmd_mgr):
+    stream = cmd_mgr.stream_command('yes line', timeout=5, tail_lines=3, log_output=False)
+    assert list(itertools.islice(stream, 10)) == ['line'] * 10
+    stream.close()
+    assert stream.timed_out
+    assert cmd_mgr.run_command_framed('echo still here', timeout=5).output == 'still here'
+
+
+def test_max_duration_stops_a_chatty_command(cmd_mgr):
+    stream = cmd_mgr.stream_command('while true; do echo tick; sleep 0.05; done', timeout=5,
+                                    max_duration=0.5, log_output=False)
+    lines = list(stream)
+    assert stream.timed_out and 0 < len(lines) < 20
+    assert cmd_mgr.run_command_framed('echo next', timeout=5).output == 'next'
@@ -0,0 +1,52 @@
+from serial_comm.Credentials import (CachingCredentials, ChainCredentials, EnvCredentials, MemoryCredentials,
+                                     device_keys)
+
+
+class _CountingCredentials(MemoryCredentials):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = []
+
+    def get(self, key=None):
+        self.calls.append(key)
+        return super().get(key)
+
+
+def test_device_login_in_a_later_provider_beats_an_earlier_default():
+    env = EnvCredentials(environ={'SERIAL_LOGIN_ID': 'default', 'SERIAL_PASSWORD': 'pw'})
+    keyring = MemoryCredentials(devices={'unit01': ('unit-login', 'unit-pw')})
+    chain = ChainCredentials([env, keyring])
+    assert chain.lookup(['unit01', '/dev/ttyUSB0']) == ('unit-login', 'unit-pw')
+    assert chain.lookup(['unit02']) == ('default', 'pw')
+
+
+def test_keys_are_tried_most_specific_first_across_providers():
+    first = MemoryCredentials(devices={'/dev/ttyUSB0': ('port-login', 'pw')})
+    second = MemoryCredentials(devices={'unit01': ('unit-login', 'pw')})
+    assert ChainCredentials([first, second]).lookup(['unit01', '/dev/ttyUSB0']) == ('unit-login', 'pw')
+
+
+def test_defaults_follow_provider_order():
+    first = MemoryCredentials('first', 'pw')
+    second = MemoryCredentials('second', 'pw', devices={'other': ('other', 'pw')})
+    assert ChainCredentials([first, second]).lookup(['unit01']) == ('first', 'pw')
+    assert ChainCredentials([first, second]).lookup([]) == ('first', 'pw')
+    assert ChainCredentials([MemoryCredentials(), MemoryCredentials()]).lookup(['unit01']) is None
+
+
+def test_later_providers_are_not_asked_once_a_key_is_found():
+    first = MemoryCredentials(devices={'unit01': ('unit-login', 'pw')})
+    second = _CountingCredentials('default', 'pw')
+    assert ChainCredentials([first, second]).lookup(['unit01', '/dev/ttyUSB0']) == ('unit-login', 'pw')
+    assert second.calls == []
+
+
+def test_cache_reads_each_key_once_and_set_writes_first_writable():
+    counting = _CountingCredentials()
+    chain = ChainCredentials([EnvCredentials(environ={}), CachingCredentials(counting)])
+    for _ in range(3):
+        assert chain.lookup(['unit01']) is None
+    assert counting.calls == ['unit01', None]
+
+    chain.set('unit01', 'new', 'pw')
+    assert chain.lookup(device_keys('unit01')) == ('new', 'pw')
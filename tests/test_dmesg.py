@@ -2,16 +2,11 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from serial_comm.Serial_Comm import SerialComm
-from serial_comm.Command_manager import CommandManager
+from serial_comm.Session_pool import get_default_pool
 
 def main():
-    serial_comm = SerialComm()
-    serial_comm.open()
-
-    cmd_mgr = CommandManager(serial_comm)
-
-    try:
+    # The pooled session stays open and logged in for later scripts in this process
+    with get_default_pool().checkout() as cmd_mgr:
         while True:
             command = input("Enter command to send (or 'exit' to quit): ").strip()
             if command.lower() == 'exit':
@@ -23,8 +18,5 @@ def main():
             output = cmd_mgr.run_command(command, timeout=10)
             print(f"Output:\n{output}\n")
 
-    finally:
-        serial_comm.close()
-
 if __name__ == "__main__":
     main()
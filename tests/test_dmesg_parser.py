@@ -0,0 +1,57 @@
+from logs_parser.dmesg_parser import ERR, WARN, parse_dmesg, strip_ansi
+from simulator.canned_output import generate_dmesg
+
+
+def test_coloured_and_plain_output_parse_alike():
+    coloured = parse_dmesg(generate_dmesg(400, seed=3))
+    plain = parse_dmesg(generate_dmesg(400, seed=3, color=False))
+
+    assert len(coloured) == len(plain) == 400
+    assert list(coloured.timestamps) == list(plain.timestamps)
+    assert [coloured.line(i) for i in range(400)] == [plain.line(i) for i in range(400)]
+    # 'Freeing unused kernel memory' sits just before init, at 3/4 of the buffer
+    assert coloured.boot_index() == plain.boot_index() == 299
+    assert coloured.boot_time() == coloured.timestamps[299]
+
+
+def test_coloured_severity_follows_the_colour():
+    text = generate_dmesg(1000, seed=1)
+    table = parse_dmesg(text)
+    lines = text.splitlines()
+    assert len(table.indices(severity=ERR)) == sum('\x1b[31m' in line for line in lines) > 0
+    assert len(table.indices(severity=WARN)) == sum('\x1b[1m' in line for line in lines) > 0
+    counts = table.severity_counts()
+    assert sum(counts.values()) == 1000 and list(counts) == ['err', 'warn', 'info']
+
+
+def test_raw_priorities_and_command_log_prefix():
+    text = ("2025-07-02 00:49:21 - INFO - <6>[    0.000000] Booting Linux on physical CPU 0x0\n"
+            "2025-07-02 00:49:21 - INFO - <3>[    1.250000] mmc0: error -110 whilst initialising SD card\n"
+            "2025-07-02 00:49:21 - INFO - <4>[    1.500000] random: crng init warning\n"
+            "2025-07-02 00:49:21 - INFO - <6>[    2.000000] Run /sbin/init as init process\n")
+    table = parse_dmesg(text)
+    assert list(table.severities) == [6, 3, 4, 6]
+    assert table.subsystems == ['mmc0', 'random']
+    assert table.line(1) == "[    1.250000] mmc0: error -110 whilst initialising SD card"
+    assert table.boot_time() == 2.0
+    assert parse_dmesg('').boot_time() is None
+
+
+def test_subsystem_durations():
+    table = parse_dmesg("[    1.000000] usb 1-1: new device\n"
+                        "[    1.500000] eth0: link up\n"
+                        "[    2.000000] usb 1-1: configured\n"
+                        "[    4.000000] plain line\n")
+    usb = table.subsystem_durations()['usb 1-1']
+    assert usb == {'first': 1.0, 'last': 2.0, 'span': 1.0, 'spent': 2.5, 'count': 2}
+    assert table.subsystem(3) is None
+
+
+def test_parse_dmesg_output_from_the_device(cmd_mgr):
+    output = cmd_mgr.run_command_framed('dmesg', timeout=10).output
+    boot_line, warnings, errors = cmd_mgr.parse_dmesg_output(output)
+    assert boot_line.endswith('Freeing unused kernel memory: 1024K')
+    plain = strip_ansi(output).splitlines()
+    assert len(cmd_mgr.last_dmesg) == len(plain) == 500
+    assert errors and all(line in plain for line in errors)
+    assert warnings and all(line in plain for line in warnings)
@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+
+import pytest
+
+from serial_comm.File_transfer import posix_cksum
+
+
+def _device_path(device, name):
+    return os.path.join(device.workdir, 'home', name)
+
+
+@pytest.mark.parametrize('compress', [True, False])
+def test_pull_file_is_byte_exact(cmd_mgr, device, tmp_path, compress):
+    local_path = str(tmp_path / 'gain.log')
+    stats = cmd_mgr.pull_file('gain.log', local_path, block_size=4096, compress=compress)
+    assert stats.ok, stats.format()
+    assert stats.compressed == compress
+    with open(_device_path(device, 'gain.log'), 'rb') as f, open(local_path, 'rb') as g:
+        assert f.read() == g.read()
+    assert not os.path.exists(local_path + '.part')
+
+
+def test_pull_of_a_growing_file_stops_at_the_probed_size(cmd_mgr, device, tmp_path):
+    path = _device_path(device, 'grow.log')
+    with open(path, 'wb') as f:
+        f.write(b'x' * 10000)
+    stop = threading.Event()
+
+    def grow():
+        while not stop.is_set():
+            with open(path, 'ab') as f:
+                f.write(b'appended line\n')
+            time.sleep(0.001)
+
+    writer = threading.Thread(target=grow)
+    writer.start()
+    try:
+        local_path = str(tmp_path / 'grow.log')
+        stats = cmd_mgr.pull_file('grow.log', local_path, block_size=4096, retries=0)
+    finally:
+        stop.set()
+        writer.join()
+    assert stats.ok, stats.format()
+    with open(path, 'rb') as f, open(local_path, 'rb') as g:
+        pulled = g.read()
+        assert len(pulled) == stats.size >= 10000
+        assert f.read()[:len(pulled)] == pulled
+
+
+def test_failed_pull_leaves_no_part_file(cmd_mgr, tmp_path):
+    local_path = str(tmp_path / 'gain.log')
+    # Far too short a block timeout: every block fails
+    stats = cmd_mgr.pull_file('gain.log', local_path, block_size=4096, retries=0, timeout=0)
+    assert stats.failed_blocks
+    assert not os.path.exists(local_path)
+    assert not os.path.exists(local_path + '.part')
+
+
+def test_pull_missing_file_reports_error(cmd_mgr, tmp_path):
+    stats = cmd_mgr.pull_file('no_such_file', str(tmp_path / 'out'))
+    assert not stats.ok
+    assert stats.error == "cannot read the file size"
+    assert not os.path.exists(tmp_path / 'out')
+
+
+def test_push_file_is_byte_exact(cmd_mgr, device, tmp_path):
+    data = bytes(range(256)) * 40 + b'tail'
+    local_path = tmp_path / 'payload.bin'
+    local_path.write_bytes(data)
+    stats = cmd_mgr.push_file(str(local_path), 'payload.bin', block_size=1024)
+    assert stats.ok, stats.format()
+    assert stats.blocks == 11
+    with open(_device_path(device, 'payload.bin'), 'rb') as f:
+        assert f.read() == data
+
+
+def test_posix_cksum_matches_the_cksum_utility():
+    # Reference values of `printf ... | cksum`
+    assert posix_cksum(b'') == 4294967295
+    assert posix_cksum(b'hello\n') == 3015617425
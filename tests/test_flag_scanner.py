@@ -0,0 +1,69 @@
+import random
+import re
+
+import pytest
+
+from logs_parser.logs_paerser import FlagScanner, parse_line_for_flags
+
+FLAGS = ['GAIN-HM-PBIT', 'PBIT', 'GAIN-EXTERN-COMM', 'CRIT', 'CRITICAL', 'ERROR', 'Front Panel', 'code']
+
+LINES = [
+    '',
+    'nothing to see here',
+    'GAIN-HM-PBIT=PASS',
+    'GAIN-HM-PBIT = FAIL, code=0x1f',
+    'PBIT only, no value',
+    'CRITICAL: CRIT=3 ERROR',
+    'CRIT then CRIT=7',
+    'code=1 code=2',
+    'Front Panel   =  locked,door',
+    'ERROR= ',
+    'GAIN-EXTERN-COMMGAIN-HM-PBIT=x',
+    'PBITPBIT=overlap',
+]
+
+
+def legacy_parse_line_for_flags(line, flags):
+    """parse_line_for_flags() before FlagScanner: one substring test and regex per flag."""
+    found = {}
+    for flag in flags:
+        if flag in line:
+            match = re.search(rf'{flag}\s*=\s*([^\s,]+)', line)
+            found[flag] = match.group(1) if match else None
+    return found
+
+
+def _random_lines(count, seed=0):
+    rng = random.Random(seed)
+    words = FLAGS + ['=', ' = ', '=', ',', ' ', 'value', '0x2a', 'GAIN', 'CRI', 'PB', 'x']
+    return [''.join(rng.choice(words) for _ in range(rng.randrange(12))) for _ in range(count)]
+
+
+@pytest.mark.parametrize('line', LINES)
+def test_scan_line_matches_the_legacy_parser(line):
+    assert FlagScanner(FLAGS).scan_line(line) == legacy_parse_line_for_flags(line, FLAGS)
+
+
+def test_random_lines_match_the_legacy_parser():
+    scanner = FlagScanner(FLAGS)
+    for line in _random_lines(3000):
+        assert scanner.scan_line(line) == legacy_parse_line_for_flags(line, FLAGS), line
+
+
+def test_scan_chunk_and_scan_file_match_scan_line(tmp_path):
+    lines = LINES + _random_lines(500, seed=1)
+    scanner = FlagScanner(FLAGS)
+    expected = [(line, legacy_parse_line_for_flags(line, FLAGS)) for line in lines
+                if legacy_parse_line_for_flags(line, FLAGS)]
+    text = '\n'.join(lines) + '\n'
+    assert scanner.scan_chunk(text) == expected
+
+    path = tmp_path / 'sample.log'
+    path.write_text(text, encoding='utf-8')
+    assert list(scanner.scan_file(str(path), chunk_size=64)) == expected
+
+
+def test_parse_line_for_flags_keeps_its_interface():
+    assert parse_line_for_flags('CRIT=2 x', FLAGS) == {'CRIT': '2'}
+    assert parse_line_for_flags('CRIT=2 x', FlagScanner(['CRIT'])) == {'CRIT': '2'}
+    assert parse_line_for_flags('CRIT=2 x', []) == {}
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from serial_comm.Fleet_runner import FleetRunner
+from tests.conftest import _virtual_device
+
+
+@pytest.fixture
+def fleet(tmp_path):
+    with _virtual_device() as unit_a, _virtual_device() as unit_b:
+        config = tmp_path / 'fleet.ini'
+        config.write_text(f"[SerialPort:unit_a]\nport = {unit_a.port}\nbaudrate = 115200\n\n"
+                          f"[SerialPort:unit_b]\nport = {unit_b.port}\nbaudrate = 115200\n\n"
+                          f"[SerialPort:gone]\nport = {tmp_path / 'no-such-tty'}\nbaudrate = 115200\n",
+                          encoding='utf-8')
+        yield str(config)
+
+
+def test_fleet_runs_every_unit_and_reports_each(fleet, tmp_path):
+    runner = FleetRunner(fleet, logs_dir=str(tmp_path / 'logs'), login=False, command_timeout=5)
+    assert list(runner.devices) == ['unit_a', 'unit_b', 'gone']
+
+    lines = []
+    reports = runner.run(['echo hello', 'sh -c "exit 3"'], output_callback=lines.append)
+
+    by_name = {report['device']: report for report in reports}
+    for name in ('unit_a', 'unit_b'):
+        report = by_name[name]
+        assert report['error'] is None
+        assert [(r['command'], r['exit_status'], r['output']) for r in report['results']] == [
+            ('echo hello', 0, 'hello'), ('sh -c "exit 3"', 3, '')]
+    assert by_name['gone']['error'] and by_name['gone']['results'] == []
+    assert any(line.startswith('[gone] [Error]') for line in lines)
+    assert (tmp_path / 'logs' / 'unit_a').is_dir()
+
+    summary = runner.summarize(reports)
+    assert (summary['devices'], summary['devices_ok'], summary['commands_run'], summary['commands_failed']) == (
+        3, 2, 4, 2)
+
+    path = runner.save_report(reports, str(tmp_path / 'report.json'))
+    with open(path, encoding='utf-8') as f:
+        saved = json.load(f)
+    assert saved['summary'] == summary and len(saved['devices']) == 3
+
+
+def test_plain_serial_port_section_is_the_only_device(device, tmp_path):
+    runner = FleetRunner(device.write_config(str(tmp_path / 'sim.ini')), logs_dir=str(tmp_path / 'logs'),
+                         login=False)
+    assert runner.devices == {'default': 'SerialPort'}
@@ -0,0 +1,72 @@
+import re
+
+import pytest
+
+from logs_parser import gain_log_analyzer
+from logs_parser.gain_log_analyzer import _chunk_ranges, analyze_gain_log
+from simulator.canned_output import generate_gain_log
+
+
+@pytest.fixture
+def gain_log(tmp_path):
+    path = tmp_path / 'gain.log'
+    path.write_text(generate_gain_log(3000, seed=2), encoding='utf-8')
+    return str(path)
+
+
+def _expected(path):
+    levels, components = {}, {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            level, component = re.search(r' \[([A-Za-z]+)\] \[([^\]]+)\]', line).groups()
+            levels[level.upper()] = levels.get(level.upper(), 0) + 1
+            components[component] = components.get(component, 0) + 1
+    return levels, components
+
+
+def test_chunk_ranges_cover_the_file_on_line_boundaries(gain_log):
+    with open(gain_log, 'rb') as f:
+        data = f.read()
+    ranges = _chunk_ranges(gain_log, 1000)
+    assert len(ranges) > 100
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start and data[end - 1:end] == b'\n'
+
+
+def test_results_do_not_depend_on_chunk_or_slice_boundaries(gain_log, monkeypatch):
+    levels, components = _expected(gain_log)
+    whole = analyze_gain_log(gain_log, workers=1, chunk_size=1 << 30).to_dict()
+    assert whole['records'] == 3000
+    assert whole['levels'] == levels and whole['components'] == components
+
+    # Chunks and worker slices that end in the middle of records
+    monkeypatch.setattr(gain_log_analyzer, '_SLICE_SIZE', 333)
+    assert analyze_gain_log(gain_log, workers=1, chunk_size=777).to_dict() == whole
+
+
+def test_process_pool_merges_to_the_same_result(gain_log):
+    single = analyze_gain_log(gain_log, workers=1).to_dict()
+    assert analyze_gain_log(gain_log, workers=2, chunk_size=50000).to_dict() == single
+
+
+def test_command_log_prefix_last_line_without_newline_and_histogram(tmp_path):
+    path = tmp_path / 'cmd.log'
+    path.write_text("2025-07-02 00:49:21 - INFO - 2020-09-20T10:44:16.5 2020-09-20T10:44:16 HOST "
+                    "[CRIT] [GAIN-HM-PBIT] Configuration Error\n"
+                    "2025-07-02 00:49:21 - INFO - not a record\n"
+                    "2020-09-20T10:45:01 2020-09-20T10:45:01 HOST [warn] [GAIN-HM-PBIT] Low gain", encoding='utf-8')
+    stats = analyze_gain_log(str(path), workers=1, chunk_size=10)
+    result = stats.to_dict()
+    assert result['records'] == 2
+    assert result['levels'] == {'CRIT': 1, 'WARN': 1}
+    assert result['hosts'] == {'HOST': 2}
+    assert (result['first'], result['last']) == ('2020-09-20T10:44:16', '2020-09-20T10:45:01')
+    assert result['histogram'] == {'GAIN-HM-PBIT': {'2020-09-20T10:44:00': 1, '2020-09-20T10:45:00': 1}}
+    assert 'GAIN-HM-PBIT' in stats.format_report()
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / 'empty.log'
+    path.write_bytes(b'')
+    assert analyze_gain_log(str(path)).records == 0
@@ -0,0 +1,70 @@
+import time
+
+import log_search
+from serial_comm.Log_store import DEFAULT_DB_PATH, LogStore, line_severity, log_store_path, parse_time
+
+
+def _store(tmp_path):
+    return LogStore(str(tmp_path / 'store.db'))
+
+
+def test_search_by_text_severity_device_and_time(tmp_path):
+    store = _store(tmp_path)
+    try:
+        now = time.time()
+        store.record_run('unit01', 'cat gain.log', ['GAIN-HM-PBIT [CRIT] Front Panel fault', 'all good'],
+                         started=now - 3600, exit_status=0)
+        store.record_run('unit02', 'dmesg', ['[    1.0] usb 1-1: [ERROR] Front Panel gone', 'plain'],
+                         started=now, exit_status=0)
+        assert store.flush()
+
+        hits = store.search(text='Front Panel')
+        assert [hit['device'] for hit in hits] == ['unit02', 'unit01']
+        assert [hit['text'] for hit in store.search(severity='CRIT')] == ['GAIN-HM-PBIT [CRIT] Front Panel fault']
+        assert [hit['command'] for hit in store.search(text='Front Panel', device='unit01')] == ['cat gain.log']
+        assert [hit['device'] for hit in store.search(text='Front Panel', since='30m')] == ['unit02']
+        # A stray quote is escaped, not an FTS syntax error
+        assert len(store.search(text='"Front')) == 2
+    finally:
+        store.close()
+
+
+def test_ingest_existing_command_log(tmp_path):
+    log = tmp_path / 'dmesg.log'
+    log.write_text("2025-07-02 00:49:21 - INFO - [*] Sending command: dmesg\n"
+                   "2025-07-02 00:49:21 - INFO - line one [CRIT]\n"
+                   "2025-07-02 00:49:22 - INFO - [*] Exit status: 3\n"
+                   "2025-07-02 00:50:00 - INFO - [*] Sending command: ls\n"
+                   "2025-07-02 00:50:00 - INFO - file.txt\n", encoding='utf-8')
+    store = _store(tmp_path)
+    try:
+        assert store.ingest_file(str(log), device='unit01') == 2
+        assert store.flush()
+        hit, = store.search(severity='CRIT')
+        assert (hit['command'], hit['exit_status'], hit['ts']) == ('dmesg', 3, parse_time('2025-07-02 00:49:21'))
+    finally:
+        store.close()
+
+
+def test_line_severity_and_parse_time():
+    assert line_severity('x [WARNING] y') == 'WARN'
+    assert line_severity('nothing') is None
+    assert parse_time(12.5) == 12.5
+    assert abs(parse_time('2h') - (time.time() - 7200)) < 5
+
+
+def test_log_search_uses_the_configured_store(tmp_path, capsys):
+    db_path = str(tmp_path / 'custom' / 'store.db')
+    config = tmp_path / 'config.ini'
+    config.write_text(f"[LogStore]\nenabled = true\npath = {db_path}\n", encoding='utf-8')
+    assert log_store_path(str(config)) == db_path
+    assert log_store_path(str(tmp_path / 'missing.ini')) == DEFAULT_DB_PATH
+
+    store = LogStore(db_path)
+    store.record_run('unit01', 'dmesg', ['needle in the store'])
+    store.close()
+
+    assert log_search.main(['needle', '--config', str(config)]) == 0
+    out = capsys.readouterr().out
+    assert 'unit01 [dmesg] needle in the store' in out
+    assert '[*] 1 lines' in out
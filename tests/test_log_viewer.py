@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+log_viewer = pytest.importorskip('ui.log_viewer')
+
+
+def _wait(index, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not index.caught_up:
+        assert time.monotonic() < deadline, "MatchIndex did not catch up"
+        time.sleep(0.01)
+
+
+def test_line_store_keeps_absolute_numbers_when_dropping():
+    store = log_viewer.LineStore(max_lines=10)
+    store.append_text(''.join(f"line {i}\n" for i in range(12)) + 'tail')
+    assert store.partial == 'tail'
+    assert store.offset == 3 and store.end == 12
+    assert store.get(2) == '' and store.get(3) == 'line 3'
+    assert store.range(0, 5) == (3, ['line 3', 'line 4'])
+    assert store.range(10, 20) == (10, ['line 10', 'line 11'])
+
+
+def test_match_index_follows_appends_and_skips_dropped_lines():
+    store = log_viewer.LineStore(max_lines=100)
+    index = log_viewer.MatchIndex(store, log_viewer.make_filter(severity='ERR'))
+    try:
+        store.append_text(''.join(f"[{'ERR' if i % 10 == 0 else 'INFO'}] {i}\n" for i in range(50)))
+        index.notify()
+        _wait(index)
+        assert len(index) == 5
+        assert index.at(0) == 0 and index.next_after(0) == 10 and index.prev_before(40) == 30
+
+        # 60 more lines: the store drops the oldest 20, their matches go stale
+        store.append_text(''.join(f"[{'ERR' if i % 10 == 0 else 'INFO'}] {i}\n" for i in range(50, 110)))
+        index.notify()
+        _wait(index)
+        assert store.offset == 20
+        assert [index.at(k) for k in range(len(index))] == [20, 30, 40, 50, 60, 70, 80, 90, 100]
+        assert index.position(45) == 3
+        assert index.prev_before(20) is None
+        assert not index.contains(15)
+        assert all(store.get(index.at(k)) == f"[ERR] {index.at(k)}" for k in range(len(index)))
+    finally:
+        index.cancel()
+
+
+def test_match_index_started_after_a_drop_scans_from_the_store_offset():
+    store = log_viewer.LineStore(max_lines=10)
+    store.append_text(''.join(f"{i}\n" for i in range(25)))
+    index = log_viewer.MatchIndex(store, lambda line: line.endswith('7'))
+    try:
+        _wait(index)
+        assert [index.at(k) for k in range(len(index))] == [17]
+    finally:
+        index.cancel()
+
+
+def test_make_filter_combines_checks():
+    assert log_viewer.make_filter() is None
+    match = log_viewer.make_filter('link', severity='WARNING', component='usb')
+    assert match('[usb 1-1] [WARNING] link down')
+    assert not match('[usb 1-1] [INFO] link down')
+    assert not match('[eth0] [WARNING] link down')
@@ -0,0 +1,75 @@
+import os
+import time
+
+from serial_comm.Log_writer import CommandLogWriter
+from serial_comm.Metrics import Metrics
+
+
+def _writer(**kwargs):
+    return CommandLogWriter(flush_interval=0.05, metrics=Metrics(), **kwargs)
+
+
+def test_size_rotation_counts_encoded_bytes(tmp_path):
+    path = str(tmp_path / 'cmd.log')
+    writer = _writer(max_bytes=4000, backup_count=2)
+    try:
+        # 40 lines of ~70 characters but ~140 bytes each: over the limit in bytes only
+        writer.write_lines(path, ['é' * 50] * 40)
+        assert writer.flush()
+    finally:
+        writer.close()
+    assert os.path.exists(path + '.1')
+    assert os.path.getsize(path + '.1') > 4000
+
+
+def test_backups_are_shifted_and_capped(tmp_path):
+    path = str(tmp_path / 'cmd.log')
+    writer = _writer(max_bytes=100, backup_count=2)
+    try:
+        for i in range(4):
+            writer.write(path, f"block {i} " + 'x' * 100)
+            assert writer.flush()
+    finally:
+        writer.close()
+    # Every block fills a file of its own; only the newest two are kept
+    assert sorted(os.listdir(tmp_path)) == ['cmd.log.1', 'cmd.log.2']
+    for suffix, block in (('.1', 'block 3'), ('.2', 'block 2')):
+        with open(path + suffix, encoding='utf-8') as f:
+            assert block in f.read()
+
+
+def test_age_rotation_uses_the_file_age(tmp_path):
+    path = str(tmp_path / 'cmd.log')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("old line\n")
+    old = time.time() - 3600
+    os.utime(path, (old, old))
+
+    writer = _writer(max_age=60)
+    try:
+        writer.write(path, "new line")
+        assert writer.flush()
+        # A young file stays put however long its handle is open
+        writer.write(path, "second line")
+        assert writer.flush()
+    finally:
+        writer.close()
+    with open(path + '.1', encoding='utf-8') as f:
+        assert f.read() == "old line\n"
+    with open(path, encoding='utf-8') as f:
+        assert [line.split(' - ')[-1] for line in f.read().splitlines()] == ['new line', 'second line']
+
+
+def test_writer_survives_unexpected_errors(tmp_path, capsys):
+    path = str(tmp_path / 'cmd.log')
+    writer = _writer()
+    try:
+        writer.write(123, "not a path")
+        assert writer.flush()
+        writer.write(path, "still running")
+        assert writer.flush()
+    finally:
+        writer.close()
+    assert "Unexpected error writing log file 123" in capsys.readouterr().out
+    with open(path, encoding='utf-8') as f:
+        assert f.read().endswith(" - INFO - still running\n")
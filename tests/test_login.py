@@ -14,7 +14,8 @@ def main():
     # Optionally set credentials if not set already
     # login_manager.set_credentials('your_username', 'your_password')
 
-    if login_manager.login_sequence():
+    # Skips the login exchange when the device still has a shell from an earlier run
+    if login_manager.ensure_logged_in():
         print("Logged in successfully!")
     else:
         print("Login failed.")
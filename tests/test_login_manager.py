@@ -0,0 +1,39 @@
+from serial_comm.Credentials import MemoryCredentials
+from serial_comm.Login_manager import LoginManager
+from serial_comm.Metrics import Metrics
+from serial_comm.Serial_Comm import SerialComm
+
+
+def _login_manager(device, tmp_path, login_id='root', password='secret'):
+    serial_comm = SerialComm(device.write_config(str(tmp_path / 'sim.ini')), metrics=Metrics())
+    serial_comm.open()
+    return LoginManager(serial_comm, credentials=MemoryCredentials(login_id, password))
+
+
+def test_login_sequence_reaches_shell(login_device, tmp_path):
+    login_manager = _login_manager(login_device, tmp_path)
+    messages = []
+    try:
+        assert login_manager.probe_session() == 'login'
+        assert login_manager.login_sequence(timeout=5, output_callback=messages.append)
+        assert "> [password entered]" in messages
+        assert 'secret' not in '\n'.join(messages)
+        assert login_manager.probe_session() == 'shell'
+    finally:
+        login_manager.serial_comm.close()
+
+
+def test_login_sequence_fails_with_wrong_password(login_device, tmp_path):
+    login_manager = _login_manager(login_device, tmp_path, password='wrong')
+    messages = []
+    try:
+        assert not login_manager.login_sequence(timeout=1, output_callback=messages.append)
+        assert messages[-1] == "[!] Login timed out or failed."
+        assert not login_manager.is_logged_in()
+    finally:
+        login_manager.serial_comm.close()
+
+
+def test_ensure_logged_in_skips_login_at_shell(serial_comm):
+    login_manager = LoginManager(serial_comm, credentials=MemoryCredentials())
+    assert login_manager.ensure_logged_in(timeout=1)
@@ -0,0 +1,49 @@
+import json
+
+from serial_comm.Metrics import Metrics
+
+
+def test_prometheus_text_format():
+    metrics = Metrics()
+    metrics.counter('serial_bytes_read_total', "Bytes received", port='/dev/ttyUSB0').inc(42)
+    wait = metrics.histogram('serial_write_lock_wait_seconds', "Lock wait", buckets=(0.01, 0.1), port='/dev/ttyUSB0')
+    wait.observe(0.005)
+    wait.observe(0.05)
+    wait.observe(5)
+
+    lines = metrics.to_prometheus().splitlines()
+    assert lines[:3] == ['# HELP serial_bytes_read_total Bytes received',
+                         '# TYPE serial_bytes_read_total counter',
+                         'serial_bytes_read_total{port="/dev/ttyUSB0"} 42']
+    assert 'serial_write_lock_wait_seconds_bucket{port="/dev/ttyUSB0",le="0.01"} 1' in lines
+    assert 'serial_write_lock_wait_seconds_bucket{port="/dev/ttyUSB0",le="0.1"} 2' in lines
+    assert 'serial_write_lock_wait_seconds_bucket{port="/dev/ttyUSB0",le="+Inf"} 3' in lines
+    assert 'serial_write_lock_wait_seconds_count{port="/dev/ttyUSB0"} 3' in lines
+
+
+def test_prometheus_label_values_are_escaped():
+    metrics = Metrics()
+    metrics.counter('commands_total', command='echo "a\\b"\nls').inc()
+    assert 'commands_total{command="echo \\"a\\\\b\\"\\nls"} 1' in metrics.to_prometheus().splitlines()
+
+
+def test_dump_thread_writes_a_final_dump_on_stop(tmp_path):
+    metrics = Metrics()
+    counter = metrics.counter('ticks_total')
+    path = str(tmp_path / 'metrics.json')
+    metrics.start_dump(path, interval=60)
+    counter.inc(3)
+    metrics.stop_dump()
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)['counters']['ticks_total'] == [{'labels': {}, 'value': 3}]
+
+
+def test_failed_final_dump_is_reported_not_raised(tmp_path, capsys):
+    metrics = Metrics()
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    metrics.start_dump(str(blocker / 'metrics.prom'), interval=60)
+    thread = metrics._dump_thread
+    metrics.stop_dump()
+    assert not thread.is_alive()
+    assert 'Error writing metrics file' in capsys.readouterr().out
@@ -0,0 +1,28 @@
+from serial_comm.Prompt_matcher import DEFAULT_PROMPT_SETTLE, PromptCapture, PromptMatcher
+
+
+def test_matcher_splits_lines_and_keeps_the_prompt_tail():
+    matcher = PromptMatcher()
+    assert matcher.feed(b'one\r\ntw') == ['one']
+    assert matcher.feed('o\nroot@localhost:~# ') == ['two']
+    assert matcher.at_prompt()
+    assert matcher.flush() == 'root@localhost:~#'
+
+
+def test_capture_waits_a_latency_period_before_taking_a_prompt_like_tail():
+    capture = PromptCapture('echo', timeout=5, now=0.0)
+    assert capture.take_writes(0.0) == 'echo\n'
+    capture.feed(b'echo\r\na -> ', 0.0)
+    # A USB-serial adapter holds the rest of the line back for up to its latency timer (16 ms)
+    assert capture.read_timeout(0.016) > 0
+    assert capture.feed(b'b\r\nroot@localhost:~# ', 0.017) == ['a -> b']
+    assert capture.read_timeout(0.017 + DEFAULT_PROMPT_SETTLE) is None
+    assert capture.prompt_seen
+    assert capture.flush() == 'root@localhost:~#'
+
+
+def test_run_command_keeps_output_split_after_a_prompt_character(cmd_mgr):
+    output = cmd_mgr.run_command("printf 'a -> '; sleep 0.015; echo b; printf '50%% #'; sleep 0.015; echo done",
+                                 timeout=5)
+    assert 'a -> b' in output.splitlines()
+    assert '50% #done' in output.splitlines()
@@ -0,0 +1,70 @@
+import json
+import os
+
+from serial_comm.Remote_follower import RemoteFollower
+
+
+def _append(path, text):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+
+
+def _follower(cmd_mgr, tmp_path, paths, **kwargs):
+    return RemoteFollower(cmd_mgr, paths, mirror_dir=str(tmp_path / 'mirror'),
+                          state_file=str(tmp_path / 'state.json'), timeout=5, **kwargs)
+
+
+def test_follows_new_lines_and_saves_its_state(cmd_mgr, device, tmp_path):
+    log = os.path.join(device.workdir, 'home', 'app.log')
+    _append(log, "old 1\nold 2\n")
+    follower = _follower(cmd_mgr, tmp_path, [log])
+
+    # The first poll only notes where the file ends
+    assert follower.poll() == []
+    _append(log, "new 1\nnew 2\npart")
+    assert follower.poll() == [(log, 'new 1'), (log, 'new 2')]
+    _append(log, "ial\n")
+    assert follower.poll() == [(log, 'partial')]
+
+    with open(follower.mirror_path(log), encoding='utf-8') as f:
+        assert f.read() == "new 1\nnew 2\npartial\n"
+    with open(tmp_path / 'state.json', encoding='utf-8') as f:
+        state = json.load(f)
+    assert state == {log: {'inode': str(os.stat(log).st_ino), 'offset': os.path.getsize(log)}}
+
+
+def test_resumes_from_the_saved_offset(cmd_mgr, device, tmp_path):
+    log = os.path.join(device.workdir, 'home', 'app.log')
+    _append(log, "one\n")
+    first = _follower(cmd_mgr, tmp_path, [log], from_start=True)
+    assert first.poll() == [(log, 'one')]
+
+    # A new follower (e.g. after a restart) picks up from the state file
+    _append(log, "two\nthree\n")
+    resumed = _follower(cmd_mgr, tmp_path, [log], from_start=True)
+    assert resumed.poll() == [(log, 'two'), (log, 'three')]
+    with open(resumed.mirror_path(log), encoding='utf-8') as f:
+        assert f.read() == "one\ntwo\nthree\n"
+
+
+def test_restarts_at_zero_after_an_inode_change(cmd_mgr, device, tmp_path):
+    log = os.path.join(device.workdir, 'home', 'app.log')
+    _append(log, "before rotation\nunterminated")
+    follower = _follower(cmd_mgr, tmp_path, [log], from_start=True)
+    assert follower.poll() == [(log, 'before rotation')]
+
+    # logrotate-style: the new file has a new inode, even if it is longer
+    rotated = log + '.new'
+    _append(rotated, "after rotation, a longer first line than before\n")
+    os.replace(rotated, log)
+    assert follower.poll() == [(log, 'unterminated'),
+                               (log, 'after rotation, a longer first line than before')]
+    assert follower._files[log].offset == os.path.getsize(log)
+
+
+def test_missing_file_is_taken_from_the_top_once_it_appears(cmd_mgr, device, tmp_path):
+    log = os.path.join(device.workdir, 'home', 'later.log')
+    follower = _follower(cmd_mgr, tmp_path, [log])
+    assert follower.poll() == []
+    _append(log, "first line\n")
+    assert follower.poll() == [(log, 'first line')]
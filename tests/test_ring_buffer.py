@@ -0,0 +1,73 @@
+import time
+
+from serial_comm.Ring_buffer import RingBuffer, incomplete_utf8_tail
+
+
+def test_incomplete_utf8_tail():
+    euro = '€'.encode('utf-8')
+    assert incomplete_utf8_tail(b'abc') == 0
+    assert incomplete_utf8_tail(b'abc' + euro) == 0
+    assert incomplete_utf8_tail(b'abc' + euro[:1]) == 1
+    assert incomplete_utf8_tail(b'abc' + euro[:2]) == 2
+    assert incomplete_utf8_tail(b'') == 0
+
+
+def test_lines_are_cut_across_chunks():
+    ring = RingBuffer(64)
+    sub = ring.subscribe()
+    ring.write(b'  first li')
+    ring.write(b'ne\r\nsecond\nthi')
+    assert sub.read_line(timeout=0) == '  first line'
+    assert sub.read_line_bytes(timeout=0) == b'second\n'
+    # Timeout: the partial line is returned, as a prompt would be
+    assert sub.read_line(timeout=0) == 'thi'
+    assert sub.read_line(timeout=0) == ''
+    ring.write(b'rd\n')
+    assert sub.read_line(timeout=0) == 'rd'
+    assert sub.pending() == 0
+
+
+def test_split_multibyte_character_is_kept_for_the_next_read():
+    ring = RingBuffer(64)
+    sub = ring.subscribe()
+    data = 'café ✓\n'.encode('utf-8')
+    ring.write(data[:4])
+    assert sub.read_line(timeout=0) == 'caf'
+    ring.write(data[4:7])
+    assert sub.read_line(timeout=0) == 'é'
+    ring.write(data[7:])
+    assert sub.read_line(timeout=0) == '✓'
+
+
+def test_line_wrapping_the_ring_and_dropped_bytes():
+    ring = RingBuffer(16)
+    sub = ring.subscribe()
+    ring.write(b'0123456789\n')
+    assert sub.read_line(timeout=0) == '0123456789'
+    ring.write(b'abcdefghij\n')
+    assert sub.read_line(timeout=0) == 'abcdefghij'
+
+    late = ring.subscribe()
+    ring.write(b'x' * 20 + b'\n')
+    assert late.read_line(timeout=0) == 'x' * 15
+    assert late.dropped == 5
+
+
+def test_read_line_waits_for_the_writer():
+    ring = RingBuffer(64)
+    sub = ring.subscribe()
+    start = time.monotonic()
+    assert sub.read_line(timeout=0.05) == ''
+    assert time.monotonic() - start >= 0.04
+    ring.close()
+    assert sub.read_line(timeout=None) == ''
+
+
+def test_serial_comm_reads_utf8_lines_from_the_device(serial_comm):
+    serial_comm.ser.timeout = 2
+    serial_comm.write("printf 'caf\\303\\251 %s\\n' done\n")
+    deadline = time.monotonic() + 5
+    lines = []
+    while 'café done' not in lines and time.monotonic() < deadline:
+        lines.append(serial_comm.read_line())
+    assert 'café done' in lines
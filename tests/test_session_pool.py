@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from serial_comm import Session_pool
+from serial_comm.Credentials import MemoryCredentials
+from serial_comm.Login_manager import LoginManager
+from serial_comm.Session_pool import SessionPool
+
+
+@pytest.fixture
+def pool(login_device, tmp_path, monkeypatch):
+    def login_manager(serial_comm, device=None):
+        return LoginManager(serial_comm, device=device, credentials=MemoryCredentials('root', 'secret'))
+
+    monkeypatch.setattr(Session_pool, 'LoginManager', login_manager)
+    pool = SessionPool(login_device.write_config(str(tmp_path / 'sim.ini')), logs_dir=str(tmp_path / 'logs'),
+                       probe_interval=60, login_timeout=5)
+    yield pool
+    pool.close_all()
+
+
+def test_checkout_logs_in_once_and_reuses_the_session(pool):
+    messages = []
+    with pool.checkout(output_callback=messages.append) as cmd_mgr:
+        assert cmd_mgr.run_command_framed('echo one', timeout=5).output == 'one'
+    assert "> [password entered]" in messages
+
+    session = pool._sessions['default']
+    verified = session.verified_at
+    messages.clear()
+    with pool.checkout(output_callback=messages.append) as again:
+        assert again is cmd_mgr
+        assert again.run_command_framed('echo two', timeout=5).output == 'two'
+    # Inside probe_interval: neither a probe nor a login
+    assert messages == [] and session.verified_at == verified
+
+
+def test_probe_reuses_a_live_shell_and_logs_in_again_after_logout(pool):
+    with pool.checkout() as cmd_mgr:
+        pass
+    session = pool._sessions['default']
+
+    pool.invalidate()
+    messages = []
+    with pool.checkout(output_callback=messages.append):
+        pass
+    assert messages == [] and session.verified_at > 0
+
+    session.serial_comm.write('exit\n')
+    time.sleep(0.3)
+    pool.invalidate()
+    with pool.checkout(output_callback=messages.append) as again:
+        assert again.run_command_framed('echo back', timeout=5).output == 'back'
+    assert "> [password entered]" in messages and again is cmd_mgr
+
+
+def test_unknown_device_and_failed_login(pool, monkeypatch):
+    with pytest.raises(KeyError):
+        with pool.checkout('unit99'):
+            pass
+
+    monkeypatch.setattr(Session_pool, 'LoginManager',
+                        lambda serial_comm, device=None: LoginManager(
+                            serial_comm, device=device, credentials=MemoryCredentials('root', 'wrong')))
+    pool.login_timeout = 1
+    with pytest.raises(RuntimeError, match="Could not log in"):
+        with pool.checkout():
+            pass
@@ -0,0 +1,41 @@
+import queue
+import threading
+import types
+
+import pytest
+
+ui_manager = pytest.importorskip('ui.ui_manager')
+
+
+class _Pane:
+    def __init__(self):
+        self.text = ''
+
+    def append_text(self, text):
+        self.text += text
+
+
+def _ui():
+    ui = types.SimpleNamespace(output_queue=queue.SimpleQueue(), _at_line_start=True, log_view=_Pane(),
+                               running=False)
+    ui.append_text = lambda text: ui_manager.SerialUI.append_text(ui, text)
+    ui.call_on_ui = lambda func: ui_manager.SerialUI.call_on_ui(ui, func)
+    return ui
+
+
+def test_widget_updates_from_workers_run_on_the_ui_thread_after_their_text():
+    ui = _ui()
+    calls = []
+
+    def worker():
+        ui.output_queue.put(('partial device line', False))
+        ui.append_text("[*] Login successful!")
+        ui.call_on_ui(lambda: calls.append((threading.current_thread(), ui.log_view.text)))
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert calls == []
+
+    ui_manager.SerialUI.flush_output(ui)
+    assert calls == [(threading.current_thread(), "partial device line\n[*] Login successful!\n")]
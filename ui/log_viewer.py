@@ -0,0 +1,394 @@
+import bisect
+import re
+import threading
+import tkinter as tk
+import tkinter.font as tkfont
+
+SEVERITIES = ('All', 'EMERG', 'ALERT', 'CRIT', 'ERR', 'WARNING', 'NOTICE', 'INFO', 'DEBUG')
+
+
+class LineStore:
+    """
+    Append-only store of output lines with absolute line numbers.
+
+    Text is appended in arbitrary chunks; the unterminated tail is kept in
+    `partial`. Past `max_lines`, the oldest lines are dropped in blocks and
+    `offset` (the absolute number of the first kept line) moves forward.
+    """
+
+    def __init__(self, max_lines=500000):
+        self.max_lines = max_lines
+        self.lines = []
+        self.offset = 0
+        self.partial = ''
+        self.lock = threading.Lock()
+
+    @property
+    def end(self):
+        """Absolute number one past the last complete line."""
+        return self.offset + len(self.lines)
+
+    def append_text(self, text):
+        parts = (self.partial + text).split('\n')
+        self.partial = parts.pop()
+        if not parts:
+            return
+        with self.lock:
+            self.lines.extend(parts)
+            if len(self.lines) > self.max_lines:
+                drop = len(self.lines) - self.max_lines + self.max_lines // 10
+                del self.lines[:drop]
+                self.offset += drop
+
+    def get(self, index):
+        """Line at absolute `index` ('' if it was dropped)."""
+        with self.lock:
+            i = index - self.offset
+            return self.lines[i] if 0 <= i < len(self.lines) else ''
+
+    def range(self, start, stop):
+        """
+        Copy of the kept lines with absolute numbers in [start, stop), as
+        (absolute number of the first returned line, lines).
+        """
+        with self.lock:
+            first = max(start, self.offset)
+            return first, self.lines[first - self.offset:max(0, stop - self.offset)]
+
+
+class MatchIndex:
+    """
+    Sorted absolute line numbers of the store lines matching `predicate`.
+
+    A background thread scans the store in blocks and keeps following newly
+    appended lines, so the Tk main loop only ever reads `matches` (with bisect).
+    """
+
+    BLOCK_LINES = 20000
+
+    def __init__(self, store, predicate):
+        self.store = store
+        self.predicate = predicate
+        self.matches = []
+        self.scanned = store.offset
+        self.lock = threading.Lock()
+        self._wake = threading.Event()
+        self._cancelled = False
+        threading.Thread(target=self._run, name="MatchIndex", daemon=True).start()
+
+    @property
+    def caught_up(self):
+        return self.scanned >= self.store.end
+
+    def notify(self):
+        """New lines were appended."""
+        self._wake.set()
+
+    def cancel(self):
+        self._cancelled = True
+        self._wake.set()
+
+    def _run(self):
+        predicate = self.predicate
+        while not self._cancelled:
+            start, block = self.store.range(self.scanned, self.scanned + self.BLOCK_LINES)
+            if not block:
+                self._wake.wait(0.5)
+                self._wake.clear()
+                continue
+            found = [start + i for i, line in enumerate(block) if predicate(line)]
+            with self.lock:
+                self.matches.extend(found)
+                self.scanned = start + len(block)
+
+    def _first_valid(self):
+        # Matches for lines the store has dropped are skipped, not deleted
+        return bisect.bisect_left(self.matches, self.store.offset)
+
+    def __len__(self):
+        with self.lock:
+            return len(self.matches) - self._first_valid()
+
+    def at(self, k):
+        """Absolute line number of the k-th (valid) match."""
+        with self.lock:
+            return self.matches[self._first_valid() + k]
+
+    def position(self, index):
+        """Number of valid matches before absolute line `index`."""
+        with self.lock:
+            return bisect.bisect_left(self.matches, index) - self._first_valid()
+
+    def contains(self, index):
+        with self.lock:
+            i = bisect.bisect_left(self.matches, index)
+            return i < len(self.matches) and self.matches[i] == index
+
+    def next_after(self, index):
+        """First match after absolute line `index`, or None."""
+        with self.lock:
+            i = max(bisect.bisect_right(self.matches, index), self._first_valid())
+            return self.matches[i] if i < len(self.matches) else None
+
+    def prev_before(self, index):
+        """Last match before absolute line `index`, or None."""
+        with self.lock:
+            i = bisect.bisect_left(self.matches, index) - 1
+            return self.matches[i] if i >= self._first_valid() else None
+
+
+def make_filter(pattern='', severity='All', component=''):
+    """
+    Build a line predicate from a regex, a "[LEVEL]" severity and a "[COMPONENT"
+    prefix; None when nothing is filtered.
+
+    Raises:
+        re.error: If `pattern` is not a valid regex.
+    """
+    checks = []
+    if pattern:
+        checks.append(re.compile(pattern).search)
+    if severity and severity != 'All':
+        token = f"[{severity}]"
+        checks.append(lambda line: token in line)
+    if component:
+        prefix = f"[{component}"
+        checks.append(lambda line: prefix in line)
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    return lambda line: all(check(line) for check in checks)
+
+
+class LogViewer(tk.Frame):
+    """
+    Output pane that only renders the visible rows.
+
+    Lines live in a LineStore; the Text widget holds just one screenful, redrawn
+    when the view moves or new data arrives. Filtering (regex, severity,
+    component) and find run as MatchIndex background scans; "Next"/"Prev" jump
+    with a bisect over the match list instead of searching from the top.
+    The view follows new output while it is scrolled to the bottom.
+    """
+
+    REFRESH_MS = 50
+
+    def __init__(self, master, max_lines=500000, **kwargs):
+        super().__init__(master, **kwargs)
+        self.store = LineStore(max_lines)
+        self.filter_index = None
+        self.search_index = None
+        self.search_regex = None
+        self.current_match = None
+        self.top = 0
+        self.follow = True
+        self._dirty = True
+        self._last_state = None
+
+        toolbar = tk.Frame(self)
+        toolbar.pack(fill='x')
+        tk.Label(toolbar, text="Filter").pack(side='left')
+        self.filter_entry = tk.Entry(toolbar, width=18)
+        self.filter_entry.pack(side='left', padx=2)
+        self.filter_entry.bind('<Return>', self.apply_filter)
+        self.severity_var = tk.StringVar(value='All')
+        tk.OptionMenu(toolbar, self.severity_var, *SEVERITIES,
+                      command=lambda _: self.apply_filter()).pack(side='left', padx=2)
+        tk.Label(toolbar, text="Component").pack(side='left')
+        self.component_entry = tk.Entry(toolbar, width=14)
+        self.component_entry.pack(side='left', padx=2)
+        self.component_entry.bind('<Return>', self.apply_filter)
+        tk.Label(toolbar, text="Find").pack(side='left', padx=(8, 0))
+        self.find_entry = tk.Entry(toolbar, width=16)
+        self.find_entry.pack(side='left', padx=2)
+        self.find_entry.bind('<Return>', lambda event: self.find_next())
+        tk.Button(toolbar, text="Prev", command=self.find_prev).pack(side='left')
+        tk.Button(toolbar, text="Next", command=self.find_next).pack(side='left')
+        self.status_label = tk.Label(toolbar, anchor='e')
+        self.status_label.pack(side='right')
+
+        body = tk.Frame(self)
+        body.pack(expand=True, fill='both')
+        self.scrollbar = tk.Scrollbar(body, command=self._on_scrollbar)
+        self.scrollbar.pack(side='right', fill='y')
+        self.text = tk.Text(body, wrap='none', state='disabled')
+        self.text.pack(side='left', expand=True, fill='both')
+        self.text.tag_configure('hit', background='yellow')
+        self.text.tag_configure('current', background='orange')
+        self.font = tkfont.Font(font=self.text['font'])
+
+        for widget in (self.text, self.scrollbar):
+            widget.bind('<MouseWheel>', self._on_wheel)
+            widget.bind('<Button-4>', lambda event: self.scroll(-3))
+            widget.bind('<Button-5>', lambda event: self.scroll(3))
+        self.text.bind('<Configure>', lambda event: self._mark_dirty())
+        self.after(self.REFRESH_MS, self._tick)
+
+    # -- data -------------------------------------------------------------
+
+    def append_text(self, text):
+        """Append raw output; call from the Tk main loop."""
+        self.store.append_text(text)
+        for index in (self.filter_index, self.search_index):
+            if index is not None:
+                index.notify()
+        self._dirty = True
+
+    # -- view model -------------------------------------------------------
+
+    def _rows(self):
+        return max(1, self.text.winfo_height() // max(1, self.font.metrics('linespace')))
+
+    def _view_len(self):
+        if self.filter_index is not None:
+            return len(self.filter_index)
+        return len(self.store.lines) + (1 if self.store.partial else 0)
+
+    def _view_line(self, k):
+        """(absolute line number or None for the partial line, text) of view row k."""
+        if self.filter_index is not None:
+            index = self.filter_index.at(k)
+            return index, self.store.get(index)
+        index = self.store.offset + k
+        if index >= self.store.end:
+            return None, self.store.partial
+        return index, self.store.get(index)
+
+    def _view_position(self, index):
+        if self.filter_index is not None:
+            return self.filter_index.position(index)
+        return index - self.store.offset
+
+    def _mark_dirty(self):
+        self._dirty = True
+
+    def _tick(self):
+        state = (self.store.end, self.store.partial,
+                 len(self.filter_index) if self.filter_index is not None else None,
+                 len(self.search_index) if self.search_index is not None else None)
+        if self._dirty or state != self._last_state:
+            self._last_state = state
+            self._dirty = False
+            self.render()
+        self.after(self.REFRESH_MS, self._tick)
+
+    def render(self):
+        rows = self._rows()
+        total = self._view_len()
+        if self.follow:
+            self.top = max(0, total - rows)
+        self.top = max(0, min(self.top, max(0, total - rows)))
+        visible = [self._view_line(k) for k in range(self.top, min(total, self.top + rows))]
+
+        self.text.configure(state='normal')
+        self.text.delete('1.0', tk.END)
+        self.text.insert('1.0', '\n'.join(line for _, line in visible))
+        if self.search_regex is not None:
+            for row, (index, line) in enumerate(visible, start=1):
+                for match in self.search_regex.finditer(line):
+                    tag = 'current' if index == self.current_match else 'hit'
+                    self.text.tag_add(tag, f"{row}.{match.start()}", f"{row}.{match.end()}")
+        self.text.configure(state='disabled')
+
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        status = f"{total} lines"
+        if self.filter_index is not None and not self.filter_index.caught_up:
+            status += " (filtering...)"
+        if self.search_index is not None:
+            status += f", {len(self.search_index)} matches"
+        self.status_label.config(text=status)
+
+    # -- scrolling --------------------------------------------------------
+
+    def scroll(self, delta):
+        self.top = max(0, self.top + delta)
+        self.follow = self.top + self._rows() >= self._view_len()
+        self._dirty = True
+
+    def _on_wheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == 'moveto':
+            self.top = int(float(value) * self._view_len())
+            self.follow = self.top + self._rows() >= self._view_len()
+            self._dirty = True
+        elif action == 'scroll':
+            step = self._rows() if unit == 'pages' else 1
+            self.scroll(int(value) * step)
+
+    def show_line(self, index):
+        """Scroll so absolute line `index` is in the middle of the view."""
+        self.top = max(0, self._view_position(index) - self._rows() // 2)
+        self.follow = False
+        self._dirty = True
+
+    # -- filter and find --------------------------------------------------
+
+    def apply_filter(self, event=None):
+        try:
+            predicate = make_filter(self.filter_entry.get(), self.severity_var.get(),
+                                    self.component_entry.get().strip())
+        except re.error as e:
+            self.status_label.config(text=f"Bad filter: {e}")
+            return
+        if self.filter_index is not None:
+            self.filter_index.cancel()
+        self.filter_index = MatchIndex(self.store, predicate) if predicate else None
+        self.follow = True
+        self._dirty = True
+
+    def _update_search(self):
+        pattern = self.find_entry.get()
+        if not pattern:
+            self.search_regex = None
+            if self.search_index is not None:
+                self.search_index.cancel()
+                self.search_index = None
+            return False
+        if self.search_regex is None or self.search_regex.pattern != pattern:
+            try:
+                regex = re.compile(pattern)
+            except re.error as e:
+                self.status_label.config(text=f"Bad pattern: {e}")
+                return False
+            if self.search_index is not None:
+                self.search_index.cancel()
+            self.search_regex = regex
+            self.search_index = MatchIndex(self.store, regex.search)
+            self.current_match = None
+        return True
+
+    def _find(self, forward, retries=20):
+        if not self._update_search():
+            self._dirty = True
+            return
+        if self.current_match is not None:
+            start = self.current_match
+        else:
+            start = self._view_line(self.top)[0] if self._view_len() else self.store.offset
+            start = (start if start is not None else self.store.end) - (1 if forward else 0)
+        step = self.search_index.next_after if forward else self.search_index.prev_before
+        index = step(start)
+        # Skip hits hidden by the filter
+        while index is not None and self.filter_index is not None and not self.filter_index.contains(index):
+            index = step(index)
+        if index is None:
+            if not self.search_index.caught_up and retries:
+                # Still scanning; try again shortly instead of blocking the main loop
+                self.after(100, lambda: self._find(forward, retries - 1))
+            else:
+                self.status_label.config(text="No more matches")
+            return
+        self.current_match = index
+        self.show_line(index)
+
+    def find_next(self):
+        self._find(forward=True)
+
+    def find_prev(self):
+        self._find(forward=False)
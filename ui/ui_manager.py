@@ -1,13 +1,23 @@
 import tkinter as tk
-from tkinter import scrolledtext, messagebox, simpledialog
+from tkinter import messagebox, simpledialog
+import codecs
+import os
+import queue
 import threading
 import time
+from datetime import datetime
 
 from serial_comm.Serial_Comm import SerialComm
 from serial_comm.Login_manager import LoginManager
 from serial_comm.Command_manager import CommandManager  # Updated class name
+from ui.log_viewer import LogViewer
 
 class SerialUI(tk.Tk):
+    # Output pane refresh period; worker threads only queue text in between
+    FRAME_INTERVAL_MS = 50
+    # Lines kept in the output pane's line store; older ones are dropped
+    MAX_SCROLLBACK_LINES = 500000
+
     def __init__(self, serial_comm):
         super().__init__()
         self.title("Serial Communication UI")
@@ -17,8 +27,13 @@ class SerialUI(tk.Tk):
         self.login_manager = LoginManager(serial_comm)
         self.command_manager = CommandManager(serial_comm)  # Updated instance name
 
-        self.text_area = scrolledtext.ScrolledText(self, state='disabled', wrap='word')
-        self.text_area.pack(expand=True, fill='both', padx=5, pady=5)
+        # Only the visible rows are rendered; filter/find run in background threads
+        self.log_view = LogViewer(self, max_lines=self.MAX_SCROLLBACK_LINES)
+        self.log_view.pack(expand=True, fill='both', padx=5, pady=5)
+        # Text (and widget updates, see call_on_ui) waiting to be shown; filled from
+        # any thread, drained by the Tk main loop
+        self.output_queue = queue.SimpleQueue()
+        self._at_line_start = True
 
         self.entry = tk.Entry(self)
         self.entry.pack(fill='x', padx=5)
@@ -43,12 +58,51 @@ class SerialUI(tk.Tk):
         self.read_thread.start()
 
         self.logged_in = False
+        self.after(self.FRAME_INTERVAL_MS, self.flush_output)
 
     def append_text(self, text):
-        self.text_area.configure(state='normal')
-        self.text_area.insert(tk.END, text + '\n')
-        self.text_area.configure(state='disabled')
-        self.text_area.see(tk.END)
+        """Queue a line for the output pane; safe to call from any thread."""
+        self.output_queue.put((text + '\n', True))
+
+    def call_on_ui(self, func):
+        """
+        Queue `func` to run on the Tk main loop with the next frame, after the text
+        queued before it; safe to call from any thread. Worker threads use it for
+        every widget or dialog call, since Tk may only be used from its own thread.
+        """
+        self.output_queue.put(func)
+
+    def flush_output(self):
+        """
+        Move everything queued since the last frame into the output pane in one
+        go, then run the queued widget updates. Runs on the Tk main loop every
+        FRAME_INTERVAL_MS.
+        """
+        chunks = []
+        actions = []
+        try:
+            while True:
+                item = self.output_queue.get_nowait()
+                if callable(item):
+                    actions.append(item)
+                    continue
+                text, whole_line = item
+                # Status lines start on a line of their own, even after a partial device line
+                if whole_line and not self._at_line_start:
+                    chunks.append('\n')
+                chunks.append(text)
+                if text:
+                    self._at_line_start = text.endswith('\n')
+        except queue.Empty:
+            pass
+
+        if chunks:
+            self.log_view.append_text(''.join(chunks))
+        for action in actions:
+            action()
+
+        if self.running:
+            self.after(self.FRAME_INTERVAL_MS, self.flush_output)
 
     def send_command(self, event=None):
         cmd = self.entry.get()
@@ -60,14 +114,24 @@ class SerialUI(tk.Tk):
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to send command: {e}")
 
+    def append_status(self, text):
+        """
+        Output callback for manager tasks. Device lines are already shown via the
+        UI's own serial subscription, so only status messages are appended here.
+        """
+        if text.startswith(('[*]', '[!]', '[Error', '> ')):
+            self.append_text(text)
+
     def read_from_serial(self):
+        # Raw chunks go straight to the output queue; the pane shows partial
+        # lines as they arrive, like a terminal.
+        subscription = self.serial_comm.subscribe()
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
         while self.running:
             try:
-                line = self.serial_comm.read_line()
-                if line:
-                    self.append_text(line)
-                else:
-                    time.sleep(0.1)
+                chunk = subscription.read(timeout=0.5)
+                if chunk:
+                    self.output_queue.put((decoder.decode(chunk).replace('\r', ''), False))
             except Exception as e:
                 self.append_text(f"[Error reading serial]: {e}")
                 time.sleep(1)
@@ -81,29 +145,42 @@ class SerialUI(tk.Tk):
         self.destroy()
 
     def threaded_login(self):
-        login_id = simpledialog.askstring("Login ID", "Enter login ID:", parent=self)
-        if login_id is None:
-            return
-        password = simpledialog.askstring("Password", "Enter password:", show='*', parent=self)
-        if password is None:
-            return
+        # Stored credentials are used as they are; the dialogs only come up when
+        # there are none yet or the last login with them failed.
+        credentials = None
+        if not self.login_manager.login_id or not self.login_manager.password:
+            login_id = simpledialog.askstring("Login ID", "Enter login ID:", parent=self)
+            if login_id is None:
+                return
+            password = simpledialog.askstring("Password", "Enter password:", show='*', parent=self)
+            if password is None:
+                return
+            credentials = (login_id, password)
 
         def login_task():
             try:
-                self.login_button.config(state='disabled')
-                self.append_text("[*] Storing credentials securely...")
-                self.login_manager.set_credentials(login_id, password)
+                if credentials is not None:
+                    self.append_text("[*] Storing credentials securely...")
+                    try:
+                        self.login_manager.set_credentials(*credentials)
+                    except Exception as e:
+                        # Still usable for this session, just not saved
+                        self.login_manager.login_id, self.login_manager.password = credentials
+                        self.append_text(f"[!] Could not store credentials: {e}")
                 self.append_text("[*] Attempting login...")
-                success = self.login_manager.login_sequence(output_callback=self.append_text)
+                success = self.login_manager.login_sequence(output_callback=self.append_status)
                 self.logged_in = success
                 if success:
-                    messagebox.showinfo("Login", "LOGIN SUCCESS")
-                    self.dmesg_button.config(state='normal')
+                    self.call_on_ui(lambda: self.dmesg_button.config(state='normal'))
+                    self.call_on_ui(lambda: messagebox.showinfo("Login", "LOGIN SUCCESS"))
                 else:
-                    messagebox.showerror("Login", "LOGIN FAILED")
+                    # Ask for the credentials again on the next attempt
+                    self.login_manager.login_id = self.login_manager.password = None
+                    self.call_on_ui(lambda: messagebox.showerror("Login", "LOGIN FAILED"))
             finally:
-                self.login_button.config(state='normal')
+                self.call_on_ui(lambda: self.login_button.config(state='normal'))
 
+        self.login_button.config(state='disabled')
         threading.Thread(target=login_task, daemon=True).start()
 
     def threaded_run_dmesg(self):
@@ -112,15 +189,17 @@ class SerialUI(tk.Tk):
             return
 
         def dmesg_task():
-            self.dmesg_button.config(state='disabled')
             # Run 'dmesg' command using generic command runner
-            dmesg_output, folder_path = self.command_manager.run_command('dmesg', output_callback=self.append_text, timeout=15)
+            dmesg_output = self.command_manager.run_command('dmesg', output_callback=self.append_status, timeout=15)
             if not dmesg_output.strip():
                 self.append_text("[!] No dmesg output received.")
-                self.dmesg_button.config(state='normal')
+                self.call_on_ui(lambda: self.dmesg_button.config(state='normal'))
                 return
 
             # Save parsed logs inside the timestamped folder
+            folder_path = os.path.join(self.command_manager.logs_dir,
+                                       f"dmesg_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+            os.makedirs(folder_path, exist_ok=True)
             boot_time, warnings, errors = self.command_manager.parse_dmesg_output(dmesg_output)
 
             # Save boot time log
@@ -139,13 +218,23 @@ class SerialUI(tk.Tk):
             self.append_text(f"[*] Total warnings: {len(warnings)}")
             self.append_text(f"[*] Total errors: {len(errors)}")
 
+            # Slowest subsystems first: time until the next message after each of their lines
+            durations = self.command_manager.last_dmesg.subsystem_durations()
+            subsystem_lines = [f"{name}: {info['spent']:.6f}s over {info['count']} messages "
+                               f"({info['first']:.6f}s - {info['last']:.6f}s)"
+                               for name, info in sorted(durations.items(),
+                                                        key=lambda item: item[1]['spent'], reverse=True)]
+
             self.command_manager.save_to_file(folder_path + '/dmesg_warnings.txt', warnings, output_callback=self.append_text)
             self.command_manager.save_to_file(folder_path + '/dmesg_errors.txt', errors, output_callback=self.append_text)
+            self.command_manager.save_to_file(folder_path + '/dmesg_subsystems.txt', subsystem_lines, output_callback=self.append_text)
 
-            messagebox.showinfo("dmesg Parsing", f"Boot time: {boot_time if boot_time else 'Not found'}\n"
-                                                 f"Warnings: {len(warnings)}\nErrors: {len(errors)}")
-            self.dmesg_button.config(state='normal')
+            summary = (f"Boot time: {boot_time if boot_time else 'Not found'}\n"
+                       f"Warnings: {len(warnings)}\nErrors: {len(errors)}")
+            self.call_on_ui(lambda: self.dmesg_button.config(state='normal'))
+            self.call_on_ui(lambda: messagebox.showinfo("dmesg Parsing", summary))
 
+        self.dmesg_button.config(state='disabled')
         threading.Thread(target=dmesg_task, daemon=True).start()
 
 def main():
@@ -165,7 +254,7 @@ def main():
     root.destroy()
 
     try:
-        serial_comm = SerialComm(port, baudrate=baudrate, timeout=1)
+        serial_comm = SerialComm(port=port, baudrate=baudrate, timeout=1)
         serial_comm.open()
     except Exception as e:
         messagebox.showerror("Error", f"Failed to open serial port: {e}")